@@ -45,6 +45,8 @@ if __name__ == "__main__":
         # Cria uma instância da aplicação principal e inicia o seu loop de eventos.
         app = App()
         app.mainloop()
+        # Garante que as alterações ainda na fila de escrita chegam à planilha.
+        app.shutdown()
     except Exception as e:
         # Captura qualquer erro fatal que não foi tratado dentro da aplicação.
         messagebox.showerror(
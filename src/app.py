@@ -1,13 +1,18 @@
 # ==============================================================================
 # FICHEIRO: src/app.py
 # DESCRIÇÃO: Controlador principal da aplicação.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: O trabalho em segundo plano das telas (leituras e escritas na
+#        planilha, login) passa pela AsyncBridge (utils/async_bridge.py), que
+#        entrega os resultados na thread da UI. Ao mudar de tela, os pedidos
+#        da tela anterior são cancelados (grupo = nome da tela). Todas as
+#        threads de fundo (pedidos, pré-carregamento, revalidação do cache)
+#        são as do TaskScheduler (utils/task_scheduler.py).
 # ==============================================================================
 
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
-import threading
 import os
 import sys
 import requests
@@ -16,7 +21,10 @@ import time
 from services.auth_service import AuthService
 from services.sheets_service import SheetsService as SheetsServiceClass
 from services.occurrence_service import OccurrenceService
+from services.occurrence_prefetcher import OccurrencePrefetcher
 from services.user_service import UserService
+from utils.async_bridge import AsyncBridge
+from utils.task_scheduler import BACKGROUND, INTERACTIVE, TaskScheduler
 
 # --- ATUALIZAÇÃO: Imports das views ajustados para a nova estrutura de pastas ---
 from views.access.access_views import RequestAccessView, PendingApprovalView
@@ -42,6 +50,8 @@ class App(ctk.CTk):
     VERSION = "3.1.0"
     VERSION_URL = "https://raw.githubusercontent.com/Valente97/regtel/main/version.json"
     NEW_INSTALLER_DOWNLOAD_URL = ""
+    SHUTDOWN_TIMEOUT_SECONDS = 15 # Tempo máximo à espera dos pedidos do utilizador ao fechar
+    LOGOUT_FLUSH_TIMEOUT_MS = 10000 # Tempo máximo à espera das escritas pendentes ao sair da conta
 
     # --- ESQUEMA DE CORES ---
     BASE_COLOR = "#0A0E1A"
@@ -73,6 +83,22 @@ class App(ctk.CTk):
         self.sheets_service = SheetsServiceClass(self.auth_service)
         self.occurrence_service = OccurrenceService(self.sheets_service, self.auth_service)
         self.user_service = UserService(self.sheets_service)
+        # Threads de fundo partilhadas: os pedidos das telas passam à frente das
+        # revalidações do cache e estas à frente do pré-carregamento.
+        self.scheduler = TaskScheduler(max_workers=4)
+        self.sheets_service.set_background_executor(lambda fn: self.scheduler.submit(fn, priority=BACKGROUND))
+        # Um único event loop de fundo para os pedidos das telas (ver run_in_background).
+        self.bridge = AsyncBridge(self, self.scheduler)
+        # Detalhes e comentários das ocorrências visíveis no histórico, lidos antes de serem abertos.
+        self.prefetcher = OccurrencePrefetcher(self.occurrence_service, self.scheduler)
+        # Dados atualizados em segundo plano (ver cache_manager.py) refrescam a tela visível.
+        self.sheets_service.add_cache_listener(self._on_cache_refreshed)
+
+        # Depois de a janela fechar, os avisos das threads de fundo são ignorados (ver post_to_ui).
+        self._closed = False
+        # Logout à espera de que as escritas pendentes sejam enviadas (ver perform_logout).
+        self._logout_pending = False
+        self._logout_count = 0 # Identifica o logout em curso (o tempo de espera de um anterior é ignorado)
 
         # Variáveis de estado do utilizador
         self.user_email = ""
@@ -101,6 +127,9 @@ class App(ctk.CTk):
         """
         if self._current_frame_name:
              self.frames[self._current_frame_name].previous_view = from_view
+             if self._current_frame_name != frame_name:
+                 # Os resultados pedidos pela tela que sai já não interessam.
+                 self.bridge.cancel_group(self._current_frame_name)
 
         frame = self.frames[frame_name]
         if hasattr(frame, 'on_show'):
@@ -109,17 +138,29 @@ class App(ctk.CTk):
         self._current_frame_name = frame_name
 
 
+    def run_in_background(self, fn, *args, on_success=None, on_error=None, group=None, key=None, priority=INTERACTIVE):
+        """
+        Executa fn(*args) fora da thread da UI (ver AsyncBridge.run). `on_success`
+        e `on_error` são chamados na thread da UI; `group` é normalmente o nome
+        da tela, cujos pedidos são cancelados quando ela deixa de ser mostrada.
+        Um pedido com `key` substitui o anterior com a mesma chave (ex.: recarregar
+        uma lista antes de a leitura anterior terminar).
+        """
+        return self.bridge.run(fn, *args, on_success=on_success, on_error=on_error, group=group,
+                               key=key, priority=priority)
+
     def perform_login(self):
         """
-        Inicia o processo de login em uma thread separada para não bloquear a UI.
+        Inicia o processo de login em segundo plano para não bloquear a UI.
         """
         login_view = self.frames["LoginView"]
         login_view.set_loading_state("A autenticar com o Google...")
-        threading.Thread(target=self._login_thread, daemon=True).start()
+        self.run_in_background(self._authenticate, on_success=self._handle_login_result,
+                               on_error=lambda error: self._handle_login_result(None))
 
-    def _login_thread(self):
+    def _authenticate(self):
         """
-        Thread que executa o fluxo de autenticação.
+        Executa o fluxo de autenticação (fora da thread da UI) e devolve as credenciais.
         """
         credentials = self.auth_service.load_user_credentials()
         
@@ -127,7 +168,7 @@ class App(ctk.CTk):
         if not credentials:
             credentials = self.auth_service.run_login_flow()
         
-        self.after(0, self._handle_login_result, credentials)
+        return credentials
 
     def _handle_login_result(self, credentials):
         """
@@ -147,14 +188,38 @@ class App(ctk.CTk):
         """
         login_view = self.frames["LoginView"]
         login_view.set_loading_state("A verificar o seu perfil de utilizador...")
+        self.run_in_background(self.user_service.get_user_status, self.user_email,
+                               on_success=self._handle_user_profile, on_error=self._handle_user_profile_error)
 
-        self.user_profile = self.user_service.get_user_status(self.user_email)
+    def _handle_user_profile(self, user_profile):
+        """Guarda o perfil lido após o login e navega para a tela apropriada."""
+        self.user_profile = user_profile
+
+        # Os dados gravados na última execução são mostrados assim que forem
+        # decifrados (fora da thread da UI) e revalidados em segundo plano (o
+        # perfil foi sempre lido da planilha).
+        if self.user_profile.get("status") == "approved":
+            self.run_in_background(self.sheets_service.restore_warm_cache, self.user_email,
+                                   on_success=self._handle_warm_cache_restored, key="App.warm_cache")
 
         # Inicia a verificação de atualização em segundo plano
-        threading.Thread(target=self.check_for_updates, daemon=True).start()
+        self.run_in_background(self.check_for_updates, key="App.update_check", priority=BACKGROUND)
 
         self.navigate_based_on_status()
 
+    def _handle_warm_cache_restored(self, restored):
+        """Mostra os dados restaurados do disco na tela que, entretanto, já esteja aberta."""
+        if not restored or not self.user_email:
+            return
+        if self._current_frame_name == "HistoryView":
+            self.frames["HistoryView"].refresh_from_cache()
+        elif self._current_frame_name == "AdminDashboardView":
+            self.frames["AdminDashboardView"].refresh(force_refresh=False)
+
+    def _handle_user_profile_error(self, error):
+        self.frames["LoginView"].set_default_state()
+        messagebox.showerror("Erro", f"Não foi possível verificar o seu perfil de utilizador: {error}")
+
     def navigate_based_on_status(self):
         """
         Redireciona o utilizador para a tela correta com base no seu status.
@@ -176,16 +241,76 @@ class App(ctk.CTk):
             messagebox.showerror("Erro de Acesso", f"Status desconhecido: {status}")
             self.perform_logout()
 
+    def post_to_ui(self, fn, *args):
+        """
+        Agenda `fn(*args)` na thread da UI; pode ser chamado de qualquer thread.
+        Depois de a janela fechar (ex.: escritas enviadas em shutdown), a chamada é ignorada.
+        """
+        if self._closed:
+            return
+        try:
+            self.after(0, fn, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def destroy(self):
+        self._closed = True
+        super().destroy()
+
+    def _on_cache_refreshed(self, cache_key):
+        """Chamado (numa thread de fundo) quando uma entrada do cache foi recarregada."""
+        self.post_to_ui(self._handle_cache_refreshed, cache_key)
+
+    def _handle_cache_refreshed(self, cache_key):
+        """
+        Atualiza a tela visível com os dados recarregados (já em cache, sem nova
+        leitura). Só é chamado quando os dados mudaram (ver CacheManager.add_listener).
+        """
+        if not self.user_email:
+            return
+        is_occurrences = self.sheets_service.is_occurrences_cache_key(cache_key)
+        if is_occurrences:
+            self.prefetcher.clear()
+        if self._current_frame_name == "HistoryView" and is_occurrences:
+            self.frames["HistoryView"].refresh_from_cache()
+        elif self._current_frame_name == "AdminDashboardView" and (
+                is_occurrences or cache_key == self.sheets_service.USERS_SHEET):
+            self.frames["AdminDashboardView"].refresh(force_refresh=False)
+
     def perform_logout(self):
         """
         Realiza o logout do utilizador, limpando a sessão e retornando à tela de login.
+        As escritas ainda na fila são enviadas antes, em segundo plano (a tela de
+        login fica em espera até LOGOUT_FLUSH_TIMEOUT_MS); o cache gravado em disco é apagado.
         """
+        if self._logout_pending:
+            return
+        self._logout_pending = True
+        self._logout_count += 1
+        logout = self._logout_count
+        self.show_frame("LoginView")
+        self.frames["LoginView"].set_loading_state("A guardar as alterações pendentes...")
+        self.run_in_background(self.sheets_service.flush_pending_writes, key="App.logout_flush",
+                               on_success=lambda result: self._finish_logout(logout),
+                               on_error=lambda error: self._finish_logout(logout))
+        self.after(self.LOGOUT_FLUSH_TIMEOUT_MS, self._finish_logout, logout)
+
+    def _finish_logout(self, logout):
+        """Conclui o logout quando as escritas foram enviadas (ou o tempo de espera acabou)."""
+        if not self._logout_pending or logout != self._logout_count:
+            return
+        self._clear_session()
+        self.frames["LoginView"].set_default_state()
+
+    def _clear_session(self):
+        """Esquece o utilizador e apaga os dados em cache (em memória, na réplica e em disco)."""
+        self._logout_pending = False
         self.auth_service.logout()
         self.user_email = ""
         self.user_profile = {}
-        self.frames["LoginView"].set_default_state()
-        self.show_frame("LoginView")
+        self.prefetcher.clear()
         self.sheets_service.clear_all_cache()
+        self.sheets_service.clear_warm_cache()
 
 
     # --- MÉTODOS DE SERVIÇO (Pass-through para os serviços) ---
@@ -193,6 +318,18 @@ class App(ctk.CTk):
     def get_occurrences(self, force_refresh=False):
         return self.occurrence_service.get_all_occurrences_for_user(self.user_email, force_refresh)
 
+    def iter_occurrences(self, page_size=50, cursor=None, force_refresh=False):
+        return self.occurrence_service.iter_occurrences_for_user(self.user_email, page_size, cursor, force_refresh)
+
+    def get_occurrence_store(self, force_refresh=False):
+        return self.occurrence_service.get_occurrence_store(self.user_email, force_refresh)
+
+    def get_occurrence_store_for_admin(self, force_refresh=False):
+        return self.sheets_service.get_occurrence_store_for_admin(force_refresh)
+
+    def search_occurrences(self, query, occurrences):
+        return self.occurrence_service.search_occurrences(query, occurrences)
+
     def get_all_occurrences_for_admin(self, force_refresh=False):
         return self.sheets_service.get_all_occurrences(force_refresh)
 
@@ -201,10 +338,6 @@ class App(ctk.CTk):
         if reg_view:
             reg_view.set_submitting_state(True)
 
-        def _submit():
-            success, message = self.sheets_service.register_occurrence(self.user_email, data, tests, attachment_path)
-            self.after(0, _handle_submit_result, success, message)
-
         def _handle_submit_result(success, message):
             if reg_view:
                 reg_view.set_submitting_state(False)
@@ -214,7 +347,9 @@ class App(ctk.CTk):
                 else:
                     messagebox.showerror("Erro ao Registrar", message)
 
-        threading.Thread(target=_submit, daemon=True).start()
+        self.run_in_background(self.sheets_service.register_occurrence, self.user_email, data, tests, attachment_path,
+                               on_success=lambda result: _handle_submit_result(*result),
+                               on_error=lambda error: _handle_submit_result(False, str(error)))
 
     def submit_full_occurrence(self, title):
         """
@@ -233,10 +368,9 @@ class App(ctk.CTk):
         view = self.frames.get("SimpleCallView")
         if view:
             view.set_submitting_state(True)
-        def _submit():
-            success, message = self.occurrence_service.register_simple_call_occurrence(self.user_email, self.user_profile, data)
-            self.after(0, self._handle_generic_submit_result, success, message, view)
-        threading.Thread(target=_submit, daemon=True).start()
+        self.run_in_background(self.occurrence_service.register_simple_call_occurrence, self.user_email, self.user_profile, data,
+                               on_success=lambda result: self._handle_generic_submit_result(*result, view),
+                               on_error=lambda error: self._handle_generic_submit_result(False, str(error), view))
 
     def submit_equipment_occurrence(self, data, attachment_paths=None):
         view = self.frames.get("EquipmentView")
@@ -244,9 +378,10 @@ class App(ctk.CTk):
             view.set_submitting_state(True)
         def _submit():
             user_credentials = self.auth_service.load_user_credentials()
-            success, message = self.sheets_service.register_equipment_occurrence(user_credentials, self.user_email, data, attachment_paths or [])
-            self.after(0, self._handle_generic_submit_result, success, message, view)
-        threading.Thread(target=_submit, daemon=True).start()
+            return self.sheets_service.register_equipment_occurrence(user_credentials, self.user_email, data, attachment_paths or [])
+        self.run_in_background(_submit,
+                               on_success=lambda result: self._handle_generic_submit_result(*result, view),
+                               on_error=lambda error: self._handle_generic_submit_result(False, str(error), view))
 
     def _handle_generic_submit_result(self, success, message, view):
         if view:
@@ -261,18 +396,35 @@ class App(ctk.CTk):
     def show_occurrence_details(self, occurrence_id):
         """
         Mostra a tela de detalhes de uma ocorrência específica.
-        Busca os dados de uma ocorrência e mostra a janela de detalhes (Toplevel).
+        Se a ocorrência já foi pré-carregada (ver OccurrencePrefetcher), a janela
+        de detalhes (Toplevel) abre de imediato; senão, os dados são lidos em
+        segundo plano.
         """
+        occurrence_data = self.prefetcher.get_details(occurrence_id)
+        if occurrence_data is not None:
+            self._open_occurrence_details(occurrence_id, occurrence_data)
+            return
+
+        self.run_in_background(self.occurrence_service.get_occurrence_details, occurrence_id, self.user_email,
+                               on_success=lambda data: self._open_occurrence_details(occurrence_id, data),
+                               on_error=lambda error: self._open_occurrence_details(occurrence_id, None))
+
+    def _open_occurrence_details(self, occurrence_id, occurrence_data):
         # Importa a view aqui para evitar potenciais dependências circulares
         from views.main.occurrence_detail_view import OccurrenceDetailView
 
-        occurrence_data = self.occurrence_service.get_occurrence_details(occurrence_id)
         if occurrence_data:
             # A OccurrenceDetailView é uma janela Toplevel, então é instanciada diretamente
             detail_window = OccurrenceDetailView(master=self, occurrence_data=occurrence_data)
         else:
             messagebox.showerror("Erro", f"Não foi possível encontrar os detalhes para a ocorrência {occurrence_id}.")
 
+    def prefetch_visible_occurrences(self, occurrence_ids):
+        self.prefetcher.prefetch_visible(occurrence_ids, self.user_email)
+
+    def prefetch_occurrence(self, occurrence_id):
+        self.prefetcher.prefetch(occurrence_id, self.user_email)
+
     def get_pending_requests(self):
         return self.user_service.get_pending_requests()
 
@@ -301,15 +453,44 @@ class App(ctk.CTk):
     def update_occurrence_status_from_history(self, occurrence_id, new_status):
         """
         Atualiza o status de uma ocorrência a partir da tela de histórico.
+        A alteração é aplicada de imediato (otimista) e enviada em lote pelo
+        SheetsService; só em caso de falha definitiva o histórico é recarregado.
         """
-        success, message = self.sheets_service.update_occurrence_status(occurrence_id, new_status)
+        def _on_error(error_message):
+            self.post_to_ui(self._handle_status_write_error, occurrence_id, error_message)
+
+        success, message = self.sheets_service.queue_occurrence_status(occurrence_id, new_status, on_error=_on_error)
         if success:
             NotificationPopup(self, message, type="success")
-            self.frames["HistoryView"].load_history()
         else:
             messagebox.showerror("Erro", message)
             self.frames["HistoryView"].load_history()
 
+    def _handle_status_write_error(self, occurrence_id, error_message):
+        """Informa o utilizador de que a alteração de status não foi gravada e recarrega o histórico."""
+        messagebox.showerror("Erro", f"Não foi possível gravar o status da ocorrência {occurrence_id}: {error_message}")
+        if self.user_email and not self._logout_pending:
+            self.frames["HistoryView"].load_history()
+
+    def shutdown(self):
+        """
+        Envia as escritas ainda pendentes antes de a aplicação terminar e grava
+        o cache em disco, para o próximo arranque.
+        """
+        self._closed = True
+        self.bridge.shutdown()
+        # Os pedidos do utilizador (INTERACTIVE) ainda na fila terminam; revalidações
+        # e pré-carregamentos à espera são cancelados.
+        if not self.scheduler.shutdown(wait_for=(INTERACTIVE,), timeout=self.SHUTDOWN_TIMEOUT_SECONDS):
+            print("AVISO: Pedidos em segundo plano ainda por terminar ao fechar a aplicação.")
+        self.sheets_service.flush_pending_writes()
+        if self._logout_pending:
+            self._clear_session() # Fechou durante o logout: as escritas já foram enviadas
+        if self.user_email and self.user_profile.get("status") == "approved":
+            self.sheets_service.save_warm_cache(self.user_email)
+        print(f"DEBUG: Cache da sessão: {self.sheets_service.get_cache_stats().get('*')}")
+        print(f"DEBUG: Tarefas da sessão: {self.scheduler.stats()}")
+
     def get_current_user_profile(self):
         """Retorna o perfil do utilizador atualmente logado."""
         return self.user_profile
@@ -2,7 +2,7 @@
 # ARQUIVO: src/services/auth_manager.py
 # DESCRIÇÃO: Gerencia o armazenamento seguro das credenciais de sessão do usuário,
 #            incluindo criptografia.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
 # ==============================================================================
 
 import os
@@ -98,6 +98,27 @@ class AuthManager:
             messagebox.showerror("Erro ao Carregar Sessão", f"Não foi possível carregar os dados da sessão. Detalhes: {e}")
             return None
 
+    def encrypt_data(self, data):
+        """
+        Cifra outros dados da aplicação (JSON) com a mesma chave da sessão.
+        Devolve None se a chave não estiver disponível.
+        """
+        if not self._fernet:
+            return None
+        return self._fernet.encrypt(json.dumps(data).encode('utf-8'))
+
+    def decrypt_data(self, encrypted_data):
+        """
+        Decifra dados cifrados com encrypt_data. Devolve None se a chave não
+        estiver disponível ou se os dados foram alterados (ou cifrados com outra chave).
+        """
+        if not self._fernet:
+            return None
+        try:
+            return json.loads(self._fernet.decrypt(encrypted_data).decode('utf-8'))
+        except (InvalidToken, ValueError):
+            return None
+
     def clear_session(self):
         """
         Remove o arquivo de sessão, efetivamente fazendo logout.
@@ -0,0 +1,325 @@
+# ==============================================================================
+# FICHEIRO: src/services/cache_manager.py
+# DESCRIÇÃO: Cache em memória do SheetsService, com validade por chave,
+#            revalidação em segundo plano (stale-while-revalidate) e uma única
+#            leitura em curso por chave (single-flight).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Cada chave tem dois prazos: até ao `soft_ttl` a entrada é fresca e é
+#        devolvida sem mais; entre o `soft_ttl` e o `hard_ttl` é devolvida na
+#        mesma, mas é pedida uma atualização em segundo plano; depois do
+#        `hard_ttl`, quem pede espera pela leitura. Quem carrega os dados (o
+#        `loader`) é também quem os guarda, com set(): assim uma leitura que
+#        falha pode devolver um valor por omissão sem o pôr em cache. As
+#        leituras de cada chave passam por um SingleFlight (utils/single_flight.py).
+#        As dependências (add_dependency) dizem que entradas derivam de que
+#        fontes (ex.: as ocorrências consolidadas derivam das três abas de
+#        ocorrências): invalidar uma fonte descarta tudo o que depende dela.
+#        Cada entrada pode ter um `validator` (ex.: a versão do ficheiro no
+#        Drive quando foi lida), para quem a recarrega confirmar, com um pedido
+#        pequeno, que nada mudou e apenas renovar a entrada (touch).
+# ==============================================================================
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.single_flight import SingleFlight
+
+FRESH = 'fresh'
+STALE = 'stale'       # Fora do prazo, mas ainda pode ser mostrada (é revalidada)
+EXPIRED = 'expired'
+MISSING = 'missing'
+
+
+class CacheManager:
+    """
+    Entradas (dados + data em que foram lidos) por chave. Os prazos são
+    definidos com set_policy, e as dependências com add_dependency, para uma
+    chave ou para todas as que começam por um prefixo terminado em ':'
+    (ex.: "scoped_occurrences:"). Thread-safe.
+    """
+    def __init__(self, soft_ttl_seconds: float, hard_ttl_seconds: float):
+        self._default_policy = (soft_ttl_seconds, hard_ttl_seconds)
+        self._policies: Dict[str, Tuple[float, float]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._flights = SingleFlight()
+        # Uma leitura começada antes de invalidate()/clear() não é partilhada
+        # com as que começam depois (ver _flight_key).
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._listeners: List[Callable[[str], None]] = []
+        # Onde correm as atualizações em segundo plano (ver set_background_executor).
+        self._background_executor: Optional[Callable[[Callable[[], None]], Any]] = None
+        # Contadores por chave (ou prefixo), ver stats().
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'hits': 0, 'stale_hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0})
+        self._lock = threading.Lock()
+
+    # --- CONFIGURAÇÃO ---
+
+    def set_policy(self, key: str, soft_ttl_seconds: float, hard_ttl_seconds: float):
+        """Prazos de uma chave (ou de um prefixo terminado em ':')."""
+        self._policies[key] = (soft_ttl_seconds, hard_ttl_seconds)
+
+    def _policy(self, key: str) -> Tuple[float, float]:
+        policy = self._policies.get(key)
+        if policy is None and ':' in key:
+            policy = self._policies.get(self._prefix_of(key))
+        return policy or self._default_policy
+
+    @staticmethod
+    def _prefix_of(key: str) -> str:
+        """Prefixo de uma chave (ex.: "scoped_occurrences:"), ou a própria chave se não tiver."""
+        return key.split(':', 1)[0] + ':' if ':' in key else key
+
+    def add_dependency(self, key: str, *sources: str):
+        """
+        Declara que `key` (uma chave ou um prefixo terminado em ':') é derivada
+        de `sources`: invalidar qualquer uma delas invalida também `key` (e o
+        que, por sua vez, depender de `key`).
+        """
+        with self._lock:
+            for source in sources:
+                self._dependents[source].add(key)
+
+    def set_background_executor(self, executor: Optional[Callable[[Callable[[], None]], Any]]):
+        """
+        Define quem executa as atualizações em segundo plano: uma função que
+        recebe a função a correr (ex.: TaskScheduler.submit). Por omissão, cada
+        atualização tem a sua thread.
+        """
+        self._background_executor = executor
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """
+        Regista uma função chamada com a chave sempre que uma atualização em
+        segundo plano traz dados diferentes dos que estavam em cache (uma
+        revalidação sem alterações não avisa ninguém). É chamada nessa thread
+        (as views devem usar after()).
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    # --- ENTRADAS ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dados da entrada, independentemente da idade."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry['data'] if entry is not None else default
+
+    def timestamp(self, key: str) -> Optional[datetime]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry['timestamp'] if entry is not None else None
+
+    def set(self, key: str, data: Any, timestamp: Optional[datetime] = None, pinned: bool = False,
+            validator: Optional[str] = None, generation: Optional[Tuple[int, int, int]] = None) -> bool:
+        """
+        Guarda os dados de uma chave. `timestamp` é a data em que foram lidos
+        (por omissão, agora). Uma entrada `pinned` (ex.: restaurada do disco)
+        nunca expira: fica "stale" até ser substituída. Com `generation` (ver
+        generation()), nada é guardado se a chave foi invalidada desde então
+        (devolve False).
+        """
+        with self._lock:
+            if generation is not None and self._generation_of(key) != generation:
+                return False
+            self._entries[key] = {'data': data, 'timestamp': timestamp or datetime.now(), 'pinned': pinned,
+                                  'validator': validator}
+            return True
+
+    def generation(self, key: str) -> Tuple[int, int, int]:
+        """
+        Marca que muda sempre que a chave é invalidada (ou o cache limpo), para
+        quem lê os dados antes de os guardar com set(..., generation=...).
+        """
+        with self._lock:
+            return self._generation_of(key)
+
+    def _generation_of(self, key: str) -> Tuple[int, int, int]:
+        return (self._epoch, self._generations.get(key, 0), self._generations.get(self._prefix_of(key), 0))
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> bool:
+        """
+        Substitui os dados da chave por fn(dados), mantendo a data de leitura e
+        o validator (para refletir uma escrita local). Devolve False se a chave
+        não tiver dados.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['data'] is None:
+                return False
+            entry['data'] = fn(entry['data'])
+            return True
+
+    def validator(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry['validator'] if entry is not None else None
+
+    def set_validator(self, key: str, validator: str, read_since: datetime):
+        """
+        Associa `validator` aos dados da chave, se foram guardados depois de
+        `read_since` (o momento em que o validator foi obtido).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['timestamp'] >= read_since:
+                entry['validator'] = validator
+
+    def touch(self, key: str):
+        """Marca os dados da chave como confirmados agora (a fonte não mudou)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['timestamp'] = datetime.now()
+            entry['pinned'] = False
+            self._stats[self._prefix_of(key)]['not_modified'] += 1
+
+    def invalidate(self, key: str) -> List[str]:
+        """
+        Descarta os dados de uma chave (a próxima leitura vai à planilha) e os
+        de todas as que dependem dela. Devolve as chaves descartadas que tinham dados.
+        """
+        with self._lock:
+            pending = [key]
+            affected: Set[str] = set()
+            while pending:
+                current = pending.pop()
+                if current in affected:
+                    continue
+                affected.add(current)
+                pending.extend(self._dependents.get(current, ()))
+
+            removed = []
+            for affected_key in affected:
+                self._generations[affected_key] = self._generations.get(affected_key, 0) + 1
+                self._stats[self._prefix_of(affected_key)]['invalidations'] += 1
+                if affected_key.endswith(':'):
+                    matching = [entry_key for entry_key in self._entries if entry_key.startswith(affected_key)]
+                else:
+                    matching = [affected_key] if affected_key in self._entries else []
+                for entry_key in matching:
+                    del self._entries[entry_key]
+                    removed.append(entry_key)
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def items(self) -> List[Tuple[str, Any, datetime, Optional[str]]]:
+        """(chave, dados, data de leitura, validator) de todas as entradas."""
+        with self._lock:
+            return [(key, entry['data'], entry['timestamp'], entry['validator'])
+                    for key, entry in self._entries.items()]
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def state(self, key: str) -> str:
+        """FRESH, STALE, EXPIRED ou MISSING (ver as notas no topo do ficheiro)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return self._state_of(key, entry)
+
+    def _state_of(self, key: str, entry: Optional[Dict[str, Any]]) -> str:
+        if entry is None or entry['data'] is None:
+            return MISSING
+        soft_ttl, hard_ttl = self._policy(key)
+        age = (datetime.now() - entry['timestamp']).total_seconds()
+        if age < soft_ttl:
+            return FRESH
+        if age < hard_ttl or entry['pinned']:
+            return STALE
+        return EXPIRED
+
+    def is_fresh(self, key: str) -> bool:
+        return self.state(key) == FRESH
+
+    def is_usable(self, key: str) -> bool:
+        """Indica se a entrada pode ser mostrada (fresca ou à espera de revalidação)."""
+        return self.state(key) in (FRESH, STALE)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Contadores por chave (as chaves com prefixo são agrupadas): `hits`
+        (entrada fresca), `stale_hits` (servida e revalidada em segundo plano),
+        `misses` (foi preciso esperar pela leitura), `not_modified` (recargas
+        evitadas por o validator não ter mudado) e `invalidations`. Em
+        '*', os totais e `shared_reads` (leituras que aproveitaram outra em curso).
+        """
+        with self._lock:
+            result = {key: dict(counters) for key, counters in self._stats.items()}
+        totals = {name: sum(counters[name] for counters in result.values())
+                  for name in ('hits', 'stale_hits', 'misses', 'not_modified', 'invalidations')}
+        totals['shared_reads'] = self._flights.shared
+        result['*'] = totals
+        return result
+
+    def _count(self, key: str, counter: str):
+        with self._lock:
+            self._stats[self._prefix_of(key)][counter] += 1
+
+    # --- LEITURA ---
+
+    def fetch(self, key: str, loader: Callable[[], Any], force_refresh: bool = False) -> Any:
+        """
+        Dados de uma chave. Frescos: devolvidos logo. Fora do prazo mas ainda
+        utilizáveis: devolvidos logo, com uma atualização em segundo plano.
+        Expirados, em falta ou com `force_refresh`: chama o `loader` (que deve
+        guardar o resultado com set()) e devolve o que ele devolver; se já houver
+        uma leitura dessa chave em curso, espera por ela em vez de repetir o pedido.
+        """
+        if not force_refresh:
+            with self._lock:
+                entry = self._entries.get(key)
+            state = self._state_of(key, entry)
+            if state == FRESH:
+                self._count(key, 'hits')
+                return entry['data']
+            if state == STALE:
+                self._count(key, 'stale_hits')
+                self.refresh_in_background(key, loader)
+                return entry['data']
+        self._count(key, 'misses')
+        return self._flights.do(self._flight_key(key), loader)
+
+    def refresh_in_background(self, key: str, loader: Callable[[], Any]):
+        """Atualiza uma chave em segundo plano (nada faz se já houver uma leitura em curso)."""
+        previous = self.get(key)
+
+        def _on_refreshed(_result):
+            current = self.get(key)
+            # Comparação por valor só quando o loader leu dados novos (ex.: outra aba mudou).
+            if current is not previous and current != previous:
+                self._notify(key)
+        self._flights.do_in_background(self._flight_key(key), loader, _on_refreshed,
+                                       executor=self._background_executor)
+
+    def is_refreshing(self, key: str) -> bool:
+        return self._flights.in_flight(self._flight_key(key))
+
+    def _flight_key(self, key: str) -> Tuple[str, int, int, int]:
+        with self._lock:
+            return (key,) + self._generation_of(key)
+
+    def _notify(self, key: str):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(key)
+            except Exception as e:
+                print(f"ERRO num observador do cache '{key}': {e}")
@@ -0,0 +1,136 @@
+# ==============================================================================
+# FICHEIRO: src/services/header_schema.py
+# DESCRIÇÃO: Cabeçalho de uma aba (nomes originais e normalizados -> coluna),
+#            partilhado por todos os registos lidos dessa aba.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Cada registo (SheetRecord) guarda apenas a lista de valores da linha,
+#        tal como veio da planilha (sem cópia). O nome original ("Registrador
+#        Main Group") e o normalizado ("registradormaingroup") são duas formas
+#        de aceder ao mesmo valor, através do HeaderSchema da aba.
+# ==============================================================================
+
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+class HeaderSchema:
+    """
+    Nomes das colunas de uma aba. `names` tem o nome normalizado de cada coluna
+    (minúsculas, sem espaços; repetidos recebem o sufixo _1, _2, ...) e `index`
+    associa esses nomes e os originais ao índice da coluna. `projected` indica
+    que o cabeçalho é só de algumas colunas da aba (leitura projetada).
+    """
+    __slots__ = ('raw_headers', 'names', 'index', 'projected')
+
+    def __init__(self, raw_headers: Sequence[str], projected: bool = False):
+        self.raw_headers: List[str] = [str(h).strip() if h else '' for h in raw_headers]
+        self.projected = projected
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+
+        seen_headers: Dict[str, int] = {}
+        for original_header in self.raw_headers:
+            normalized_header = self.normalize(original_header)
+            if normalized_header in seen_headers:
+                seen_headers[normalized_header] += 1
+                normalized_header = f"{normalized_header}_{seen_headers[normalized_header]}"
+            else:
+                seen_headers[normalized_header] = 0
+            self.names.append(normalized_header)
+
+        for i, name in enumerate(self.names):
+            self.index[name] = i
+        for i, original_header in enumerate(self.raw_headers):
+            self.index.setdefault(original_header, i)
+
+    @staticmethod
+    def normalize(header: Any) -> str:
+        """Nome normalizado de um cabeçalho: minúsculas e sem espaços."""
+        return str(header or '').strip().lower().replace(' ', '')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def column_of(self, name: str) -> Optional[int]:
+        """Índice (começando em 0) da coluna com este nome, original ou normalizado."""
+        i = self.index.get(name)
+        if i is None:
+            i = self.index.get(self.normalize(name))
+        return i
+
+
+class SheetRecord(MutableMapping):
+    """
+    Uma linha de uma aba, acessível como dicionário pelos nomes do HeaderSchema.
+    A iteração devolve só os nomes normalizados (uma chave por coluna), e
+    apenas das colunas que a linha tem. Chaves que não são colunas da aba
+    ficam num dicionário à parte.
+    """
+    __slots__ = ('_schema', '_values', '_extra')
+
+    def __init__(self, schema: HeaderSchema, values: List[Any]):
+        self._schema = schema
+        self._values = values
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @property
+    def schema(self) -> HeaderSchema:
+        return self._schema
+
+    @property
+    def values_list(self) -> List[Any]:
+        """Valores da linha, pela ordem das colunas."""
+        return self._values
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._schema.index.get(key)
+        if i is not None:
+            if i < len(self._values):
+                return self._values[i]
+            raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        i = self._schema.index.get(key)
+        if i is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+            return
+        if i >= len(self._values):
+            self._values.extend([''] * (i + 1 - len(self._values)))
+        self._values[i] = value
+
+    def __delitem__(self, key: str):
+        if self._extra is not None and key in self._extra:
+            del self._extra[key]
+            return
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        names = self._schema.names
+        yield from names[:len(self._values)]
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return min(len(self._values), len(self._schema.names)) + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key: object) -> bool:
+        i = self._schema.index.get(key)
+        if i is not None:
+            return i < len(self._values)
+        return bool(self._extra) and key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._schema.index.get(key)
+        if i is not None:
+            return self._values[i] if i < len(self._values) else default
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
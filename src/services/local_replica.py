@@ -0,0 +1,265 @@
+# ==============================================================================
+# FICHEIRO: src/services/local_replica.py
+# DESCRIÇÃO: Réplica local (SQLite) das abas da planilha Google Sheets, usada
+#            pelo SheetsService para responder às leituras sem ir à rede.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: A réplica guarda as linhas exatamente como o get_all_values() as
+#        devolve (lista de strings por linha), indexadas pelo número da linha
+#        na planilha. Assim a sincronização incremental só precisa de pedir as
+#        linhas a partir da última conhecida.
+#        Cada linha é guardada cifrada com a chave Fernet do AuthManager (tal
+#        como o warm_cache.py): a réplica tem os dados de todos os grupos. Por
+#        isso, as consultas filtradas (query_rows) decifram as linhas e
+#        comparam-nas em Python, não no SQLite. Uma réplica de uma versão
+#        anterior (em texto simples) ou cifrada com outra chave é descartada.
+# ==============================================================================
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+KEY_CHECK = 'REGTEL'  # Valor cifrado em meta, para reconhecer a chave com que a réplica foi escrita
+
+
+class LocalReplica:
+    """
+    Guarda uma cópia local das abas da planilha num ficheiro SQLite.
+
+    Cada aba é guardada linha a linha (incluindo o cabeçalho, na linha 1),
+    juntamente com o estado da última sincronização: número de linhas
+    conhecidas e data da última sincronização (incremental e completa).
+    """
+    SCHEMA_VERSION = 2 # 2: linhas cifradas
+
+    def __init__(self, db_path: str, auth_manager: Any):
+        """
+        :param auth_manager: Fornece encrypt_data/decrypt_data (ver AuthManager).
+        Lança RuntimeError se a chave de cifra não estiver disponível.
+        """
+        self.db_path = db_path
+        self.auth_manager = auth_manager
+        self._lock = threading.Lock()
+        if self.auth_manager.encrypt_data(KEY_CHECK) is None:
+            raise RuntimeError("Chave de cifra indisponível.")
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # O conteúdo apagado (logout, ressincronização) é sobrescrito no ficheiro.
+        self._conn.execute("PRAGMA secure_delete = ON")
+        self._create_schema()
+
+    def _create_schema(self):
+        """
+        Cria as tabelas da réplica, recriando-as se a versão do esquema mudou
+        ou se foi cifrada com outra chave.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            key_check = self._conn.execute("SELECT value FROM meta WHERE key = 'key_check'").fetchone()
+            recreate = (row is None or int(row[0]) != self.SCHEMA_VERSION or key_check is None or
+                        self.auth_manager.decrypt_data(key_check[0].encode('ascii')) != KEY_CHECK)
+            if recreate:
+                self._conn.execute("DROP TABLE IF EXISTS sheet_rows")
+                self._conn.execute("DROP TABLE IF EXISTS sheet_state")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('key_check', ?)",
+                                   (self._encode(KEY_CHECK),))
+
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_rows (
+                    sheet TEXT NOT NULL,
+                    row_num INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (sheet, row_num)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_state (
+                    sheet TEXT PRIMARY KEY,
+                    row_count INTEGER NOT NULL,
+                    synced_at TEXT,
+                    full_synced_at TEXT
+                )
+            """)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                               (str(self.SCHEMA_VERSION),))
+        if recreate:
+            # Não deixa no ficheiro páginas livres com as linhas da réplica anterior.
+            with self._lock:
+                self._conn.execute("VACUUM")
+
+    def _encode(self, values: Any) -> str:
+        token = self.auth_manager.encrypt_data(values)
+        if token is None:
+            raise RuntimeError("Chave de cifra indisponível.")
+        return token.decode('ascii')
+
+    def _decode(self, payload: str) -> Any:
+        values = self.auth_manager.decrypt_data(payload.encode('ascii'))
+        if values is None:
+            raise ValueError("Linha da réplica local ilegível (cifrada com outra chave?).")
+        return values
+
+    # --- LEITURA ---
+
+    def get_state(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """Devolve o estado da última sincronização de uma aba, ou None se nunca foi sincronizada."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_count, synced_at, full_synced_at FROM sheet_state WHERE sheet = ?",
+                (sheet_name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'row_count': row[0],
+            'synced_at': datetime.fromisoformat(row[1]) if row[1] else None,
+            'full_synced_at': datetime.fromisoformat(row[2]) if row[2] else None,
+        }
+
+    def load_values(self, sheet_name: str) -> List[List[str]]:
+        """
+        Devolve todas as linhas guardadas de uma aba, no mesmo formato de
+        worksheet.get_all_values() (o cabeçalho é a primeira linha).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM sheet_rows WHERE sheet = ? ORDER BY row_num",
+                (sheet_name,)
+            ).fetchall()
+        return [self._decode(payload) for (payload,) in rows]
+
+    def get_row(self, sheet_name: str, row_num: int) -> Optional[List[str]]:
+        """Devolve uma linha específica da aba (numeração da planilha, começando em 1)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM sheet_rows WHERE sheet = ? AND row_num = ?",
+                (sheet_name, row_num)
+            ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def query_rows(self, sheet_name: str, conditions: Dict[int, str]) -> List[Tuple[int, List[str]]]:
+        """
+        Devolve (número da linha, valores) das linhas de dados cujas colunas
+        indicadas (começando em 1) têm o valor pedido, sem distinguir maiúsculas.
+        """
+        wanted = {col - 1: str(value).strip().upper() for col, value in conditions.items()}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_num, payload FROM sheet_rows WHERE sheet = ? AND row_num > 1 ORDER BY row_num",
+                (sheet_name,)
+            ).fetchall()
+        matches = []
+        for row_num, payload in rows:
+            values = self._decode(payload)
+            if all((str(values[col]).strip().upper() if col < len(values) else '') == value
+                   for col, value in wanted.items()):
+                matches.append((row_num, values))
+        return matches
+
+    # --- ESCRITA ---
+
+    def replace_sheet(self, sheet_name: str, values: List[List[str]]):
+        """Substitui todo o conteúdo de uma aba (sincronização completa)."""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sheet_rows WHERE sheet = ?", (sheet_name,))
+            self._conn.executemany(
+                "INSERT INTO sheet_rows (sheet, row_num, payload) VALUES (?, ?, ?)",
+                [(sheet_name, i + 1, self._encode(row)) for i, row in enumerate(values)]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sheet_state (sheet, row_count, synced_at, full_synced_at) VALUES (?, ?, ?, ?)",
+                (sheet_name, len(values), now, now)
+            )
+
+    def append_rows(self, sheet_name: str, first_row_num: int, rows: List[List[str]]):
+        """
+        Acrescenta linhas novas a partir de `first_row_num` e marca a aba como
+        sincronizada. Se `rows` estiver vazia, apenas atualiza a data da sincronização.
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sheet_rows (sheet, row_num, payload) VALUES (?, ?, ?)",
+                    [(sheet_name, first_row_num + i, self._encode(row)) for i, row in enumerate(rows)]
+                )
+            self._conn.execute(
+                "UPDATE sheet_state SET row_count = MAX(row_count, ?), synced_at = ? WHERE sheet = ?",
+                (first_row_num + len(rows) - 1, now, sheet_name)
+            )
+
+    def update_cell(self, sheet_name: str, row_num: int, col: int, value: str):
+        """Atualiza uma célula (linha e coluna começam em 1) de uma linha já replicada."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload FROM sheet_rows WHERE sheet = ? AND row_num = ?",
+                (sheet_name, row_num)
+            ).fetchone()
+            if row is None:
+                return
+            values = self._decode(row[0])
+            if len(values) < col:
+                values.extend([''] * (col - len(values)))
+            values[col - 1] = value
+            self._conn.execute(
+                "UPDATE sheet_rows SET payload = ? WHERE sheet = ? AND row_num = ?",
+                (self._encode(values), sheet_name, row_num)
+            )
+
+    def update_column(self, sheet_name: str, col: int, first_row_num: int, values: List[str]):
+        """
+        Atualiza uma coluna inteira a partir de `first_row_num`, regravando
+        apenas as linhas cujo valor mudou.
+        """
+        last_row_num = first_row_num + len(values) - 1
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT row_num, payload FROM sheet_rows WHERE sheet = ? AND row_num BETWEEN ? AND ?",
+                (sheet_name, first_row_num, last_row_num)
+            ).fetchall()
+            changed = []
+            for row_num, payload in rows:
+                row_values = self._decode(payload)
+                new_value = values[row_num - first_row_num]
+                current_value = row_values[col - 1] if len(row_values) >= col else ''
+                if current_value == new_value:
+                    continue
+                if len(row_values) < col:
+                    row_values.extend([''] * (col - len(row_values)))
+                row_values[col - 1] = new_value
+                changed.append((self._encode(row_values), sheet_name, row_num))
+            if changed:
+                self._conn.executemany(
+                    "UPDATE sheet_rows SET payload = ? WHERE sheet = ? AND row_num = ?", changed
+                )
+
+    def delete_row(self, sheet_name: str, row_num: int):
+        """Remove uma linha e desloca para cima as linhas abaixo dela, tal como o delete_rows da planilha."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sheet_rows WHERE sheet = ? AND row_num = ?", (sheet_name, row_num))
+            # Feito em dois passos (números negativos) para não colidir com a chave primária.
+            self._conn.execute(
+                "UPDATE sheet_rows SET row_num = -(row_num - 1) WHERE sheet = ? AND row_num > ?",
+                (sheet_name, row_num)
+            )
+            self._conn.execute(
+                "UPDATE sheet_rows SET row_num = -row_num WHERE sheet = ? AND row_num < 0",
+                (sheet_name,)
+            )
+            self._conn.execute(
+                "UPDATE sheet_state SET row_count = row_count - 1 WHERE sheet = ? AND row_count >= ?",
+                (sheet_name, row_num)
+            )
+
+    def clear(self):
+        """Apaga todo o conteúdo da réplica (logout)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sheet_rows")
+            self._conn.execute("DELETE FROM sheet_state")
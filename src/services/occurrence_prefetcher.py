@@ -0,0 +1,128 @@
+# ==============================================================================
+# FICHEIRO: src/services/occurrence_prefetcher.py
+# DESCRIÇÃO: Carrega antecipadamente, em segundo plano, os detalhes e os
+#            comentários das ocorrências que o utilizador provavelmente vai
+#            abrir (cards visíveis no histórico e card sob o rato).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Os detalhes (registo completo) ficam num LRUCache limitado; os
+#        comentários ficam no cache do SheetsService (chave "comments:<ID>"),
+#        onde as escritas de comentários já são aplicadas. Os pedidos são
+#        agrupados: uma única tarefa PREFETCH do TaskScheduler lê, em lote,
+#        todas as ocorrências pedidas que ainda não estão carregadas nem a ser
+#        lidas (uma consulta por aba para os detalhes e uma para os
+#        comentários). Como são leituras opcionais, o número de lotes por
+#        minuto é limitado, para não gastar a quota de leituras da API, e os
+#        pedidos acima do limite são simplesmente ignorados.
+# ==============================================================================
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Iterable, Optional, Set
+
+from utils.lru_cache import LRUCache
+from utils.task_scheduler import PREFETCH, TaskScheduler
+
+
+class OccurrencePrefetcher:
+    """
+    Pré-carregamento de ocorrências por ID. Thread-safe; pensado para ser
+    chamado a partir da thread da UI (prefetch_visible, prefetch, get_details).
+    """
+    MAX_BATCHES_PER_MINUTE = 6 # Cada lote custa, no máximo, uma leitura por aba de ocorrências + uma de comentários
+
+    def __init__(self, occurrence_service: Any, scheduler: TaskScheduler, max_entries: int = 64,
+                 max_batches_per_minute: int = MAX_BATCHES_PER_MINUTE):
+        self.occurrence_service = occurrence_service
+        self._scheduler = scheduler
+        self._details = LRUCache(max_entries)
+        self._wanted: Set[str] = set() # IDs (em minúsculas) que ainda interessa carregar
+        self._pending: Set[str] = set() # IDs do lote em leitura
+        self._batch_queued = False # Há um lote agendado que ainda não começou
+        self._batch_times: Deque[float] = deque() # Início dos lotes do último minuto
+        self._max_batches_per_minute = max_batches_per_minute
+        self._generation = 0 # Incrementado em clear(): leituras anteriores são descartadas
+        self._lock = threading.Lock()
+
+    def prefetch_visible(self, occurrence_ids: Iterable[str], user_email: str):
+        """
+        Pede as ocorrências visíveis (ao utilizador `user_email`). Substitui o
+        pedido anterior: as que já não estão visíveis e ainda não começaram a
+        ser lidas são esquecidas.
+        """
+        with self._lock:
+            self._wanted = {occ_id.strip().lower() for occ_id in occurrence_ids if occ_id}
+        self._schedule(user_email)
+
+    def prefetch(self, occurrence_id: str, user_email: str):
+        """Pede uma ocorrência (ex.: o card sob o rato), sem esquecer os pedidos anteriores."""
+        if not occurrence_id:
+            return
+        with self._lock:
+            self._wanted.add(occurrence_id.strip().lower())
+        self._schedule(user_email)
+
+    def get_details(self, occurrence_id: str) -> Optional[Any]:
+        """Detalhes já carregados da ocorrência, ou None."""
+        return self._details.get(occurrence_id.strip().lower())
+
+    def discard(self, occurrence_id: str):
+        self._details.pop(occurrence_id.strip().lower())
+
+    def clear(self):
+        """Esquece tudo o que foi carregado (ex.: as ocorrências foram recarregadas)."""
+        with self._lock:
+            self._wanted = set()
+            self._generation += 1
+            self._details.clear()
+
+    def _schedule(self, user_email: str):
+        """Agenda um lote, se não houver já um à espera (esse lê os pedidos atuais quando começar)."""
+        with self._lock:
+            if self._batch_queued or not self._missing():
+                return
+            self._batch_queued = True
+            generation = self._generation
+        try:
+            self._scheduler.submit(self._load_batch, user_email, generation, priority=PREFETCH)
+        except RuntimeError: # Agendador já encerrado (a aplicação está a fechar)
+            with self._lock:
+                self._batch_queued = False
+
+    def _missing(self) -> Set[str]:
+        """IDs pedidos que não estão carregados nem a ser lidos (chamar com o lock)."""
+        return {occ_key for occ_key in self._wanted if occ_key not in self._pending and occ_key not in self._details}
+
+    def _within_rate_limit(self) -> bool:
+        """Regista o início de um lote se ainda couber no limite por minuto (chamar com o lock)."""
+        now = time.monotonic()
+        while self._batch_times and now - self._batch_times[0] >= 60:
+            self._batch_times.popleft()
+        if len(self._batch_times) >= self._max_batches_per_minute:
+            return False
+        self._batch_times.append(now)
+        return True
+
+    def _load_batch(self, user_email: str, generation: int):
+        with self._lock:
+            self._batch_queued = False
+            occ_keys = self._missing()
+            if not occ_keys or generation != self._generation:
+                return
+            if not self._within_rate_limit():
+                print(f"DEBUG: Pré-carregamento de {len(occ_keys)} ocorrência(s) ignorado (limite de leituras por minuto).")
+                return
+            self._pending.update(occ_keys)
+        try:
+            details = self.occurrence_service.get_occurrences_details(sorted(occ_keys), user_email)
+            if details:
+                self.occurrence_service.prefetch_comments(sorted(details))
+            with self._lock:
+                if generation == self._generation:
+                    for occ_key, occurrence in details.items():
+                        self._details.put(occ_key, occurrence)
+        except Exception as e:
+            print(f"AVISO: Falha ao pré-carregar {len(occ_keys)} ocorrência(s): {e}")
+        finally:
+            with self._lock:
+                self._pending.difference_update(occ_keys)
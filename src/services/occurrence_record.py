@@ -0,0 +1,97 @@
+# ==============================================================================
+# FICHEIRO: src/services/occurrence_record.py
+# DESCRIÇÃO: Registo tipado de uma ocorrência (data de registro já convertida,
+#            tipo derivado do prefixo do ID e status normalizado).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Continua a comportar-se como um dicionário (occ.get('ID'),
+#        occ['Status'] = ...), para que as vistas existentes não mudem; os campos
+#        derivados são calculados uma única vez, quando a linha é carregada, e
+#        atualizados se o campo de origem for alterado. Os valores ficam na
+#        lista da linha (ver header_schema.SheetRecord).
+# ==============================================================================
+
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+
+from services.header_schema import HeaderSchema, SheetRecord
+
+
+class OccurrenceType(Enum):
+    """Tipo de ocorrência, identificado pelo prefixo do ID (os valores coincidem com o filtro do histórico)."""
+    CHAMADA = "CHAMADA"
+    CHAMADA_SIMPLES = "CHAMADA SIMPLES"
+    EQUIPAMENTO = "EQUIPAMENTO"
+    DESCONHECIDO = "DESCONHECIDO"
+
+    @classmethod
+    def from_id(cls, occurrence_id: Any) -> "OccurrenceType":
+        prefix = str(occurrence_id or '').strip().upper().split('-')[0]
+        return _TYPE_BY_PREFIX.get(prefix, cls.DESCONHECIDO)
+
+
+_TYPE_BY_PREFIX = {
+    'CALL': OccurrenceType.CHAMADA,
+    'SCALL': OccurrenceType.CHAMADA_SIMPLES,
+    'EQUIP': OccurrenceType.EQUIPAMENTO,
+}
+
+REGISTRATION_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Colunas (nomes normalizados) de onde vêm os campos derivados do registo.
+DERIVED_FIELDS = ('id', 'dataderegistro', 'status')
+
+
+def parse_registration_date(value: Any) -> Optional[datetime]:
+    """Converte a "Data de Registro" da planilha; aceita também só a data. None se inválida."""
+    text = str(value or '').strip()
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text, REGISTRATION_DATE_FORMAT)
+    except ValueError:
+        try:
+            return datetime.strptime(text.split(' ')[0], "%Y-%m-%d")
+        except ValueError:
+            return None
+
+
+class OccurrenceRecord(SheetRecord):
+    """
+    Uma linha de uma aba de ocorrências.
+
+    :ivar occurrence_id: ID da ocorrência (sem espaços).
+    :ivar occurrence_type: OccurrenceType derivado do prefixo do ID.
+    :ivar registered_at: "Data de Registro" como datetime (None se ausente ou inválida).
+    :ivar status: Status em maiúsculas e sem espaços nas pontas.
+    """
+    __slots__ = ('occurrence_id', 'occurrence_type', 'registered_at', 'status')
+
+    def __init__(self, schema: HeaderSchema, values: List[Any]):
+        super().__init__(schema, values)
+        self.occurrence_id = ''
+        self.occurrence_type = OccurrenceType.DESCONHECIDO
+        self.registered_at: Optional[datetime] = None
+        self.status = ''
+        for name in DERIVED_FIELDS:
+            if name in self:
+                self._update_derived(name, self[name])
+
+    @property
+    def sort_date(self) -> datetime:
+        """Data para ordenação (datetime.min quando a data de registro é inválida)."""
+        return self.registered_at or datetime.min
+
+    def _update_derived(self, key: str, value: Any):
+        normalized_key = HeaderSchema.normalize(key)
+        if normalized_key == 'id':
+            self.occurrence_id = str(value or '').strip()
+            self.occurrence_type = OccurrenceType.from_id(self.occurrence_id)
+        elif normalized_key == 'dataderegistro':
+            self.registered_at = parse_registration_date(value)
+        elif normalized_key == 'status':
+            self.status = str(value or '').strip().upper()
+
+    def __setitem__(self, key: str, value: Any):
+        super().__setitem__(key, value)
+        self._update_derived(key, value)
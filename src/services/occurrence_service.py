@@ -1,7 +1,7 @@
 # ==============================================================================
 # ARQUIVO: src/services/occurrence_service.py
 # DESCRIÇÃO: Encapsula a lógica de negócio para o gerenciamento de ocorrências.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
 # ==============================================================================
 
 import json
@@ -14,16 +14,32 @@ class OccurrenceService:
     def __init__(self, sheets_service, auth_service):
         self.sheets_service = sheets_service
         self.auth_service = auth_service
-        self.occurrences_cache = None
 
     def get_all_occurrences_for_user(self, user_email, force_refresh=False):
         """
         Obtém todas as ocorrências visíveis para um utilizador específico,
-        com a opção de forçar uma atualização do cache.
+        com a opção de forçar uma atualização do cache (o do SheetsService).
         """
-        if force_refresh or self.occurrences_cache is None:
-            self.occurrences_cache = self.sheets_service.get_occurrences_by_user(user_email)
-        return self.occurrences_cache
+        return self.sheets_service.get_occurrences_by_user(user_email, force_refresh)
+
+    def iter_occurrences_for_user(self, user_email, page_size=50, cursor=None, force_refresh=False):
+        """
+        Gera páginas (ocorrências, cursor) das ocorrências visíveis ao utilizador,
+        da mais nova para a mais antiga. Ver SheetsService.iter_occurrences.
+        """
+        return self.sheets_service.iter_occurrences(user_email, page_size=page_size, cursor=cursor,
+                                                    force_refresh=force_refresh)
+
+    def get_occurrence_store(self, user_email, force_refresh=False):
+        """
+        Ocorrências visíveis ao utilizador num armazenamento em colunas
+        (ver OccurrenceColumnStore), para filtrar e contar sem percorrer os registos.
+        """
+        return self.sheets_service.get_occurrence_store(user_email, force_refresh)
+
+    def search_occurrences(self, query, occurrences):
+        """Filtra as ocorrências pela pesquisa livre (ver SheetsService.search_occurrences)."""
+        return self.sheets_service.search_occurrences(query, occurrences)
 
     def filter_occurrences(self, occurrences, filters):
         """
@@ -46,37 +62,60 @@ class OccurrenceService:
                      'main_group': user_profile.get("main_group", "N/A"), 'company': user_profile.get("company", "")}
         return self.sheets_service.register_simple_call_occurrence(user_email, full_data)
     
-    def get_occurrence_details(self, occurrence_id):
+    def get_occurrence_details(self, occurrence_id, user_email=None):
         """
-        Obtém os detalhes completos de uma ocorrência pelo seu ID.
+        Obtém os detalhes completos de uma ocorrência pelo seu ID. Com
+        `user_email`, só se a ocorrência for visível a esse utilizador.
         """
-        return self.sheets_service.get_occurrence_by_id(occurrence_id)
+        return self.sheets_service.get_occurrence_by_id(occurrence_id, user_email)
+
+    def get_occurrences_details(self, occurrence_ids, user_email):
+        """
+        Detalhes completos de várias ocorrências visíveis ao utilizador, por ID
+        em minúsculas, lidos em lote (ver SheetsService.get_occurrences_by_ids).
+        """
+        return self.sheets_service.get_occurrences_by_ids(occurrence_ids, user_email)
+
+    def prefetch_comments(self, occurrence_ids):
+        """Lê para o cache, numa só consulta, os comentários de várias ocorrências."""
+        self.sheets_service.prefetch_occurrence_comments(occurrence_ids)
 
     # --- MÉTODOS DE COMENTÁRIOS MOVIDOS DE sheets_service.py ---
 
-    def add_comment(self, occurrence_id, user_email, user_name, comment_text):
+    def add_comment(self, occurrence_id, user_email, user_name, comment_text, on_error=None):
         """
-        Adiciona um novo comentário a uma ocorrência.
+        Adiciona um novo comentário a uma ocorrência. A escrita é diferida
+        (write-behind); `on_error(mensagem)` é chamado se falhar definitivamente.
         """
-        return self.sheets_service.add_occurrence_comment(occurrence_id, user_email, user_name, comment_text)
+        return self.sheets_service.queue_occurrence_comment(occurrence_id, user_email, user_name, comment_text, on_error=on_error)
 
-    def update_comment(self, comment_id, new_comment_text):
+    def update_comment(self, comment_id, new_comment_text, on_error=None):
         """
-        Atualiza o texto de um comentário existente.
+        Atualiza o texto de um comentário existente. A escrita é diferida
+        (write-behind); `on_error(mensagem)` é chamado se falhar definitivamente.
         """
-        return self.sheets_service.update_occurrence_comment(comment_id, new_comment_text)
+        return self.sheets_service.queue_comment_update(comment_id, new_comment_text, on_error=on_error)
 
-    def delete_comment(self, comment_id):
+    def delete_comment(self, comment_id, on_error=None):
         """
-        Elimina um comentário da planilha.
+        Elimina um comentário da planilha. A escrita é diferida (write-behind);
+        `on_error(mensagem)` é chamado se falhar definitivamente.
         """
-        return self.sheets_service.delete_occurrence_comment(comment_id)
+        return self.sheets_service.queue_comment_delete(comment_id, on_error=on_error)
         
-    def get_comments(self, occurrence_id):
+    def get_comments(self, occurrence_id, force_refresh=False):
+        """
+        Obtém todos os comentários associados a uma ocorrência (do cache, se
+        já tiverem sido lidos e ainda estiverem no prazo).
+        """
+        return self.sheets_service.get_occurrence_comments(occurrence_id, force_refresh)
+
+    def get_cached_comments(self, occurrence_id):
         """
-        Obtém todos os comentários associados a uma ocorrência.
+        Comentários de uma ocorrência já lidos (com as escritas pendentes
+        aplicadas), sem aceder à planilha. None se ainda não foram lidos.
         """
-        return self.sheets_service.get_occurrence_comments(occurrence_id)
+        return self.sheets_service.get_cached_occurrence_comments(occurrence_id)
 
     def register_simple_call_occurrence(self, user_email: str, user_profile: Dict[str, str], data: Dict[str, str]) -> Tuple[bool, str]:
         """
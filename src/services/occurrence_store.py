@@ -0,0 +1,175 @@
+# ==============================================================================
+# FICHEIRO: src/services/occurrence_store.py
+# DESCRIÇÃO: Armazenamento em colunas das ocorrências carregadas, para filtrar
+#            e contar sem percorrer os registos um a um.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Cada coluna categórica (status, tipo, grupo e empresa do registrador)
+#        é guardada como códigos inteiros com a tabela de valores (strings
+#        "interned"); a data de registro como segundos desde 1970. Com o numpy
+#        instalado as colunas são arrays e os filtros são máscaras vetoriais;
+#        sem ele, são listas e o mesmo filtro é feito numa única passagem.
+# ==============================================================================
+
+import sys
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # O numpy é opcional
+    np = None
+
+from services.occurrence_record import OccurrenceRecord, OccurrenceType
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+MISSING_TIMESTAMP = -(2 ** 62)  # Ocorrências sem data de registro válida
+
+OCCURRENCE_TYPES = list(OccurrenceType)
+
+
+class _Categories:
+    """Tabela valor -> código de uma coluna categórica."""
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Any) -> int:
+        value = str(value or '').strip().upper()
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def codes_for(self, values: Iterable[str]) -> List[int]:
+        """Códigos dos valores já conhecidos (os desconhecidos não correspondem a nenhuma linha)."""
+        return [self._codes[v] for v in (str(v).strip().upper() for v in values) if v in self._codes]
+
+
+class OccurrenceColumnStore:
+    """
+    Colunas das ocorrências de `records`, pela mesma ordem.
+    Os filtros devolvem sempre registos de `records` (não são feitas cópias).
+    """
+    def __init__(self, records: List[OccurrenceRecord]):
+        self.records = records
+        self._position: Dict[int, int] = {id(rec): i for i, rec in enumerate(records)}
+
+        self._status = _Categories()
+        self._group = _Categories()
+        self._company = _Categories()
+
+        timestamps, status_codes, type_codes, group_codes, company_codes = [], [], [], [], []
+        type_code = {occurrence_type: i for i, occurrence_type in enumerate(OCCURRENCE_TYPES)}
+        for rec in records:
+            timestamps.append(self._timestamp(rec))
+            status_codes.append(self._status.code(rec.status))
+            type_codes.append(type_code[rec.occurrence_type])
+            group_codes.append(self._group.code(rec.get('registradormaingroup')))
+            company_codes.append(self._company.code(rec.get('registradorcompany')))
+
+        self._timestamps = self._column(timestamps, 'int64')
+        self._status_codes = self._column(status_codes, 'int32')
+        self._type_codes = self._column(type_codes, 'int8')
+        self._group_codes = self._column(group_codes, 'int32')
+        self._company_codes = self._column(company_codes, 'int32')
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _column(values: List[int], dtype: str):
+        return np.array(values, dtype=dtype) if np is not None else values
+
+    @staticmethod
+    def _timestamp(record: OccurrenceRecord) -> int:
+        if record.registered_at is None:
+            return MISSING_TIMESTAMP
+        return int((record.registered_at - EPOCH).total_seconds())
+
+    @staticmethod
+    def _day(value: date) -> int:
+        return (value - EPOCH.date()).days
+
+    # --- ATUALIZAÇÃO ---
+
+    def update_record(self, record: OccurrenceRecord):
+        """Atualiza as colunas de um registo alterado no local (ex.: novo status)."""
+        row = self._position.get(id(record))
+        if row is None:
+            return
+        self._status_codes[row] = self._status.code(record.status)
+        self._timestamps[row] = self._timestamp(record)
+
+    # --- FILTROS E ESTATÍSTICAS ---
+
+    def filter(self, statuses: Optional[Iterable[str]] = None, exclude_statuses: Optional[Iterable[str]] = None,
+               occurrence_type: Optional[OccurrenceType] = None,
+               start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[OccurrenceRecord]:
+        """
+        Registos que cumprem todos os critérios dados (os omitidos não filtram).
+        `occurrence_type` aceita o OccurrenceType ou o seu valor ("CHAMADA", ...).
+        As datas comparam só o dia de registro e excluem as ocorrências sem data.
+        """
+        rows = self._matching_rows(statuses, exclude_statuses, occurrence_type, start_date, end_date)
+        records = self.records
+        return [records[i] for i in rows]
+
+    def count(self, statuses: Optional[Iterable[str]] = None, exclude_statuses: Optional[Iterable[str]] = None,
+              occurrence_type: Optional[OccurrenceType] = None,
+              start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+        """Número de registos que cumprem os critérios (ver filter)."""
+        return len(self._matching_rows(statuses, exclude_statuses, occurrence_type, start_date, end_date))
+
+    def count_by(self, column: str) -> Dict[str, int]:
+        """Contagem por valor de uma coluna categórica: 'status', 'type', 'group' ou 'company'."""
+        if column == 'type':
+            codes, labels = self._type_codes, [t.value for t in OCCURRENCE_TYPES]
+        else:
+            categories = {'status': self._status, 'group': self._group, 'company': self._company}[column]
+            codes, labels = getattr(self, f"_{column}_codes"), categories.values
+
+        if np is not None:
+            counts = np.bincount(codes, minlength=len(labels)) if len(codes) else np.zeros(len(labels), dtype=int)
+            return {label: int(n) for label, n in zip(labels, counts) if n}
+        totals: Dict[str, int] = {}
+        for code in codes:
+            totals[labels[code]] = totals.get(labels[code], 0) + 1
+        return totals
+
+    def _matching_rows(self, statuses, exclude_statuses, occurrence_type, start_date, end_date):
+        """Índices das linhas que cumprem os critérios (array do numpy ou lista)."""
+        wanted = self._status.codes_for(statuses) if statuses is not None else None
+        excluded = self._status.codes_for(exclude_statuses) if exclude_statuses else []
+        if isinstance(occurrence_type, str):
+            occurrence_type = OccurrenceType(occurrence_type) # Ex.: valor do filtro do histórico
+        type_code = OCCURRENCE_TYPES.index(occurrence_type) if occurrence_type is not None else None
+        has_dates = start_date is not None or end_date is not None
+        low = self._day(start_date) * SECONDS_PER_DAY if start_date is not None else MISSING_TIMESTAMP + 1
+        high = (self._day(end_date) + 1) * SECONDS_PER_DAY if end_date is not None else None
+
+        if np is not None:
+            mask = np.ones(len(self.records), dtype=bool)
+            if wanted is not None:
+                mask &= np.isin(self._status_codes, wanted)
+            if excluded:
+                mask &= ~np.isin(self._status_codes, excluded)
+            if type_code is not None:
+                mask &= self._type_codes == type_code
+            if has_dates:
+                mask &= self._timestamps >= low
+                if high is not None:
+                    mask &= self._timestamps < high
+            return np.flatnonzero(mask)
+
+        wanted_set = set(wanted) if wanted is not None else None
+        excluded_set = set(excluded)
+        status_codes, type_codes, timestamps = self._status_codes, self._type_codes, self._timestamps
+        return [
+            i for i in range(len(self.records))
+            if (wanted_set is None or status_codes[i] in wanted_set)
+            and status_codes[i] not in excluded_set
+            and (type_code is None or type_codes[i] == type_code)
+            and (not has_dates or (timestamps[i] >= low and (high is None or timestamps[i] < high)))
+        ]
@@ -0,0 +1,178 @@
+# ==============================================================================
+# FICHEIRO: src/services/search_index.py
+# DESCRIÇÃO: Índice invertido de trigramas para a pesquisa livre no histórico
+#            de ocorrências.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: O texto de cada campo é normalizado (minúsculas) uma única vez, quando
+#        a ocorrência é indexada. Uma pesquisa intersecta as listas dos
+#        trigramas do termo e só confirma a correspondência exata nos
+#        candidatos, mantendo a semântica anterior ("o termo aparece em algum
+#        campo"). Aceita filtros por campo na forma `campo:valor`.
+# ==============================================================================
+
+import re
+import threading
+from typing import Dict, Any, List, Set, Optional, Tuple, Iterable
+
+# `campo:valor` (o nome do campo é comparado com as chaves normalizadas dos registos).
+# O nome tem de começar por uma letra, para que horas como "10:30" sejam texto livre.
+FIELD_QUERY_PATTERN = re.compile(r'\b([^\W\d]\w*):(\S+)')
+
+
+class OccurrenceSearchIndex:
+    """
+    Índice de pesquisa das ocorrências, indexadas pelo ID (em minúsculas).
+    Thread-safe: é preenchido pelas threads que carregam o histórico e
+    consultado pela thread da UI.
+    """
+    NGRAM_SIZE = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fields: Dict[str, Dict[str, str]] = {}  # ID -> {campo normalizado: texto em minúsculas}
+        self._records: Dict[str, Dict[str, Any]] = {}  # ID -> registo indexado
+        self._postings: Dict[str, Set[str]] = {}       # trigrama -> IDs
+        self._indexed: Set[int] = set()                # id() dos registos indexados
+
+    @staticmethod
+    def _key(occurrence: Dict[str, Any]) -> str:
+        return str(occurrence.get('ID', '')).strip().lower()
+
+    @classmethod
+    def _ngrams(cls, text: str) -> Set[str]:
+        size = cls.NGRAM_SIZE
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    @staticmethod
+    def _normalize_field(name: str) -> str:
+        return str(name).strip().lower().replace(' ', '')
+
+    # --- ATUALIZAÇÃO ---
+
+    def rebuild(self, occurrences: Iterable[Dict[str, Any]]):
+        """
+        Descarta o índice e indexa de novo as ocorrências dadas. O novo índice é
+        construído à parte, para não bloquear as pesquisas entretanto feitas.
+        """
+        fresh = OccurrenceSearchIndex()
+        for occ in occurrences:
+            fresh._add_locked(occ)
+        with self._lock:
+            self._fields, self._records = fresh._fields, fresh._records
+            self._postings, self._indexed = fresh._postings, fresh._indexed
+
+    def add(self, occurrences: Iterable[Dict[str, Any]]):
+        """Indexa (ou reindexa) as ocorrências dadas, sem mexer nas restantes."""
+        with self._lock:
+            for occ in occurrences:
+                self._add_locked(occ)
+
+    def update(self, occurrence: Dict[str, Any]):
+        """Reindexa uma ocorrência cujos valores mudaram (ex.: novo status)."""
+        self.add([occurrence])
+
+    def clear(self):
+        with self._lock:
+            self._reset_locked()
+
+    def _reset_locked(self):
+        self._fields = {}
+        self._records = {}
+        self._postings = {}
+        self._indexed = set()
+
+    def _add_locked(self, occurrence: Dict[str, Any]):
+        key = self._key(occurrence)
+        if not key:
+            return
+        if key in self._fields:
+            self._remove_locked(key)
+
+        # Os registos têm as chaves normalizadas e as originais com o mesmo valor;
+        # a normalização do nome junta-as num único campo.
+        fields: Dict[str, str] = {}
+        for name, value in occurrence.items():
+            text = str(value).lower()
+            if text:
+                fields.setdefault(self._normalize_field(name), text)
+
+        self._fields[key] = fields
+        self._records[key] = occurrence
+        self._indexed.add(id(occurrence))
+        # Os campos são separados por "\0", que nunca aparece num termo de pesquisa.
+        for gram in self._ngrams('\0'.join(fields.values())):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def _remove_locked(self, key: str):
+        for gram in self._ngrams('\0'.join(self._fields.pop(key, {}).values())):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(key)
+                if not ids:
+                    del self._postings[gram]
+        record = self._records.pop(key, None)
+        if record is not None:
+            self._indexed.discard(id(record))
+
+    # --- PESQUISA ---
+
+    @staticmethod
+    def parse_query(query: str) -> Tuple[List[Tuple[str, str]], str]:
+        """
+        Separa os filtros `campo:valor` do texto livre.
+        Devolve ([(campo, valor), ...], texto_livre), tudo em minúsculas.
+        """
+        query = (query or '').strip().lower()
+        field_terms = [(field.replace(' ', ''), value) for field, value in FIELD_QUERY_PATTERN.findall(query)]
+        free_text = ' '.join(FIELD_QUERY_PATTERN.sub(' ', query).split())
+        return field_terms, free_text
+
+    def search(self, query: str, occurrences: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Devolve, pela ordem original, as ocorrências de `occurrences` que
+        correspondem à pesquisa. As que ainda não estiverem indexadas (ou que
+        foram substituídas por outro registo com o mesmo ID) são indexadas agora.
+        """
+        field_terms, free_text = self.parse_query(query)
+        if not field_terms and not free_text:
+            return list(occurrences)
+
+        with self._lock:
+            for occ in occurrences:
+                if id(occ) not in self._indexed:
+                    self._add_locked(occ)
+            matches = {id(self._records[key]) for key in self._match_locked(field_terms, free_text)}
+
+        return [occ for occ in occurrences if id(occ) in matches]
+
+    def _match_locked(self, field_terms: List[Tuple[str, str]], free_text: str) -> Set[str]:
+        """IDs das ocorrências indexadas que satisfazem todos os termos."""
+        terms: List[Tuple[Optional[str], str]] = list(field_terms)
+        if free_text:
+            terms.append((None, free_text))
+
+        candidates: Optional[Set[str]] = None
+        for _, value in terms:
+            grams = self._ngrams(value)
+            if not grams:
+                continue # Termo curto demais para o índice: fica só a verificação abaixo
+            for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+                ids = self._postings.get(gram, set())
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return set()
+        if candidates is None:
+            candidates = set(self._fields)
+
+        return {key for key in candidates if self._matches_locked(key, terms)}
+
+    def _matches_locked(self, key: str, terms: List[Tuple[Optional[str], str]]) -> bool:
+        fields = self._fields.get(key, {})
+        for field, value in terms:
+            if field is None:
+                if not any(value in text for text in fields.values()):
+                    return False
+            # O nome do campo pode ser abreviado: `operadora:` procura em "operadoraa" e "operadorab".
+            elif not any(value in text for name, text in fields.items() if name.startswith(field)):
+                return False
+        return True
@@ -0,0 +1,118 @@
+# ==============================================================================
+# FICHEIRO: src/services/sheets_connection.py
+# DESCRIÇÃO: Ligação partilhada (thread-safe) à planilha Google Sheets e locks
+#            de leitura/escrita por aba.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Só a abertura da ligação é serializada. Os pedidos à API são
+#        protegidos pelo lock da aba a que se referem (ver lock_for), pelo que
+#        leituras e escritas em abas diferentes decorrem em paralelo.
+# ==============================================================================
+
+import threading
+from contextlib import contextmanager, ExitStack
+from typing import Optional, Dict, Iterable
+
+import gspread
+
+from utils.rw_lock import ReadWriteLock
+
+
+class SheetsConnection:
+    """
+    Guarda o cliente gspread, a planilha aberta e as abas já obtidas,
+    partilhados por todas as threads do SheetsService.
+    """
+    def __init__(self, auth_service, spreadsheet_id: str):
+        self.auth_service = auth_service
+        self.spreadsheet_id = spreadsheet_id
+
+        self._connect_lock = threading.RLock()
+        self._client: Optional[gspread.Client] = None
+        self._spreadsheet: Optional[gspread.Spreadsheet] = None
+        self._worksheets: Dict[str, gspread.Worksheet] = {}
+
+        self._sheet_locks: Dict[str, ReadWriteLock] = {}
+        self._sheet_locks_guard = threading.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._spreadsheet is not None
+
+    @property
+    def spreadsheet(self) -> Optional[gspread.Spreadsheet]:
+        return self._spreadsheet
+
+    @property
+    def client(self) -> Optional[gspread.Client]:
+        return self._client
+
+    def connect(self) -> Optional[gspread.Spreadsheet]:
+        """
+        Abre a planilha, se ainda não estiver aberta, e devolve-a.
+        Devolve None se não houver credenciais da conta de serviço; os erros
+        do gspread são propagados para quem chama.
+        """
+        spreadsheet = self._spreadsheet
+        if spreadsheet is not None:
+            return spreadsheet
+
+        with self._connect_lock:
+            # Outra thread pode ter concluído a ligação enquanto esperávamos.
+            if self._spreadsheet is not None:
+                return self._spreadsheet
+
+            print(f"DEBUG: Obtendo credenciais da conta de serviço...")
+            if not self.auth_service.get_service_account_credentials():
+                print(f"DEBUG: Erro ao obter credenciais da conta de serviço")
+                return None
+
+            print(f"DEBUG: Conectando com gspread...")
+            client = gspread.service_account(filename=self.auth_service.SERVICE_ACCOUNT_FILE)
+            print(f"DEBUG: Abrindo planilha com ID: {self.spreadsheet_id}")
+            spreadsheet = client.open_by_key(self.spreadsheet_id)
+            self._client = client
+            self._spreadsheet = spreadsheet
+            print(f"DEBUG: Conectado com sucesso ao Google Sheets")
+            return spreadsheet
+
+    def reset(self):
+        """Descarta a ligação atual (a próxima chamada a connect() volta a abri-la)."""
+        with self._connect_lock:
+            self._client = None
+            self._spreadsheet = None
+            self._worksheets = {}
+
+    def worksheet(self, sheet_name: str) -> Optional[gspread.Worksheet]:
+        """
+        Devolve a aba pedida, obtendo-a da planilha apenas na primeira vez.
+        Propaga gspread.WorksheetNotFound e os restantes erros do gspread.
+        """
+        ws = self._worksheets.get(sheet_name)
+        if ws is not None:
+            return ws
+
+        spreadsheet = self.connect()
+        if spreadsheet is None:
+            return None
+        ws = spreadsheet.worksheet(sheet_name)
+        self._worksheets[sheet_name] = ws
+        return ws
+
+    def lock_for(self, sheet_name: str) -> ReadWriteLock:
+        """Devolve o lock de leitura/escrita de uma aba (criado na primeira utilização)."""
+        with self._sheet_locks_guard:
+            lock = self._sheet_locks.get(sheet_name)
+            if lock is None:
+                lock = self._sheet_locks[sheet_name] = ReadWriteLock()
+            return lock
+
+    @contextmanager
+    def read_locks(self, sheet_names: Iterable[str]):
+        """
+        Obtém o lock de leitura de várias abas (para pedidos que abrangem mais
+        de uma aba, como o values_batch_get), sempre pela mesma ordem.
+        """
+        with ExitStack() as stack:
+            for sheet_name in sorted(set(sheet_names)):
+                stack.enter_context(self.lock_for(sheet_name).read())
+            yield
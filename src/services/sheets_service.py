@@ -2,23 +2,38 @@
 # FICHEIRO: src/services/sheets_service.py
 # DESCRIÇÃO: Lida com todas as operações de leitura e escrita na planilha
 #            Google Sheets.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
-# NOTAS: Corrigidos os alertas do Pylance relacionados a valores 'None' no cache
-#        e na lógica de data. Adicionadas verificações explícitas de 'None'
-#        para garantir que as operações de cache e de data sejam seguras.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: As abas de ocorrências e de comentários são servidas a partir de uma
+#        réplica local em SQLite (ver local_replica.py), sincronizada de forma
+#        incremental: só são pedidas as linhas novas e a coluna de status.
 # ==============================================================================
 
 import gspread
 import json
 import uuid
 import csv
+import io
+import threading
 from datetime import datetime, timedelta
 from googleapiclient.http import MediaFileUpload
 import os
 from tkinter import messagebox
-import threading
 from gspread.utils import ValueInputOption
-from typing import Optional, Dict, Any, List, Union, Tuple
+from typing import Optional, Dict, Any, Callable, List, Union, Tuple, Iterator
+
+import requests
+
+from services.cache_manager import CacheManager
+from services.local_replica import LocalReplica
+from services.header_schema import HeaderSchema, SheetRecord
+from services.occurrence_record import OccurrenceRecord
+from services.occurrence_store import OccurrenceColumnStore
+from services.search_index import OccurrenceSearchIndex
+from services.sheets_connection import SheetsConnection
+from services.warm_cache import WarmCache
+from services.write_queue import WriteBehindQueue
+from utils.lru_cache import LRUCache
+from utils.single_flight import SingleFlight
 
 class SheetsService:
     """
@@ -39,70 +54,474 @@ class SheetsService:
         # self.OCCURRENCES_SHEET = "all_occurrences"
         self.OPERATORS_SHEET = "operators"
 
-        self.gspread_lock = threading.Lock()
-        self._GC: Optional[gspread.Client] = None
-        self._SPREADSHEET: Optional[gspread.Spreadsheet] = None
-        self.is_connected = False
-        
-        self._cache: Dict[str, Dict[str, Any]] = {
-            self.USERS_SHEET: {'data': None, 'timestamp': None},
-            self.CALLS_SHEET: {'data': None, 'timestamp': None},
-            self.SIMPLE_CALLS_SHEET: {'data': None, 'timestamp': None},
-            self.EQUIPMENT_SHEET: {'data': None, 'timestamp': None},
-            self.OPERATORS_SHEET: {'data': None, 'timestamp': None},
-            "all_occurrences_cache": {'data': None, 'timestamp': None}
-        }
+        # Ligação partilhada entre threads. Cada pedido à API usa o lock de
+        # leitura/escrita da aba a que se refere (ver _read_lock/_write_lock).
+        self._connection = SheetsConnection(self.auth_service, self.SPREADSHEET_ID)
+        # Leituras iguais feitas ao mesmo tempo (ex.: duas views a abrir) partilham
+        # um só pedido (ver _shared_read). Cada escrita numa aba muda a sua
+        # geração, para que uma leitura posterior nunca receba o resultado de
+        # uma leitura que começou antes dela.
+        self._reads = SingleFlight()
+        self._write_generations: Dict[str, int] = {}
+        self._write_generations_lock = threading.Lock()
+
+        # Cache das leituras (ver cache_manager.py). Dentro de CACHE_DURATION_MINUTES
+        # uma entrada é servida sem mais; depois, até CACHE_MAX_STALE_MINUTES, é
+        # servida na mesma e recarregada em segundo plano; só então quem pede espera.
         self.CACHE_DURATION_MINUTES = 5
+        self.CACHE_MAX_STALE_MINUTES = 60
+        self.OPERATORS_CACHE_MINUTES = 60
+        self.OPERATORS_MAX_STALE_MINUTES = 7 * 24 * 60
+        self.ALL_OCCURRENCES_CACHE_KEY = "all_occurrences_cache"
+        self.SCOPED_OCCURRENCES_CACHE_PREFIX = "scoped_occurrences:"
+        self._cache = CacheManager(self.CACHE_DURATION_MINUTES * 60, self.CACHE_MAX_STALE_MINUTES * 60)
+        self._cache.set_policy(self.OPERATORS_SHEET, self.OPERATORS_CACHE_MINUTES * 60, self.OPERATORS_MAX_STALE_MINUTES * 60)
+        # As listas de ocorrências derivam das três abas: uma escrita numa delas
+        # descarta-as (ver _invalidate_sheet). Utilizadores e operadoras usam o
+        # nome da própria aba como chave.
+        occurrence_sheets = (self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET)
+        self._cache.add_dependency(self.ALL_OCCURRENCES_CACHE_KEY, *occurrence_sheets)
+        self._cache.add_dependency(self.SCOPED_OCCURRENCES_CACHE_PREFIX, *occurrence_sheets)
+
+        # Índices em memória (chave primária normalizada -> registo), reconstruídos
+        # sempre que o cache correspondente é recarregado.
+        self._occurrence_index: Dict[str, Dict[str, str]] = {}
+        self._user_index: Dict[str, Dict[str, str]] = {}
+        # Índice de pesquisa livre (trigramas) sobre os campos das ocorrências já carregadas.
+        self._search_index = OccurrenceSearchIndex()
+        # Armazenamento em colunas de cada lista de ocorrências em cache (mesma chave
+        # do _cache), usado nos filtros do histórico e nas contagens do dashboard.
+        self._occurrence_stores: Dict[str, OccurrenceColumnStore] = {}
+
+        # Cabeçalho de cada aba (HeaderSchema), lido uma vez por sessão (da réplica
+        # ou da planilha). As colunas lidas e escritas são localizadas pelo nome
+        # do cabeçalho, nunca por posições fixas.
+        self._header_schemas: Dict[str, HeaderSchema] = {}
+
+        # --- LEITURA PROJETADA ---
+        # Sem a réplica local preenchida, a lista de ocorrências é primeiro
+        # descarregada só com as colunas que o histórico mostra (nomes
+        # normalizados; as que a aba não tiver são ignoradas), para a primeira
+        # pintura; a réplica é preenchida logo a seguir em segundo plano e as
+        # linhas completas substituem as projetadas (ver get_all_occurrences).
+        # Até lá, a linha completa (testes, anexos, descrição) é lida quando os
+        # detalhes são abertos e guardada num LRU.
+        self.LIST_FIELDS = [
+            'id', 'títulodaocorrência', 'title', 'dataderegistro', 'nomedoregistrador', 'status',
+            'registrador(e-mail)', 'registradormaingroup', 'registradorcompany',
+            'origem', 'destino', 'tipodeequipamento',
+        ]
+        self.FULL_ROW_CACHE_SIZE = 200
+        self._full_occurrences = LRUCache(self.FULL_ROW_CACHE_SIZE)
+
+        # Índice de localização: aba -> {chave normalizada -> número da linha},
+        # preenchido com os dados já descarregados para evitar o ws.find().
+        # KEY_FIELDS indica a coluna (nome normalizado) que identifica cada linha.
+        self.KEY_FIELDS = {
+            self.USERS_SHEET: 'email',
+            self.CALLS_SHEET: 'id',
+            self.SIMPLE_CALLS_SHEET: 'id',
+            self.EQUIPMENT_SHEET: 'id',
+            self.OCCURRENCE_COMMENTS_SHEET: 'id_comentario',
+        }
+        self._row_index: Dict[str, Dict[str, int]] = {}
+        # Número de linhas (com o cabeçalho) de cada aba na última leitura completa.
+        self._sheet_row_counts: Dict[str, int] = {}
+
+        # --- RÉPLICA LOCAL (SQLite) ---
+        # A coluna de status das abas de ocorrências é a única alterada depois do
+        # registo e por isso é revalidada a cada sincronização incremental.
+        self.STATUS_FIELD = 'status'
+        self.COMMENT_TEXT_FIELD = 'comentario'
+        self.FULL_RESYNC_MINUTES = 30
+        self.COMMENTS_SYNC_SECONDS = 30
+        self._stale_sheets = set()
+        self._replica: Optional[LocalReplica] = self._open_replica()
+
+        # --- CONSULTAS FILTRADAS POR PERFIL ---
+        # Endpoint de consulta (Visualization API) usado para descarregar só as
+        # linhas que um perfil PREFEITURA/PARTNER pode ver quando a réplica está vazia.
+        self.GVIZ_QUERY_URL = "https://docs.google.com/spreadsheets/d/{spreadsheet_id}/gviz/tq"
+
+        # --- COMENTÁRIOS ---
+        # Os comentários de cada ocorrência ficam no cache com a chave
+        # COMMENTS_CACHE_PREFIX + ID, lidos só quando a ocorrência é aberta (apenas
+        # as linhas dela) e corrigidos a cada escrita, sem nova leitura.
+        # _comment_occurrences indica a entrada de cada comentário (para edições).
+        self.COMMENTS_CACHE_PREFIX = "comments:"
+        self._cache.set_policy(self.COMMENTS_CACHE_PREFIX, self.COMMENTS_SYNC_SECONDS, self.COMMENTS_SYNC_SECONDS)
+        self._cache.add_dependency(self.COMMENTS_CACHE_PREFIX, self.OCCURRENCE_COMMENTS_SHEET)
+        self._comment_occurrences: Dict[str, str] = {}
+
+        # --- LEITURA CONDICIONAL ---
+        # Antes de recarregar uma entrada do cache, pergunta ao Drive a versão do
+        # ficheiro (um pedido pequeno); se for a mesma de quando a entrada foi
+        # lida, a entrada é apenas renovada (ver _conditional_loader). Fora das
+        # recargas forçadas, a versão obtida é reaproveitada durante
+        # VERSION_CHECK_SECONDS, salvo escritas.
+        self.DRIVE_FILE_URL = gspread.urls.DRIVE_FILES_API_V3_URL + "/{file_id}"
+        self.VERSION_CHECK_SECONDS = 5
+        self._last_version_check: Optional[Tuple[Tuple, datetime, str]] = None
+
+        # --- ESCRITA DIFERIDA (write-behind) ---
+        # Alterações de status e comentários são acumuladas e enviadas em lote,
+        # um pedido por aba, a cada WRITE_FLUSH_INTERVAL_MS.
+        self.WRITE_FLUSH_INTERVAL_MS = 1500
+        self.WRITE_MAX_RETRIES = 3
+        self.COMMENT_HEADERS = ['id_ocorrencia', 'id_comentario', 'Email_Autor', 'Nome_Autor', 'Data_Comentario', 'Comentario']
+        self._write_queue = WriteBehindQueue(self._flush_pending_writes,
+                                             flush_interval_ms=self.WRITE_FLUSH_INTERVAL_MS,
+                                             max_retries=self.WRITE_MAX_RETRIES)
+
+        # --- CACHE PERSISTENTE ---
+        # O _cache é gravado em disco (cifrado com a chave do AuthManager) ao sair
+        # e restaurado depois do login, como entradas que nunca expiram mas são
+        # logo revalidadas em segundo plano.
+        self._warm_cache = WarmCache(self.auth_service.auth_manager, self._local_data_path('warm_cache.bin'))
+
+    def _is_cache_valid(self, cache_key: str) -> bool:
+        """Indica se a entrada do cache existe e ainda está dentro de CACHE_DURATION_MINUTES."""
+        return self._cache.is_fresh(cache_key)
+
+    def _invalidate_sheet(self, sheet_name: str):
+        """Descarta do cache a aba e tudo o que deriva dela, incluindo os armazenamentos em colunas."""
+        for cache_key in self._cache.invalidate(sheet_name):
+            self._occurrence_stores.pop(cache_key, None)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Acertos, falhas e invalidações do cache, por chave (ver CacheManager.stats)."""
+        return self._cache.stats()
+
+    def _fetch_cached(self, cache_key: str, loader: Callable[[], Any], force_refresh: bool = False) -> Any:
+        """CacheManager.fetch com leitura condicional (ver _conditional_loader)."""
+        return self._cache.fetch(cache_key, self._conditional_loader(cache_key, loader, force_refresh), force_refresh)
+
+    def _conditional_loader(self, cache_key: str, loader: Callable[[], Any],
+                            force_refresh: bool = False) -> Callable[[], Any]:
+        """
+        Envolve o `loader` de uma entrada: se a entrada tem dados e a planilha
+        não mudou desde que foram lidos (mesma versão no Drive), renova-a sem
+        os descarregar de novo. Caso contrário, chama o `loader` e guarda a
+        versão obtida ANTES da leitura (uma alteração durante a leitura faz com
+        que a próxima verificação falhe, como deve).
+        """
+        def _load():
+            cached = self._cache.get(cache_key)
+            known_version = self._cache.validator(cache_key)
+            read_since = datetime.now()
+            version = self._spreadsheet_version(0 if force_refresh else self.VERSION_CHECK_SECONDS)
+            if cached is not None and version is not None and version == known_version:
+                print(f"DEBUG: '{cache_key}' sem alterações na planilha (versão {version}).")
+                self._cache.touch(cache_key)
+                return cached
+            result = loader()
+            if version is not None:
+                self._cache.set_validator(cache_key, version, read_since)
+            return result
+        return _load
+
+    def _spreadsheet_version(self, max_age_seconds: float = 0) -> Optional[str]:
+        """
+        Versão atual do ficheiro da planilha no Drive (muda a cada edição), ou
+        None se não for possível obtê-la (nesse caso a leitura é feita na mesma).
+        Aceita a última versão obtida se tiver menos de `max_age_seconds` e não
+        houve escritas desde então.
+        """
+        with self._write_generations_lock:
+            generations = tuple(sorted(self._write_generations.items()))
+        last_check = self._last_version_check
+        if (last_check is not None and last_check[0] == generations and
+                (datetime.now() - last_check[1]).total_seconds() < max_age_seconds):
+            return last_check[2]
+
+        self._connect()
+        client = self._connection.client
+        if client is None:
+            return None
+        url = self.DRIVE_FILE_URL.format(file_id=self.SPREADSHEET_ID)
+        params = {'fields': 'version,modifiedTime', 'supportsAllDrives': True}
+
+        def _read():
+            try:
+                metadata = client.http_client.request('get', url, params=params).json()
+            except Exception as e:
+                print(f"AVISO: Não foi possível obter a versão da planilha no Drive: {e}")
+                return None
+            return f"{metadata.get('version')}@{metadata.get('modifiedTime')}"
+        version = self._shared_read('drive_version', [name for name, _ in generations], (), _read)
+        if version is not None:
+            self._last_version_check = (generations, datetime.now(), version)
+        return version
+
+    def set_background_executor(self, executor):
+        """
+        Define onde correm as atualizações do cache em segundo plano: uma função
+        que recebe a função a correr (ver CacheManager.set_background_executor).
+        """
+        self._cache.set_background_executor(executor)
+
+    def add_cache_listener(self, callback):
+        """
+        Regista uma função chamada (com a chave do cache, numa thread de fundo)
+        sempre que dados mais recentes chegam por uma atualização em segundo plano.
+        """
+        self._cache.add_listener(callback)
+
+    def is_occurrences_cache_key(self, cache_key: str) -> bool:
+        """Indica se a chave do cache é de uma lista de ocorrências (todas ou as de um perfil)."""
+        return cache_key == self.ALL_OCCURRENCES_CACHE_KEY or cache_key.startswith(self.SCOPED_OCCURRENCES_CACHE_PREFIX)
+
+    def _set_users_cache(self, records: List[Dict[str, str]], timestamp: Optional[datetime] = None, pinned: bool = False):
+        """Guarda os utilizadores no cache e reconstrói o índice por e-mail."""
+        self._cache.set(self.USERS_SHEET, records, timestamp, pinned)
+        self._user_index = {
+            str(rec['email']).strip().lower(): rec
+            for rec in records if rec.get('email')
+        }
+
+    def _set_occurrences_cache(self, occurrences: List[Dict[str, str]], timestamp: Optional[datetime] = None,
+                               pinned: bool = False, generation: Optional[Tuple[int, int, int]] = None):
+        """
+        Guarda as ocorrências consolidadas no cache e reconstrói o índice por ID.
+        Com `generation` (ver CacheManager.set), nada faz se as ocorrências foram
+        invalidadas entretanto (ex.: uma leitura em segundo plano anterior a um registo).
+        """
+        if generation is not None and self._cache.generation(self.ALL_OCCURRENCES_CACHE_KEY) != generation:
+            return
+        occurrence_index = {
+            str(occ['ID']).strip().lower(): occ
+            for occ in occurrences if occ.get('ID')
+        }
+        self._search_index.rebuild(occurrence_index.values())
+        self._occurrence_stores[self.ALL_OCCURRENCES_CACHE_KEY] = OccurrenceColumnStore(occurrences)
+        self._occurrence_index = occurrence_index
+        self._cache.set(self.ALL_OCCURRENCES_CACHE_KEY, occurrences, timestamp, pinned, generation=generation)
+
+    def _set_scoped_occurrences_cache(self, cache_key: str, occurrences: List[OccurrenceRecord],
+                                      timestamp: Optional[datetime] = None, pinned: bool = False):
+        """Guarda as ocorrências visíveis a um perfil (ver get_occurrences_by_user)."""
+        self._occurrence_stores[cache_key] = OccurrenceColumnStore(occurrences)
+        self._cache.set(cache_key, occurrences, timestamp, pinned)
+
+    def _sheet_for_occurrence_id(self, occurrence_id: str) -> str:
+        """Devolve a aba onde está guardada uma ocorrência, a partir do prefixo do ID."""
+        occ_id_lower = occurrence_id.strip().lower()
+        if 'scall' in occ_id_lower: return self.SIMPLE_CALLS_SHEET
+        if 'call' in occ_id_lower: return self.CALLS_SHEET
+        if 'equip' in occ_id_lower: return self.EQUIPMENT_SHEET
+        return ""
+
+    def _index_rows(self, sheet_name: str, all_values: List[List[str]], key_col: Optional[int] = None):
+        """
+        Reconstrói o índice de localização de uma aba a partir das linhas descarregadas
+        (cabeçalho na primeira linha). `key_col` (começando em 1) indica a coluna-chave
+        quando as linhas não são a aba inteira; por omissão é procurada no cabeçalho.
+        """
+        if sheet_name not in self.KEY_FIELDS or not all_values:
+            return
+        if key_col is None:
+            key_col = self._schema_from_header(sheet_name, all_values[0]).column_of(self.KEY_FIELDS[sheet_name])
+            if key_col is None:
+                return
+            key_col += 1
+        self._row_index[sheet_name] = {
+            str(row[key_col - 1]).strip().lower(): i + 1
+            for i, row in enumerate(all_values)
+            if i > 0 and len(row) >= key_col and str(row[key_col - 1]).strip()
+        }
+        self._sheet_row_counts[sheet_name] = len(all_values)
+
+    # --- CABEÇALHOS ---
+
+    def _schema_from_header(self, sheet_name: Optional[str], raw_headers: List[str]) -> HeaderSchema:
+        """
+        Devolve o HeaderSchema de um cabeçalho acabado de ler, reutilizando o da
+        aba se não mudou (o cabeçalho só é normalizado quando muda).
+        """
+        schema = self._header_schemas.get(sheet_name) if sheet_name else None
+        if schema is not None and schema.raw_headers == [str(h).strip() if h else '' for h in raw_headers]:
+            return schema
+        schema = HeaderSchema(raw_headers)
+        if sheet_name:
+            self._header_schemas[sheet_name] = schema
+        return schema
+
+    def _get_header_schemas(self, sheet_names: List[str]) -> Optional[Dict[str, HeaderSchema]]:
+        """
+        Cabeçalhos das abas: os já conhecidos, os da réplica local e, para os
+        restantes, a primeira linha de cada aba num único pedido. None se falhar.
+        """
+        missing = [name for name in sheet_names if name not in self._header_schemas]
+        if self._replica:
+            for sheet_name in list(missing):
+                header = self._replica.get_row(sheet_name, 1)
+                if header:
+                    self._schema_from_header(sheet_name, header)
+                    missing.remove(sheet_name)
+        if missing:
+            value_ranges = self._values_batch_get(missing, [gspread.utils.absolute_range_name(name, "1:1") for name in missing])
+            if value_ranges is None:
+                return None
+            for sheet_name, values in zip(missing, value_ranges):
+                self._schema_from_header(sheet_name, list(values[0]) if values else [])
+        return {name: self._header_schemas[name] for name in sheet_names}
+
+    def _column_number(self, sheet_name: str, field: str) -> Optional[int]:
+        """Número (começando em 1) da coluna `field` de uma aba, pelo nome do cabeçalho."""
+        schemas = self._get_header_schemas([sheet_name])
+        col = schemas[sheet_name].column_of(field) if schemas else None
+        if col is None:
+            print(f"AVISO: Coluna '{field}' não encontrada no cabeçalho da aba '{sheet_name}'.")
+            return None
+        return col + 1
+
+    def _get_columns(self, sheet_name: str, fields: List[str]) -> Optional[List[SheetRecord]]:
+        """
+        Lê apenas as colunas `fields` de uma aba (um intervalo por coluna, num único
+        pedido), sem descarregar as restantes. Devolve registos só com essas
+        colunas, ou None se o pedido falhar ou alguma coluna não existir.
+        """
+        columns = self._get_columns_batch({sheet_name: fields})
+        return columns[sheet_name] if columns is not None else None
+
+    def _get_columns_batch(self, fields_by_sheet: Dict[str, List[str]]) -> Optional[Dict[str, List[SheetRecord]]]:
+        """
+        Como _get_columns, para várias abas num único `values_batch_get`.
+        Se a coluna-chave da aba estiver entre as lidas, o índice de
+        localização é também atualizado.
+        """
+        sheet_names = list(fields_by_sheet)
+        schemas = self._get_header_schemas(sheet_names)
+        if schemas is None:
+            return None
+        columns_by_sheet: Dict[str, List[int]] = {}
+        ranges = []
+        for sheet_name, fields in fields_by_sheet.items():
+            columns = [schemas[sheet_name].column_of(field) for field in fields]
+            if any(col is None for col in columns):
+                return None
+            columns_by_sheet[sheet_name] = columns
+            for col in columns:
+                letter = self._column_letter(col + 1)
+                ranges.append(gspread.utils.absolute_range_name(sheet_name, f"{letter}:{letter}"))
+        value_ranges = self._values_batch_get(sheet_names, ranges)
+        if value_ranges is None:
+            return None
 
+        results: Dict[str, List[SheetRecord]] = {}
+        position = 0
+        for sheet_name, columns in columns_by_sheet.items():
+            chunk = value_ranges[position:position + len(columns)]
+            position += len(columns)
+            cells = [[row[0] if row else '' for row in values] for values in chunk]
+            row_count = max((len(column) for column in cells), default=0)
+            rows = [[column[i] if i < len(column) else '' for column in cells] for i in range(row_count)]
+            if not rows:
+                results[sheet_name] = []
+                continue
+            schema = schemas[sheet_name]
+            rows[0] = [schema.raw_headers[col] for col in columns]
+            key_field = self.KEY_FIELDS.get(sheet_name)
+            key_col = schema.column_of(key_field) if key_field else None
+            if key_col is not None and key_col in columns:
+                self._index_rows(sheet_name, rows, key_col=columns.index(key_col) + 1)
+            results[sheet_name] = self._records_from_values(rows, sheet_name, projection=True)
+        return results
+
+    def _find_row(self, ws: gspread.Worksheet, sheet_name: str, key: str) -> Optional[int]:
+        """
+        Devolve o número da linha do registo identificado por `key`, usando o
+        índice de localização. Só recorre ao ws.find() se o registo não estiver
+        indexado (por exemplo, acabou de ser criado por outro utilizador).
+        """
+        key_col = self._column_number(sheet_name, self.KEY_FIELDS[sheet_name])
+        if key_col is None:
+            return None
+        normalized_key = key.strip().lower()
+        row = self._row_index.get(sheet_name, {}).get(normalized_key)
+
+        if row is not None and sheet_name == self.OCCURRENCE_COMMENTS_SHEET:
+            # Os comentários podem ser apagados por outros utilizadores, o que
+            # desloca as linhas: confirma a célula-chave antes de escrever.
+            with self._read_lock(sheet_name):
+                cell = ws.acell(gspread.utils.rowcol_to_a1(row, key_col))
+            if str(cell.value or '').strip().lower() != normalized_key:
+                row = None
+
+        if row is None:
+            with self._read_lock(sheet_name):
+                cell = ws.find(key, in_column=key_col)
+            if not cell:
+                return None
+            row = cell.row
+            self._row_index.setdefault(sheet_name, {})[normalized_key] = row
+        return row
+
+    def _shift_row_index(self, sheet_name: str, deleted_row: int):
+        """Corrige o índice de localização depois de um delete_rows() deslocar as linhas abaixo."""
+        sheet_index = self._row_index.get(sheet_name)
+        if not sheet_index:
+            return
+        self._row_index[sheet_name] = {
+            key: (row - 1 if row > deleted_row else row)
+            for key, row in sheet_index.items() if row != deleted_row
+        }
+
+    @staticmethod
+    def _local_data_path(file_name: str) -> str:
+        """Caminho de um ficheiro de dados locais da aplicação (pasta REGTEL do utilizador)."""
+        base_dir = os.getenv('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base_dir, 'REGTEL', file_name)
+
+    def _open_replica(self) -> Optional[LocalReplica]:
+        """Abre a réplica local. Se falhar, o serviço continua a ler diretamente da planilha."""
+        db_path = self._local_data_path('replica.db')
+        try:
+            return LocalReplica(db_path, self.auth_service.auth_manager)
+        except Exception as e:
+            print(f"AVISO: Não foi possível abrir a réplica local em '{db_path}': {e}")
+            return None
 
     def _connect(self):
         """Conecta-se ao Google Sheets."""
+        if self._connection.is_connected:
+            return
         print(f"DEBUG: Tentando conectar ao Google Sheets...")
-        if self.is_connected and self._SPREADSHEET:
-            try:
-                if self._SPREADSHEET.id:
-                    print(f"DEBUG: Já conectado ao Sheets")
-                    return
-            except Exception:
-                print(f"DEBUG: Conexão anterior inválida, reconectando...")
-                self.is_connected = False
-                self._GC = None
-                self._SPREADSHEET = None
-        
-        with self.gspread_lock:
-            if self.is_connected:
-                return
+        try:
+            self._connection.connect()
+        except Exception as e:
+            print(f"DEBUG: Erro ao conectar ao Google Sheets: {e}")
+            messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao Google Sheets: {e}")
+            self._connection.reset()
 
-            print(f"DEBUG: Obtendo credenciais da conta de serviço...")
-            self._SERVICE_CREDENTIALS = self.auth_service.get_service_account_credentials()
-            if not self._SERVICE_CREDENTIALS:
-                print(f"DEBUG: Erro ao obter credenciais da conta de serviço")
-                self.is_connected = False
-                return
+    def _read_lock(self, sheet_name: str):
+        """Lock partilhado de uma aba, para leituras (várias em simultâneo)."""
+        return self._connection.lock_for(sheet_name).read()
 
-            try:
-                print(f"DEBUG: Conectando com gspread...")
-                self._GC = gspread.service_account(filename=self.auth_service.SERVICE_ACCOUNT_FILE)
-                print(f"DEBUG: Abrindo planilha com ID: {self.SPREADSHEET_ID}")
-                self._SPREADSHEET = self._GC.open_by_key(self.SPREADSHEET_ID)
-                self.is_connected = True
-                print(f"DEBUG: Conectado com sucesso ao Google Sheets")
-            except Exception as e:
-                 print(f"DEBUG: Erro ao conectar ao Google Sheets: {e}")
-                 messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao Google Sheets: {e}")
-                 self.is_connected = False
-                 self._GC = None
-                 self._SPREADSHEET = None
+    def _write_lock(self, sheet_name: str):
+        """Lock exclusivo de uma aba, para escritas."""
+        with self._write_generations_lock:
+            self._write_generations[sheet_name] = self._write_generations.get(sheet_name, 0) + 1
+        return self._connection.lock_for(sheet_name).write()
+
+    def _shared_read(self, kind: str, sheet_names: List[str], args: Tuple, read: Callable[[], Any]) -> Any:
+        """
+        Executa `read`, ou junta-se à mesma leitura (mesmo tipo, abas e argumentos)
+        já em curso noutra thread. O resultado é partilhado: não deve ser alterado.
+        """
+        with self._write_generations_lock:
+            generations = tuple((name, self._write_generations.get(name, 0)) for name in sorted(set(sheet_names)))
+        return self._reads.do((kind, generations, args), read)
 
     def _get_worksheet(self, sheet_name: str) -> Optional[gspread.Worksheet]:
         """Obtém uma aba específica da planilha."""
         self._connect()
-        if not self._SPREADSHEET: 
+        if not self._connection.is_connected:
             print(f"ERRO: Não conectado à planilha principal. Falha ao obter a aba '{sheet_name}'.")
             return None
 
         try:
-            return self._SPREADSHEET.worksheet(sheet_name)
+            return self._connection.worksheet(sheet_name)
         except gspread.WorksheetNotFound:
             print(f"ERRO: A aba '{sheet_name}' não foi encontrada na planilha.")
             messagebox.showerror("Erro de Planilha", f"A aba '{sheet_name}' não foi encontrada na planilha do Google Sheets. Verifique o nome da aba.")
@@ -114,39 +533,197 @@ class SheetsService:
 
     def _get_all_records_safe(self, worksheet: gspread.Worksheet) -> List[Dict[str, str]]:
         """Lê todos os registos de uma aba de forma segura."""
-        with self.gspread_lock:
-            all_values = worksheet.get_all_values()
-            if not all_values:
-                return []
+        def _read():
+            with self._read_lock(worksheet.title):
+                all_values = worksheet.get_all_values()
+            self._index_rows(worksheet.title, all_values)
+            return self._records_from_values(all_values, worksheet.title)
+        return self._shared_read('get_all_values', [worksheet.title], (), _read)
+
+    def _records_from_values(self, all_values: List[List[str]], sheet_name: Optional[str] = None,
+                             projection: bool = False) -> List[SheetRecord]:
+        """
+        Converte as linhas de uma aba (cabeçalho na primeira linha) em registos.
+        Todos os registos partilham o HeaderSchema da aba (guardado entre leituras)
+        e guardam apenas a lista de valores da linha. As linhas das abas de
+        ocorrências são devolvidas como OccurrenceRecord (data, tipo e status já
+        convertidos). Com `projection`, as linhas têm só algumas colunas da aba e
+        o cabeçalho (marcado como projetado) não substitui o guardado.
+        """
+        if not all_values:
+            return []
+
+        if projection:
+            schema = HeaderSchema(all_values[0], projected=True)
+        else:
+            schema = self._schema_from_header(sheet_name, all_values[0])
+        if sheet_name in (self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET):
+            record_type = OccurrenceRecord
+        else:
+            record_type = SheetRecord
+        return [record_type(schema, row if isinstance(row, list) else list(row)) for row in all_values[1:]]
 
-            raw_headers = all_values[0]
-            data_rows = all_values[1:]
+    # --- RÉPLICA LOCAL ---
 
-            processed_headers = []
-            seen_headers: Dict[str, int] = {}
-            for header in raw_headers:
-                original_header = header.strip() if header else ''
-                normalized_header = original_header.lower().replace(' ', '')
+    def _mark_replica_stale(self, sheet_name: str):
+        """Obriga a próxima leitura da aba a sincronizar, ignorando a idade da réplica."""
+        self._stale_sheets.add(sheet_name)
 
-                if normalized_header in seen_headers:
-                    seen_headers[normalized_header] += 1
-                    normalized_header = f"{normalized_header}_{seen_headers[normalized_header]}"
-                else:
-                    seen_headers[normalized_header] = 0
-
-                processed_headers.append(normalized_header)
-
-            processed_records = []
-            for row in data_rows:
-                processed_rec = dict()
-                for i, header in enumerate(processed_headers):
-                    if i < len(row):
-                        value = row[i]
-                        processed_rec[header] = value
-                        if raw_headers[i].strip() != header:
-                             processed_rec[raw_headers[i].strip()] = value
-                processed_records.append(processed_rec)
-            return processed_records
+    def _sync_sheet(self, sheet_name: str, max_age_seconds: float = 0) -> bool:
+        """
+        Sincroniza a réplica local de uma aba com a planilha.
+        Se a réplica foi sincronizada há menos de `max_age_seconds`, não vai à rede.
+        Devolve False quando a réplica não pode ser usada para responder à leitura.
+        """
+        return self._sync_sheets([sheet_name], max_age_seconds).get(sheet_name, False)
+
+    def _sync_sheets(self, sheet_names: List[str], max_age_seconds: float = 0) -> Dict[str, bool]:
+        """
+        Sincroniza várias abas de uma só vez: os intervalos de todas as abas que
+        precisam de ser atualizadas seguem num único `values_batch_get`, pelo que
+        o custo é de uma ida à rede, independentemente do número de abas.
+        Devolve, por aba, se a réplica pode ser usada para responder à leitura.
+        """
+        if not self._replica:
+            return {name: False for name in sheet_names}
+
+        results: Dict[str, bool] = {}
+        states: Dict[str, Optional[Dict[str, Any]]] = {}
+        full_sync: Dict[str, bool] = {}
+        now = datetime.now()
+        for sheet_name in sheet_names:
+            state = self._replica.get_state(sheet_name)
+            if (state is not None and sheet_name not in self._stale_sheets and
+                    state['synced_at'] is not None and
+                    (now - state['synced_at']).total_seconds() < max_age_seconds):
+                results[sheet_name] = True
+                continue
+            states[sheet_name] = state
+            full_sync[sheet_name] = (
+                state is None or
+                state['row_count'] < 1 or
+                state['full_synced_at'] is None or
+                (now - state['full_synced_at']) > timedelta(minutes=self.FULL_RESYNC_MINUTES)
+            )
+
+        # Duas voltas no máximo: as abas cuja sincronização incremental falhar
+        # (linhas apagadas ou editadas) são pedidas por inteiro na segunda.
+        while full_sync:
+            plan = {name: self._sync_ranges(name, states[name], full) for name, full in full_sync.items()}
+            value_ranges = self._values_batch_get(list(plan), [r for ranges in plan.values() for r in ranges])
+            if value_ranges is None:
+                # Sem ligação: serve o que já estiver replicado.
+                for sheet_name in plan:
+                    results[sheet_name] = states[sheet_name] is not None
+                break
+
+            retry_full: Dict[str, bool] = {}
+            position = 0
+            for sheet_name, ranges in plan.items():
+                chunk = value_ranges[position:position + len(ranges)]
+                position += len(ranges)
+                try:
+                    if full_sync[sheet_name]:
+                        values = chunk[0] if chunk else []
+                        self._replica.replace_sheet(sheet_name, gspread.utils.fill_gaps(values) if values else [])
+                    elif not self._apply_sheet_tail(sheet_name, states[sheet_name]['row_count'], chunk):
+                        retry_full[sheet_name] = True
+                        continue
+                    self._stale_sheets.discard(sheet_name)
+                    results[sheet_name] = True
+                except Exception as e:
+                    print(f"ERRO ao sincronizar a aba '{sheet_name}' com a réplica local: {e}")
+                    results[sheet_name] = states[sheet_name] is not None
+            full_sync = retry_full
+        return results
+
+    def _sync_ranges(self, sheet_name: str, state: Optional[Dict[str, Any]], full: bool) -> List[str]:
+        """
+        Intervalos (notação A1 com o nome da aba) a pedir para sincronizar uma aba:
+        a aba inteira, ou as linhas a partir da última conhecida mais a coluna de status.
+        """
+        if full or not self._replica or state is None:
+            return [gspread.utils.absolute_range_name(sheet_name)]
+
+        row_count = state['row_count']
+        header = self._replica.get_row(sheet_name, 1) or []
+        last_col = gspread.utils.rowcol_to_a1(1, max(len(header), 1)).rstrip('0123456789')
+        ranges = [gspread.utils.absolute_range_name(sheet_name, f"A{row_count}:{last_col}")]
+        status_col = self._replicated_status_column(sheet_name, header)
+        if status_col and row_count > 1:
+            status_letter = self._column_letter(status_col)
+            ranges.append(gspread.utils.absolute_range_name(sheet_name, f"{status_letter}2:{status_letter}{row_count}"))
+        return ranges
+
+    def _replicated_status_column(self, sheet_name: str, header: List[str]) -> Optional[int]:
+        """Coluna de status (começando em 1) de uma aba de ocorrências replicada, a partir do seu cabeçalho."""
+        if sheet_name not in (self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET) or not header:
+            return None
+        col = self._schema_from_header(sheet_name, header).column_of(self.STATUS_FIELD)
+        return col + 1 if col is not None else None
+
+    def _values_batch_get(self, sheet_names: List[str], ranges: List[str]) -> Optional[List[List[List[str]]]]:
+        """Lê vários intervalos (das abas `sheet_names`) num só pedido. Devolve None se falhar."""
+        self._connect()
+        spreadsheet = self._connection.spreadsheet
+        if not spreadsheet:
+            return None
+
+        def _read():
+            try:
+                with self._connection.read_locks(sheet_names):
+                    response = spreadsheet.values_batch_get(ranges)
+            except Exception as e:
+                print(f"ERRO ao ler os intervalos {ranges}: {e}")
+                return None
+            return [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
+        return self._shared_read('values_batch_get', sheet_names, tuple(ranges), _read)
+
+    def _apply_sheet_tail(self, sheet_name: str, row_count: int, results: List[List[List[str]]]) -> bool:
+        """
+        Aplica à réplica o resultado de uma sincronização incremental (ver _sync_ranges).
+        Devolve False se a última linha conhecida mudou de lugar (linhas apagadas
+        ou editadas), caso em que é preciso uma sincronização completa.
+        """
+        if not self._replica or not results:
+            return False
+        last_known_row = self._replica.get_row(sheet_name, row_count) or []
+
+        tail = [list(row) for row in results[0]]
+        if not tail or self._trim_row(tail[0]) != self._trim_row(last_known_row):
+            return False
+
+        self._replica.append_rows(sheet_name, row_count + 1, tail[1:])
+        status_col = self._replicated_status_column(sheet_name, self._replica.get_row(sheet_name, 1) or [])
+        if len(results) > 1 and status_col:
+            statuses = [row[0] if row else '' for row in results[1]]
+            statuses.extend([''] * (row_count - 1 - len(statuses)))
+            self._replica.update_column(sheet_name, status_col, 2, statuses)
+        return True
+
+    @staticmethod
+    def _trim_row(row: List[str]) -> List[str]:
+        """Remove as células vazias no fim de uma linha (o get() da API não as devolve)."""
+        trimmed = list(row)
+        while trimmed and trimmed[-1] == '':
+            trimmed.pop()
+        return trimmed
+
+    def _get_replicated_records(self, sheet_name: str, max_age_seconds: float = 0) -> List[Dict[str, str]]:
+        """Lê os registos de uma aba a partir da réplica local, ou da planilha se a réplica não estiver disponível."""
+        if self._replica and self._sync_sheet(sheet_name, max_age_seconds):
+            return self._load_replicated_records(sheet_name)
+
+        ws = self._get_worksheet(sheet_name)
+        if not ws:
+            return []
+        return self._get_all_records_safe(ws)
+
+    def _load_replicated_records(self, sheet_name: str) -> List[Dict[str, str]]:
+        """Constrói os registos de uma aba a partir da réplica local (sem ir à rede)."""
+        all_values = self._replica.load_values(sheet_name) if self._replica else []
+        self._index_rows(sheet_name, all_values)
+        return self._records_from_values(all_values, sheet_name)
 
     def _share_file_with_users(self, drive_service: Any, file_id: str, uploader_email: str):
         """Compartilha o arquivo com o uploader e administradores."""
@@ -238,8 +815,10 @@ class SheetsService:
                 user_profile.get("main_group", ""), user_profile.get("company", "")
             ]
             
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            self._cache.pop("all_occurrences_cache", None)
+            with self._write_lock(ws.title):
+                ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
+            self._invalidate_sheet(self.CALLS_SHEET)
+            self._mark_replica_stale(self.CALLS_SHEET)
             return True, f"Ocorrência {occurrence_id} registada com sucesso."
         except Exception as e:
             return False, f"Erro ao registar ocorrência: {e}"
@@ -266,8 +845,10 @@ class SheetsService:
                 data.get("status_chamada", ""), data.get("observacoes", ""),
                 user_profile.get("main_group", ""), user_profile.get("company", "")
             ]
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            self._cache.pop("all_occurrences_cache", None)
+            with self._write_lock(ws.title):
+                ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
+            self._invalidate_sheet(self.SIMPLE_CALLS_SHEET)
+            self._mark_replica_stale(self.SIMPLE_CALLS_SHEET)
             return True, f"Ocorrência {occurrence_id} registada com sucesso."
         except Exception as e:
             return False, f"Erro ao registar ocorrência de chamada simples: {e}"
@@ -300,49 +881,86 @@ class SheetsService:
                 data.get("localizacao", ""), data.get("descricao_problema", ""), anexos_json,
                 user_profile.get("main_group", ""), user_profile.get("company", "")
             ]
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            self._cache.pop("all_occurrences_cache", None)
+            with self._write_lock(ws.title):
+                ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
+            self._invalidate_sheet(self.EQUIPMENT_SHEET)
+            self._mark_replica_stale(self.EQUIPMENT_SHEET)
             return True, f"Ocorrência {occurrence_id} registada com sucesso."
         except Exception as e:
             return False, f"Erro ao registar ocorrência de equipamento: {e}"
 
-    def batch_update_occurrence_statuses(self, changes: Dict[str, str]) -> Tuple[bool, str]:
-        """Atualiza múltiplos status de ocorrências de uma só vez."""
-        self._connect()
-        if not self._SPREADSHEET: return False, "Falha na conexão."
-
-        updates_by_sheet: Dict[str, List[gspread.Cell]] = {
+    def _group_status_cells(self, changes: Dict[str, str]) -> Tuple[Dict[str, List[Tuple[str, gspread.Cell]]], List[str]]:
+        """
+        Agrupa as alterações de status {ID: novo status} por aba, como células
+        prontas a escrever. Devolve também os IDs que não foram encontrados.
+        """
+        updates_by_sheet: Dict[str, List[Tuple[str, gspread.Cell]]] = {
             self.CALLS_SHEET: [],
             self.SIMPLE_CALLS_SHEET: [],
             self.EQUIPMENT_SHEET: []
         }
-
-        all_ids_map: Dict[str, Dict[str, Any]] = {}
-        for sheet_name in updates_by_sheet.keys():
-            ws = self._get_worksheet(sheet_name)
-            if ws:
-                ids_in_sheet = ws.col_values(1)
-                for i, occ_id in enumerate(ids_in_sheet):
-                    if i == 0: continue  # Pula o cabeçalho
-                    if occ_id:  # Verificar se occ_id não é None ou vazio
-                        all_ids_map[str(occ_id)] = {'sheet': sheet_name, 'row': i + 1}
+        missing_ids: List[str] = []
 
         for occ_id, new_status in changes.items():
-            if occ_id in all_ids_map:
-                info = all_ids_map[occ_id]
-                sheet_name = info['sheet']
-                status_col = 6 if sheet_name == self.EQUIPMENT_SHEET else 7
-                updates_by_sheet[sheet_name].append(gspread.Cell(info['row'], status_col, value=new_status))
-
-        try:
-            with self.gspread_lock:
-                for sheet_name, cells_to_update in updates_by_sheet.items():
-                    if cells_to_update:
-                        ws = self._get_worksheet(sheet_name)
-                        if ws: ws.update_cells(cells_to_update)
-            return True, "Alterações salvas com sucesso."
-        except Exception as e:
-            return False, f"Erro na atualização em lote: {e}"
+            sheet_name = self._sheet_for_occurrence_id(occ_id)
+            if not sheet_name:
+                missing_ids.append(occ_id)
+                continue
+            # Usa o índice de localização; só descarrega a coluna de IDs das
+            # abas que ainda não foram lidas nesta sessão.
+            key_col = self._column_number(sheet_name, self.KEY_FIELDS[sheet_name])
+            status_col = self._column_number(sheet_name, self.STATUS_FIELD)
+            if key_col is None or status_col is None:
+                missing_ids.append(occ_id)
+                continue
+            sheet_index = self._row_index.get(sheet_name)
+            if sheet_index is None:
+                ws = self._get_worksheet(sheet_name)
+                if not ws:
+                    missing_ids.append(occ_id)
+                    continue
+                with self._read_lock(sheet_name):
+                    ids_in_sheet = ws.col_values(key_col)
+                self._index_rows(sheet_name, [[value] for value in ids_in_sheet], key_col=1)
+                sheet_index = self._row_index.get(sheet_name, {})
+
+            row = sheet_index.get(str(occ_id).strip().lower())
+            if row is None:
+                missing_ids.append(occ_id)
+                continue
+            updates_by_sheet[sheet_name].append((occ_id, gspread.Cell(row, status_col, value=new_status)))
+        return updates_by_sheet, missing_ids
+
+    def _write_cells(self, ws: gspread.Worksheet, cells: List[gspread.Cell]):
+        """Escreve várias células de uma aba num único pedido (values.batchUpdate)."""
+        data = [{'range': gspread.utils.rowcol_to_a1(cell.row, cell.col), 'values': [[cell.value]]} for cell in cells]
+        with self._write_lock(ws.title):
+            ws.batch_update(data, value_input_option=ValueInputOption.user_entered)
+
+    def _apply_status_locally(self, sheet_name: str, row: Optional[int], occurrence_id: str, new_status: str):
+        """Aplica uma alteração de status à réplica e ao registo em cache, sem ir à rede."""
+        if self._replica and row:
+            status_col = self._replicated_status_column(sheet_name, self._replica.get_row(sheet_name, 1) or [])
+            if status_col:
+                self._replica.update_cell(sheet_name, row, status_col, new_status)
+        occurrence = self._occurrence_index.get(occurrence_id.strip().lower())
+        if occurrence is not None:
+            occurrence['Status'] = new_status # 'Status' e 'status' são a mesma coluna
+            self._search_index.update(occurrence)
+            for store in list(self._occurrence_stores.values()):
+                store.update_record(occurrence)
+        full = self._full_occurrences.peek(occurrence_id.strip().lower())
+        if full is not None and full is not occurrence:
+            full['Status'] = new_status
+
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        """Indica se um erro de escrita vale uma nova tentativa (quota, falha do servidor ou de rede)."""
+        if isinstance(error, gspread.exceptions.APIError):
+            status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+            return status_code in (429, 500, 502, 503, 504)
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                  ConnectionError, TimeoutError))
 
     def batch_update_user_profiles(self, changes: Dict[str, Dict[str, str]]) -> Tuple[bool, str]:
         """Atualiza múltiplos perfis de utilizador de uma só vez."""
@@ -350,23 +968,30 @@ class SheetsService:
         ws = self._get_worksheet(self.USERS_SHEET)
         if not ws: return False, "Falha na conexão com a aba de utilizadores."
 
-        emails_in_sheet = ws.col_values(1)
-        all_users_map = {str(email).strip().lower(): {'row': i + 1}
-                         for i, email in enumerate(emails_in_sheet) if i > 0 and str(email).strip()}
+        columns = {field: self._column_number(self.USERS_SHEET, field)
+                   for field in (self.KEY_FIELDS[self.USERS_SHEET], 'main_group', 'sub_group', 'company')}
+        if None in columns.values():
+            return False, "Colunas do perfil não encontradas na aba de utilizadores."
+
+        if self.USERS_SHEET not in self._row_index:
+            with self._read_lock(self.USERS_SHEET):
+                user_emails = ws.col_values(columns[self.KEY_FIELDS[self.USERS_SHEET]])
+            self._index_rows(self.USERS_SHEET, [[email] for email in user_emails], key_col=1)
+        all_users_map = {email: {'row': row} for email, row in self._row_index[self.USERS_SHEET].items()}
 
         cells_to_update = []
         for email, profile_changes in changes.items():
             normalized_email = email.strip().lower()
             if normalized_email in all_users_map:
                 row = all_users_map[normalized_email]['row']
-                cells_to_update.append(gspread.Cell(row, 4, value=profile_changes['main_group']))
-                cells_to_update.append(gspread.Cell(row, 5, value=profile_changes['sub_group']))
-                cells_to_update.append(gspread.Cell(row, 7, value=profile_changes['company']))
+                for field in ('main_group', 'sub_group', 'company'):
+                    cells_to_update.append(gspread.Cell(row, columns[field], value=profile_changes[field]))
 
         try:
-            with self.gspread_lock:
-                if cells_to_update:
+            if cells_to_update:
+                with self._write_lock(self.USERS_SHEET):
                     ws.update_cells(cells_to_update)
+                self._invalidate_sheet(self.USERS_SHEET)
             return True, "Perfis atualizados com sucesso."
         except Exception as e:
             return False, f"Erro na atualização de perfis em lote: {e}"
@@ -374,65 +999,34 @@ class SheetsService:
     def check_user_status(self, email: str) -> Dict[str, str]:
         """Verifica o status e o perfil de um utilizador."""
         print(f"DEBUG: Verificando status do usuário: {email}")
-        self._connect()
-        print(f"DEBUG: Conectado ao Sheets: {self.is_connected}")
-        ws = self._get_worksheet(self.USERS_SHEET)
-        if not ws:
-            print("DEBUG: Erro ao acessar planilha de usuários")
+        try:
+            users = self._fetch_cached(self.USERS_SHEET, self._load_users)
+        except Exception as e:
+            print(f"Erro ao ler a planilha de usuários: {e}")
             return {"status": "error"}
-        
-        cache_key = self.USERS_SHEET
-        cache_data = self._cache[cache_key]['data']
-        cache_timestamp = self._cache[cache_key]['timestamp']
-        
-        is_cache_valid = (
-            cache_data is not None and
-            cache_timestamp is not None and
-            (datetime.now() - cache_timestamp).total_seconds() < (self.CACHE_DURATION_MINUTES * 60)
-        )
-        if is_cache_valid:
-            records = cache_data
-        else:
-            try:
-                records = self._get_all_records_safe(ws)
-                self._cache[cache_key]['data'] = records
-                self._cache[cache_key]['timestamp'] = datetime.now()
-            except Exception as e:
-                print(f"Erro ao ler a planilha de usuários: {e}")
-                return {"status": "error"}
-        
-        if records is None:
+        if users is None:
+            print("DEBUG: Erro ao acessar planilha de usuários")
             return {"status": "error"}
-            
-        print(f"DEBUG: Buscando usuário em {len(records) if records else 0} registros")
-        for user_rec in records:
-            if user_rec.get("email") and str(user_rec["email"]).strip().lower() == email.strip().lower():
-                print(f"DEBUG: Usuário encontrado: {user_rec}")
-                return user_rec
+
+        user_rec = self._user_index.get(email.strip().lower())
+        if user_rec is not None:
+            print(f"DEBUG: Usuário encontrado: {user_rec}")
+            return user_rec
         print(f"DEBUG: Usuário não encontrado, retornando unregistered")
         return {"status": "unregistered"}
 
     def get_all_users(self, force_refresh: bool = False) -> List[Dict[str, str]]:
         """Obtém todos os utilizadores registados, utilizando cache."""
-        cache_key = self.USERS_SHEET
-        cache_data = self._cache[cache_key]['data']
-        cache_timestamp = self._cache[cache_key]['timestamp']
-        
-        is_cache_valid = (
-            cache_data is not None and
-            cache_timestamp is not None and
-            (datetime.now() - cache_timestamp).total_seconds() < (self.CACHE_DURATION_MINUTES * 60)
-        )
-        if not force_refresh and is_cache_valid:
-            return cache_data or []
-            
+        return self._fetch_cached(self.USERS_SHEET, self._load_users, force_refresh) or []
+
+    def _load_users(self) -> Optional[List[Dict[str, str]]]:
+        """Lê a aba de utilizadores para o cache (None se a aba não estiver acessível)."""
         self._connect()
         ws = self._get_worksheet(self.USERS_SHEET)
-        if not ws: return []
-        
+        if not ws:
+            return None
         records = [rec for rec in (self._get_all_records_safe(ws) or []) if rec.get("email")]
-        self._cache[cache_key]['data'] = records
-        self._cache[cache_key]['timestamp'] = datetime.now()
+        self._set_users_cache(records)
         return records
 
     def request_access(self, email: str, full_name: str, username: str, main_group: str, sub_group: str, company_name: Optional[str] = None) -> Tuple[bool, str]:
@@ -446,16 +1040,17 @@ class SheetsService:
             if all_users_records is None:
                 return False, "Erro ao verificar e-mail existente: dados da planilha ausentes."
             
-            normalized_emails_in_sheet = [str(rec.get('email', '')).strip().lower() for rec in all_users_records]
-            if email.strip().lower() in normalized_emails_in_sheet:
+            self._set_users_cache(all_users_records)
+            if email.strip().lower() in self._user_index:
                 return False, "Solicitação já existe para este e-mail."
         except Exception as e:
             return False, f"Erro ao verificar e-mail existente: {e}"
 
         new_row = [email, full_name, username, main_group, sub_group, "pending", company_name or ""]
         try:
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            self._cache[self.USERS_SHEET]['data'] = None
+            with self._write_lock(ws.title):
+                ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
+            self._invalidate_sheet(self.USERS_SHEET)
             return True, "Solicitação de acesso enviada com sucesso."
         except Exception as e:
             return False, f"Ocorreu um erro ao enviar a solicitação: {e}"
@@ -475,10 +1070,12 @@ class SheetsService:
         ws = self._get_worksheet(self.USERS_SHEET)
         if not ws: return False, "Falha ao aceder à planilha de usuários."
         try:
-            cell = ws.find(email, in_column=1)
-            if cell: 
-                ws.update_cell(cell.row, 6, new_status)
-                self._cache[self.USERS_SHEET]['data'] = None
+            row = self._find_row(ws, self.USERS_SHEET, email)
+            status_col = self._column_number(self.USERS_SHEET, self.STATUS_FIELD)
+            if row and status_col:
+                with self._write_lock(self.USERS_SHEET):
+                    ws.update_cell(row, status_col, new_status)
+                self._invalidate_sheet(self.USERS_SHEET)
             return True, "Status do usuário atualizado com sucesso."
         except Exception as e:
             if "not found" in str(e).lower():
@@ -488,161 +1085,581 @@ class SheetsService:
                 print(f"Erro ao atualizar status do usuário {email}: {e}")
                 return False, f"Erro ao atualizar status do usuário {email}: {e}"
 
-    def update_occurrence_status(self, occurrence_id: str, new_status: str) -> Tuple[bool, str]:
-        """Atualiza o status de uma ocorrência específica."""
-        self._connect()
-        sheet_name, status_col = "", 7
-        occ_id_lower = occurrence_id.strip().lower()
-        if 'scall' in occ_id_lower: sheet_name = self.SIMPLE_CALLS_SHEET
-        elif 'call' in occ_id_lower: sheet_name = self.CALLS_SHEET
-        elif 'equip' in occ_id_lower:
-            sheet_name = self.EQUIPMENT_SHEET
-            status_col = 6
-        if not sheet_name: return False, "Tipo de ocorrência desconhecido."
-
-        ws = self._get_worksheet(sheet_name)
-        if not ws: return False, f"Falha ao aceder à planilha {sheet_name}."
-
-        try:
-            cell = ws.find(occurrence_id, in_column=1)
-            if cell:
-                ws.update_cell(cell.row, status_col, new_status)
-                self._cache.pop("all_occurrences_cache", None)
-                if self._cache.get(sheet_name):
-                    self._cache[sheet_name]['data'] = None
-                return True, "Status atualizado com sucesso."
-            else:
-                return False, f"Ocorrência {occurrence_id} não encontrada."
-        except Exception as e:
-            if "not found" in str(e).lower():
-                return False, f"Ocorrência com ID {occurrence_id} não encontrada."
-            else:
-                return False, f"Erro ao atualizar o status da ocorrência {occurrence_id}: {e}"
-
-    def update_occurrence_comment(self, comment_id: str, new_comment_text: str) -> Tuple[bool, str]:
-        """Atualiza o texto de um comentário existente."""
-        self._connect()
-        ws = self._get_worksheet(self.OCCURRENCE_COMMENTS_SHEET)
-        if not ws: return False, "Falha ao aceder à planilha de comentários."
-
-        try:
-            cell = ws.find(comment_id, in_column=2)
-            if cell:
-                ws.update_cell(cell.row, 6, new_comment_text)
-                return True, "Comentário atualizado com sucesso."
-            else:
-                return False, f"Comentário com ID {comment_id} não encontrado."
-        except Exception as e:
-            if "not found" in str(e).lower():
-                return False, f"Comentário com ID {comment_id} não encontrado."
-            else:
-                return False, f"Erro ao atualizar o comentário {comment_id}: {e}"
-
-    def delete_occurrence_comment(self, comment_id: str) -> Tuple[bool, str]:
-        """Elimina um comentário da planilha."""
-        self._connect()
-        ws = self._get_worksheet(self.OCCURRENCE_COMMENTS_SHEET)
-        if not ws: return False, "Falha ao aceder à planilha de comentários."
-
+    def get_occurrence_comments(self, occurrence_id: str, force_refresh: bool = False) -> List[Dict[str, str]]:
+        """
+        Obtém os comentários de uma ocorrência, do mais recente para o mais
+        antigo. Vêm do cache (ver _load_occurrence_comments), com as escritas
+        ainda pendentes na fila (write-behind) sobrepostas.
+        """
         try:
-            cell = ws.find(comment_id, in_column=2)
-            if cell:
-                ws.delete_rows(cell.row)
-                return True, "Comentário eliminado com sucesso."
-            else:
-                return False, f"Comentário com ID {comment_id} não encontrado."
+            comments = self._fetch_cached(self._comments_cache_key(occurrence_id),
+                                          lambda: self._load_occurrence_comments(occurrence_id),
+                                          force_refresh) or []
         except Exception as e:
-            if "not found" in str(e).lower():
-                return False, f"Comentário com ID {comment_id} não encontrado."
-            else:
-                return False, f"Erro ao eliminar o comentário {comment_id}: {e}"
-
-    def get_occurrence_comments(self, occurrence_id: str) -> List[Dict[str, str]]:
-        """Obtém todos os comentários associados a uma ocorrência."""
-        self._connect()
-        ws = self._get_worksheet(self.OCCURRENCE_COMMENTS_SHEET)
-        if not ws: return []
+            print(f"Erro ao obter comentários da ocorrência {occurrence_id}: {e}")
+            comments = []
+        return self._with_pending_comment_writes(occurrence_id, comments)
 
-        try:
-            all_comments = self._get_all_records_safe(ws)
-            if not all_comments:
-                return []
-            filtered_comments = [
-                comment for comment in all_comments
-                if comment.get('id_ocorrencia') and str(comment['id_ocorrencia']).strip().lower() == occurrence_id.strip().lower()
+    def get_cached_occurrence_comments(self, occurrence_id: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Como get_occurrence_comments, mas sem nunca ir à planilha: usa o que
+        estiver em cache, seja qual for a idade. None se a ocorrência ainda não
+        tiver sido lida. Pode ser chamado na thread da UI.
+        """
+        comments = self._cache.get(self._comments_cache_key(occurrence_id))
+        if comments is None:
+            return None
+        return self._with_pending_comment_writes(occurrence_id, comments)
+
+    def _with_pending_comment_writes(self, occurrence_id: str, comments: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Cópia ordenada dos comentários com as escritas da fila (novos, edições e exclusões) aplicadas."""
+        occ_key = occurrence_id.strip().lower()
+        comments = list(comments)
+        comment_ids = [self._comment_key(c) for c in comments]
+        deleted_ids = set()
+        for op in self._write_queue.pending():
+            if op['kind'] == 'comment_add' and str(op['row'][0]).strip().lower() == occ_key:
+                if op['row'][1].strip().lower() not in comment_ids:
+                    comments.append(self._comment_record(op['row']))
+            elif op['kind'] == 'comment_edit' and op['comment_id'].strip().lower() in comment_ids:
+                position = comment_ids.index(op['comment_id'].strip().lower())
+                comments[position] = self._with_comment_text(comments[position], op['value'])
+            elif op['kind'] == 'comment_delete':
+                deleted_ids.add(op['comment_id'].strip().lower())
+        if deleted_ids:
+            comments = [c for c in comments if self._comment_key(c) not in deleted_ids]
+        return self._sort_comments(comments)
+
+    def _comments_cache_key(self, occurrence_id: str) -> str:
+        return self.COMMENTS_CACHE_PREFIX + occurrence_id.strip().lower()
+
+    def _load_occurrence_comments(self, occurrence_id: str) -> List[SheetRecord]:
+        """
+        Lê para o cache os comentários de uma ocorrência: só as linhas dela
+        (consulta filtrada) ou, se a consulta falhar, da réplica local.
+        """
+        comments = self._query_occurrence_comments(occurrence_id)
+        if comments is None:
+            occ_key = occurrence_id.strip().lower()
+            comments = [
+                comment for comment in self._get_replicated_records(self.OCCURRENCE_COMMENTS_SHEET, self.COMMENTS_SYNC_SECONDS)
+                if str(comment.get('id_ocorrencia', '')).strip().lower() == occ_key
             ]
-            return sorted(filtered_comments, key=lambda x: x.get('Data_Comentario', ''), reverse=True)
-        except Exception as e:
-            print(f"Erro ao obter comentários da ocorrência {occurrence_id}: {e}")
-            return []
+        return self._set_comments_cache(occurrence_id, comments)
+
+    def prefetch_occurrence_comments(self, occurrence_ids: List[str]):
+        """
+        Lê para o cache, numa só consulta filtrada, os comentários das
+        ocorrências que ainda não os têm (ver get_occurrence_comments). Se a
+        consulta falhar, nada é guardado: serão lidos quando forem abertos.
+        """
+        occ_keys = [occurrence_id.strip().lower() for occurrence_id in occurrence_ids
+                    if not self._cache.is_usable(self._comments_cache_key(occurrence_id))]
+        if not occ_keys:
+            return
+        schemas = self._get_header_schemas([self.OCCURRENCE_COMMENTS_SHEET])
+        if schemas is None:
+            return
+        schema = schemas[self.OCCURRENCE_COMMENTS_SHEET]
+        where = self._gviz_where_any(schema, 'id_ocorrencia', occ_keys)
+        if not where or not schema.raw_headers:
+            return
+        rows = self._gviz_query(self.OCCURRENCE_COMMENTS_SHEET, self._gviz_select_all(schema) + where)
+        if rows is None:
+            return
+        by_occurrence: Dict[str, List[SheetRecord]] = {occ_key: [] for occ_key in occ_keys}
+        for comment in self._records_from_values([schema.raw_headers] + rows[1:], self.OCCURRENCE_COMMENTS_SHEET):
+            occ_key = str(comment.get('id_ocorrencia', '')).strip().lower()
+            if occ_key in by_occurrence:
+                by_occurrence[occ_key].append(comment)
+        for occ_key, comments in by_occurrence.items():
+            self._set_comments_cache(occ_key, comments)
+
+    def _set_comments_cache(self, occurrence_id: str, comments: List[SheetRecord]) -> List[SheetRecord]:
+        """Guarda no cache os comentários (ordenados) de uma ocorrência e devolve-os."""
+        comments = self._sort_comments(comments)
+        cache_key = self._comments_cache_key(occurrence_id)
+        for comment in comments:
+            self._comment_occurrences[self._comment_key(comment)] = cache_key
+        self._cache.set(cache_key, comments)
+        return comments
+
+    def _query_occurrence_comments(self, occurrence_id: str) -> Optional[List[SheetRecord]]:
+        """Descarrega só os comentários de uma ocorrência (Visualization API). None se não for possível."""
+        schemas = self._get_header_schemas([self.OCCURRENCE_COMMENTS_SHEET])
+        if schemas is None:
+            return None
+        schema = schemas[self.OCCURRENCE_COMMENTS_SHEET]
+        where = self._gviz_where(schema, (('id_ocorrencia', occurrence_id.strip().upper()),))
+        if not where or not schema.raw_headers:
+            return None
+        rows = self._gviz_query(self.OCCURRENCE_COMMENTS_SHEET, self._gviz_select_all(schema) + where)
+        if rows is None:
+            return None
+        # A primeira linha é sempre o cabeçalho (headers=1).
+        return self._records_from_values([schema.raw_headers] + rows[1:], self.OCCURRENCE_COMMENTS_SHEET)
+
+    @staticmethod
+    def _comment_key(comment: Dict[str, str]) -> str:
+        return str(comment.get('id_comentario', '')).strip().lower()
+
+    @staticmethod
+    def _sort_comments(comments: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        return sorted(comments, key=lambda x: x.get('Data_Comentario', ''), reverse=True)
+
+    def _comment_record(self, row: List[str]) -> SheetRecord:
+        """Registo de um comentário a partir da linha escrita (ver COMMENT_HEADERS)."""
+        return self._records_from_values([self.COMMENT_HEADERS, row])[0]
+
+    @staticmethod
+    def _with_comment_text(comment: SheetRecord, text: str) -> SheetRecord:
+        """Cópia do comentário com outro texto (os registos em cache não são alterados)."""
+        edited = SheetRecord(comment.schema, list(comment.values_list))
+        edited['Comentario'] = text
+        return edited
+
+    def _add_cached_comment(self, row: List[str]):
+        """Acrescenta um comentário já escrito à entrada da sua ocorrência (se estiver em cache)."""
+        record = self._comment_record(row)
+        cache_key = self._comments_cache_key(str(row[0]))
+        if self._cache.update(cache_key, lambda comments: self._sort_comments(
+                [c for c in comments if self._comment_key(c) != self._comment_key(record)] + [record])):
+            self._comment_occurrences[self._comment_key(record)] = cache_key
+
+    def _edit_cached_comment(self, comment_id: str, text: str):
+        comment_key = comment_id.strip().lower()
+        cache_key = self._comment_occurrences.get(comment_key)
+        if cache_key:
+            self._cache.update(cache_key, lambda comments: [
+                self._with_comment_text(c, text) if self._comment_key(c) == comment_key else c for c in comments])
+
+    def _remove_cached_comment(self, comment_id: str):
+        comment_key = comment_id.strip().lower()
+        cache_key = self._comment_occurrences.pop(comment_key, None)
+        if cache_key:
+            self._cache.update(cache_key, lambda comments: [c for c in comments if self._comment_key(c) != comment_key])
 
     def get_all_operators(self, force_refresh: bool = False) -> List[str]:
         """Obtém a lista de todas as operadoras da planilha de operadores."""
-        cache_key = self.OPERATORS_SHEET
-        cache_data = self._cache[cache_key]['data']
-        cache_timestamp = self._cache[cache_key]['timestamp']
-        
-        is_cache_valid = (
-            cache_data is not None and
-            cache_timestamp is not None and
-            (datetime.now() - cache_timestamp).total_seconds() < (self.CACHE_DURATION_MINUTES * 60)
-        )
-        if not force_refresh and is_cache_valid:
-            return cache_data or []
-            
+        return self._fetch_cached(self.OPERATORS_SHEET, self._load_operators, force_refresh) or []
+
+    def _load_operators(self) -> List[str]:
+        """
+        Lê as operadoras para o cache. Em caso de erro devolve [] sem o guardar;
+        os avisos só são mostrados se a leitura não for em segundo plano.
+        """
+        show_dialogs = threading.current_thread() is threading.main_thread()
         self._connect()
         ws = self._get_worksheet(self.OPERATORS_SHEET)
         if not ws:
             return []
         try:
-            all_records = self._get_all_records_safe(ws)
+            # Só a coluna das operadoras é descarregada.
+            all_records = self._get_columns(self.OPERATORS_SHEET, ['operadora'])
+            if all_records is None:
+                all_records = self._get_all_records_safe(ws)
             operators = [rec.get('operadora', '') for rec in (all_records or []) if rec.get('operadora')]
             if not operators:
                 print(f"AVISO: A planilha '{self.OPERATORS_SHEET}' está vazia ou não contém operadoras.")
-                messagebox.showwarning("Dados Incompletos", f"A planilha '{self.OPERATORS_SHEET}' está vazia ou não contém dados de operadoras. As sugestões não serão exibidas.")
+                if show_dialogs: messagebox.showwarning("Dados Incompletos", f"A planilha '{self.OPERATORS_SHEET}' está vazia ou não contém dados de operadoras. As sugestões não serão exibidas.")
                 return []
             
             unique_operators = sorted(list(set(operators)))
-            self._cache[cache_key]['data'] = unique_operators
-            self._cache[cache_key]['timestamp'] = datetime.now()
+            self._cache.set(self.OPERATORS_SHEET, unique_operators)
             return unique_operators
         except Exception as e:
             print(f"Erro ao obter lista de operadoras da planilha '{self.OPERATORS_SHEET}': {e}")
-            messagebox.showerror("Erro de Leitura", f"Ocorreu um erro ao ler a lista de operadoras da planilha '{self.OPERATORS_SHEET}': {e}")
+            if show_dialogs: messagebox.showerror("Erro de Leitura", f"Ocorreu um erro ao ler a lista de operadoras da planilha '{self.OPERATORS_SHEET}': {e}")
             return []
 
-    def get_occurrence_by_id(self, occurrence_id: str) -> Optional[Dict[str, str]]:
-        """Obtém os detalhes de uma ocorrência específica pelo seu ID."""
-        all_occurrences = self.get_all_occurrences()
-        
-        for occ in all_occurrences:
-            if occ.get('ID') and str(occ['ID']).strip().lower() == occurrence_id.strip().lower():
-                return occ
-        
-        all_occurrences_fresh = self.get_all_occurrences(force_refresh=True)
-        for occ in all_occurrences_fresh:
-            if occ.get('ID') and str(occ['ID']).strip().lower() == occurrence_id.strip().lower():
-                return occ
-        
-        return None
+    def get_occurrence_by_id(self, occurrence_id: str, user_email: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Obtém os detalhes de uma ocorrência específica pelo seu ID, com todas as
+        colunas (se a lista tiver só as colunas do histórico, a linha completa é
+        lida agora; ver _get_full_occurrence). Com `user_email`, devolve None se
+        a ocorrência não for visível a esse utilizador; para os perfis restritos,
+        uma ocorrência que não está em memória é lida sozinha (só a sua linha),
+        nunca com as ocorrências de todos os grupos.
+        """
+        scope = self._user_scope(user_email) if user_email else ()
+        if scope is None:
+            return None
+
+        occ_key = occurrence_id.strip().lower()
+        # As ocorrências obtidas pelas consultas filtradas também estão no índice.
+        occurrence = self._occurrence_index.get(occ_key)
+        if occurrence is None and not scope:
+            self.get_all_occurrences()
+            occurrence = self._occurrence_index.get(occ_key)
+
+        if occurrence is not None:
+            occurrence = self._get_full_occurrence(occurrence)
+        else:
+            occurrence = self._fetch_unknown_occurrence(occurrence_id, occ_key, bool(scope))
+
+        if occurrence is None or (scope and not self._matches_scope(occurrence, scope)):
+            return None
+        return occurrence
+
+    def get_occurrences_by_ids(self, occurrence_ids: List[str], user_email: str) -> Dict[str, OccurrenceRecord]:
+        """
+        Detalhes (todas as colunas) de várias ocorrências visíveis ao utilizador,
+        por ID em minúsculas (as não encontradas ou não visíveis ficam de fora).
+        As que já estão completas em memória não custam pedidos; as restantes
+        são lidas com uma consulta filtrada por aba, em vez de uma por ocorrência.
+        """
+        scope = self._user_scope(user_email)
+        if scope is None:
+            return {}
+
+        found: Dict[str, OccurrenceRecord] = {}
+        missing: Dict[str, List[str]] = {}
+        for occurrence_id in occurrence_ids:
+            occ_key = occurrence_id.strip().lower()
+            occurrence = self._occurrence_index.get(occ_key)
+            if occurrence is not None and occurrence.schema.projected:
+                occurrence = self._full_occurrences.get(occ_key)
+            if occurrence is not None:
+                found[occ_key] = occurrence
+                continue
+            sheet_name = self._sheet_for_occurrence_id(occ_key)
+            if sheet_name:
+                missing.setdefault(sheet_name, []).append(occ_key)
+
+        for sheet_name, occ_keys in missing.items():
+            for full in self._query_occurrences_by_id(sheet_name, occ_keys) or []:
+                occ_key = full.occurrence_id.lower()
+                listed = self._occurrence_index.get(occ_key)
+                if listed is not None and listed.status != full.status:
+                    # O registo da lista reflete alterações de status ainda por enviar.
+                    full['Status'] = listed.get('Status', full.get('Status'))
+                self._full_occurrences.put(occ_key, full)
+                found[occ_key] = full
+
+        return {occ_key: occ for occ_key, occ in found.items() if not scope or self._matches_scope(occ, scope)}
+
+    def _query_occurrences_by_id(self, sheet_name: str, occ_keys: List[str]) -> Optional[List[OccurrenceRecord]]:
+        """Linhas completas das ocorrências `occ_keys` de uma aba, num único pedido (Visualization API)."""
+        schemas = self._get_header_schemas([sheet_name])
+        if schemas is None:
+            return None
+        schema = schemas[sheet_name]
+        where = self._gviz_where_any(schema, self.KEY_FIELDS[sheet_name], occ_keys)
+        if not where or not schema.raw_headers:
+            return None
+        rows = self._gviz_query(sheet_name, self._gviz_select_all(schema) + where)
+        if rows is None:
+            return None
+        return self._records_from_values([schema.raw_headers] + rows[1:], sheet_name)
+
+    def _user_scope(self, user_email: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+        """Condições de visibilidade do utilizador: () se vê tudo, None se não vê nenhuma (ver _occurrence_scope)."""
+        user_profile = self.check_user_status(user_email)
+        main_group = user_profile.get("main_group")
+        if not main_group:
+            return None
+        if main_group == "67_TELECOM":
+            return ()
+        return self._occurrence_scope(user_email, user_profile)
+
+    def _fetch_unknown_occurrence(self, occurrence_id: str, occ_key: str, single_row: bool) -> Optional[OccurrenceRecord]:
+        """
+        Lê uma ocorrência que não está no índice (ex.: registada por outro
+        utilizador). A lista da aba fica desatualizada e é descartada do cache.
+        Com a réplica local, sincroniza só a aba indicada pelo prefixo do ID e
+        reconstrói o cache consolidado a partir dela; sem réplica ou com
+        `single_row`, lê apenas a linha da ocorrência.
+        """
+        sheet_name = self._sheet_for_occurrence_id(occurrence_id)
+        if not sheet_name:
+            return None
+        if single_row or not (self._replica and self._replica.get_state(sheet_name)):
+            self._invalidate_sheet(sheet_name)
+            return self._fetch_full_occurrence(sheet_name, occurrence_id)
+        self._mark_replica_stale(sheet_name)
+        if self._sync_sheet(sheet_name):
+            self._invalidate_sheet(sheet_name)
+            self.get_all_occurrences()
+        else:
+            self.get_all_occurrences(force_refresh=True)
+        occurrence = self._occurrence_index.get(occ_key)
+        return self._get_full_occurrence(occurrence) if occurrence is not None else None
+
+    def _get_full_occurrence(self, occurrence: OccurrenceRecord) -> OccurrenceRecord:
+        """
+        Devolve a ocorrência com todas as colunas. Os registos da leitura projetada
+        são completados com a linha da planilha, guardada em _full_occurrences
+        (LRU) para as próximas aberturas. Se a leitura falhar, devolve o registo
+        da lista.
+        """
+        if not occurrence.schema.projected:
+            return occurrence
+        occ_key = occurrence.occurrence_id.lower()
+        full = self._full_occurrences.get(occ_key)
+        if full is not None:
+            return full
+
+        full = self._fetch_full_occurrence(self._sheet_for_occurrence_id(occurrence.occurrence_id), occurrence.occurrence_id)
+        if full is None:
+            return occurrence
+        if full.status != occurrence.status:
+            # O registo da lista reflete alterações de status ainda por enviar.
+            full['Status'] = occurrence.get('Status', full.get('Status'))
+        self._full_occurrences.put(occ_key, full)
+        return full
+
+    def _fetch_full_occurrence(self, sheet_name: str, occurrence_id: str) -> Optional[OccurrenceRecord]:
+        """
+        Lê a linha completa de uma ocorrência: da réplica local, se a tiver, ou
+        da planilha (só essa linha), localizada pelo índice de localização.
+        A chave é confirmada antes de usar a linha. None se não for encontrada.
+        """
+        if not sheet_name:
+            return None
+        schemas = self._get_header_schemas([sheet_name])
+        if schemas is None:
+            return None
+        schema = schemas[sheet_name]
+        key_col = schema.column_of(self.KEY_FIELDS[sheet_name])
+        if key_col is None:
+            return None
+        occ_key = occurrence_id.strip().lower()
+
+        def _is_row_of_occurrence(values: Optional[List[str]]) -> bool:
+            return bool(values) and len(values) > key_col and str(values[key_col]).strip().lower() == occ_key
+
+        row = self._row_index.get(sheet_name, {}).get(occ_key)
+        if row and self._replica and self._replica.get_state(sheet_name):
+            values = self._replica.get_row(sheet_name, row)
+            if _is_row_of_occurrence(values):
+                return OccurrenceRecord(schema, list(values))
+
+        try:
+            if row:
+                values = self._read_row(sheet_name, row)
+                if _is_row_of_occurrence(values):
+                    return OccurrenceRecord(schema, values)
+                self._row_index.get(sheet_name, {}).pop(occ_key, None)
+            ws = self._get_worksheet(sheet_name)
+            if not ws:
+                return None
+            row = self._find_row(ws, sheet_name, occurrence_id)
+            if not row:
+                return None
+            values = self._read_row(sheet_name, row)
+        except Exception as e:
+            print(f"ERRO ao ler a linha da ocorrência '{occurrence_id}' na aba '{sheet_name}': {e}")
+            return None
+        return OccurrenceRecord(schema, values) if _is_row_of_occurrence(values) else None
+
+    def _read_row(self, sheet_name: str, row: int) -> Optional[List[str]]:
+        """Lê uma única linha de uma aba. None se o pedido falhar."""
+        value_ranges = self._values_batch_get([sheet_name], [gspread.utils.absolute_range_name(sheet_name, f"{row}:{row}")])
+        if value_ranges is None:
+            return None
+        return list(value_ranges[0][0]) if value_ranges and value_ranges[0] else []
+
+    # --- ESCRITA DIFERIDA (write-behind) ---
+
+    def queue_occurrence_status(self, occurrence_id: str, new_status: str, on_error=None) -> Tuple[bool, str]:
+        """
+        Agenda a alteração de status de uma ocorrência e aplica-a de imediato ao
+        cache local. `on_error(mensagem)` é chamado (numa thread secundária) se a
+        escrita falhar definitivamente, depois de a alteração local ser desfeita.
+        """
+        sheet_name = self._sheet_for_occurrence_id(occurrence_id)
+        if not sheet_name: return False, "Tipo de ocorrência desconhecido."
+
+        occ_key = occurrence_id.strip().lower()
+        occurrence = self._occurrence_index.get(occ_key)
+        previous_status = occurrence.get('Status') if occurrence else None
+        row = self._row_index.get(sheet_name, {}).get(occ_key)
+
+        def _rollback():
+            if previous_status is not None:
+                self._apply_status_locally(sheet_name, self._row_index.get(sheet_name, {}).get(occ_key),
+                                           occurrence_id, previous_status)
+
+        # Se já havia uma alteração pendente, o estado a repor é o anterior a ela.
+        pending_op = self._write_queue.get(('status', occ_key))
+        if pending_op and pending_op.get('rollback'):
+            _rollback = pending_op['rollback']
+
+        self._apply_status_locally(sheet_name, row, occurrence_id, new_status)
+        self._write_queue.put({'key': ('status', occ_key), 'kind': 'status',
+                               'occurrence_id': occurrence_id, 'value': new_status,
+                               'on_error': on_error, 'rollback': _rollback})
+        return True, f"Status de {occurrence_id} alterado para {new_status}."
+
+    def queue_occurrence_comment(self, occurrence_id: str, user_email: str, user_name: str, comment_text: str, on_error=None) -> Tuple[bool, str]:
+        """Agenda um novo comentário. Até ser enviado, já aparece em get_occurrence_comments()."""
+        comment_id = f"CMT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:4].upper()}"
+        comment_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_row = [occurrence_id, comment_id, user_email, user_name, comment_date, comment_text]
+        self._write_queue.put({'key': ('comment_add', comment_id), 'kind': 'comment_add',
+                               'row': new_row, 'on_error': on_error})
+        return True, "Comentário adicionado com sucesso."
+
+    def queue_comment_update(self, comment_id: str, new_comment_text: str, on_error=None) -> Tuple[bool, str]:
+        """Agenda a edição de um comentário. Se o comentário ainda não foi enviado, edita-o na fila."""
+        pending_add = self._write_queue.get(('comment_add', comment_id))
+        if pending_add:
+            new_row = list(pending_add['row'])
+            new_row[5] = new_comment_text
+            self._write_queue.put({**pending_add, 'row': new_row})
+        else:
+            self._write_queue.put({'key': ('comment_edit', comment_id), 'kind': 'comment_edit',
+                                   'comment_id': comment_id, 'value': new_comment_text, 'on_error': on_error})
+        return True, "Comentário atualizado com sucesso."
+
+    def queue_comment_delete(self, comment_id: str, on_error=None) -> Tuple[bool, str]:
+        """
+        Agenda a exclusão de um comentário. Deixa logo de aparecer em
+        get_occurrence_comments(); se a escrita falhar, volta a aparecer.
+        """
+        # Um comentário que ainda está na fila de escrita é apenas retirado dela.
+        self._write_queue.discard(('comment_edit', comment_id))
+        if self._write_queue.discard(('comment_add', comment_id)):
+            return True, "Comentário eliminado com sucesso."
+        self._write_queue.put({'key': ('comment_delete', comment_id), 'kind': 'comment_delete',
+                               'comment_id': comment_id, 'on_error': on_error})
+        return True, "Comentário eliminado com sucesso."
+
+    # Versões síncronas (a API anterior à fila): a escrita passa pela fila e o
+    # lote é enviado logo. Só devolvem erro se a escrita falhar definitivamente;
+    # uma falha transitória fica na fila, para nova tentativa.
+
+    def update_occurrence_status(self, occurrence_id: str, new_status: str) -> Tuple[bool, str]:
+        """Atualiza o status de uma ocorrência específica."""
+        return self._write_now(self.queue_occurrence_status, occurrence_id, new_status)
+
+    def batch_update_occurrence_statuses(self, changes: Dict[str, str]) -> Tuple[bool, str]:
+        """Atualiza múltiplos status de ocorrências de uma só vez."""
+        errors: List[str] = []
+        for occurrence_id, new_status in changes.items():
+            success, message = self.queue_occurrence_status(occurrence_id, new_status, on_error=errors.append)
+            if not success:
+                errors.append(message)
+        self.flush_pending_writes()
+        if errors:
+            return False, f"Erro na atualização em lote: {'; '.join(errors)}"
+        return True, "Alterações salvas com sucesso."
 
     def add_occurrence_comment(self, occurrence_id: str, user_email: str, user_name: str, comment_text: str) -> Tuple[bool, str]:
         """Adiciona um novo comentário a uma ocorrência."""
-        self._connect()
-        ws = self._get_worksheet(self.OCCURRENCE_COMMENTS_SHEET)
-        if not ws: return False, "Falha ao aceder à planilha de comentários."
+        return self._write_now(self.queue_occurrence_comment, occurrence_id, user_email, user_name, comment_text)
 
-        try:
-            comment_id = f"CMT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:4].upper()}"
-            comment_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def update_occurrence_comment(self, comment_id: str, new_comment_text: str) -> Tuple[bool, str]:
+        """Atualiza o texto de um comentário existente."""
+        return self._write_now(self.queue_comment_update, comment_id, new_comment_text)
 
-            new_row = [occurrence_id, comment_id, user_email, user_name, comment_date, comment_text]
+    def delete_occurrence_comment(self, comment_id: str) -> Tuple[bool, str]:
+        """Elimina um comentário da planilha."""
+        return self._write_now(self.queue_comment_delete, comment_id)
+
+    def _write_now(self, queue_write: Callable[..., Tuple[bool, str]], *args: Any) -> Tuple[bool, str]:
+        """Agenda uma escrita com `queue_write` e envia de imediato a fila."""
+        errors: List[str] = []
+        success, message = queue_write(*args, on_error=errors.append)
+        if not success:
+            return success, message
+        self.flush_pending_writes()
+        return (False, errors[0]) if errors else (True, message)
+
+    def flush_pending_writes(self):
+        """Envia de imediato todas as escritas pendentes (por exemplo, ao fechar a aplicação)."""
+        self._write_queue.flush()
+
+    def _flush_pending_writes(self, ops: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str, bool]]:
+        """
+        Envia um lote da fila de escrita: um pedido por aba para os status, um
+        append_rows para os comentários novos, um pedido para as edições e um
+        por comentário excluído.
+        Devolve (operação, erro, erro_transitório) das operações que falharam.
+        """
+        failures: List[Tuple[Dict[str, Any], str, bool]] = []
+        self._connect()
 
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            return True, "Comentário adicionado com sucesso."
-        except Exception as e:
-            return False, f"Erro ao adicionar comentário: {e}"
+        status_ops = {op['occurrence_id'].strip().lower(): op for op in ops if op['kind'] == 'status'}
+        if status_ops:
+            try:
+                changes = {op['occurrence_id']: op['value'] for op in status_ops.values()}
+                updates_by_sheet, missing_ids = self._group_status_cells(changes)
+            except Exception as e:
+                failures.extend((op, str(e), self._is_transient_error(e)) for op in status_ops.values())
+                updates_by_sheet, missing_ids = {}, []
+            for occ_id in missing_ids:
+                failures.append((status_ops[occ_id.strip().lower()], f"Ocorrência {occ_id} não encontrada.", False))
+            for sheet_name, entries in updates_by_sheet.items():
+                if not entries: continue
+                try:
+                    ws = self._get_worksheet(sheet_name)
+                    if not ws: raise ConnectionError(f"Falha ao aceder à planilha {sheet_name}.")
+                    self._write_cells(ws, [cell for _, cell in entries])
+                    for occ_id, cell in entries:
+                        self._apply_status_locally(sheet_name, cell.row, occ_id, str(cell.value))
+                except Exception as e:
+                    failures.extend((status_ops[occ_id.strip().lower()], str(e), self._is_transient_error(e))
+                                    for occ_id, _ in entries)
+
+        add_ops = [op for op in ops if op['kind'] == 'comment_add']
+        edit_ops = [op for op in ops if op['kind'] == 'comment_edit']
+        delete_ops = [op for op in ops if op['kind'] == 'comment_delete']
+        if add_ops or edit_ops or delete_ops:
+            ws = self._get_worksheet(self.OCCURRENCE_COMMENTS_SHEET)
+            if not ws:
+                return failures + [(op, "Falha ao aceder à planilha de comentários.", True)
+                                   for op in add_ops + edit_ops + delete_ops]
+
+            if add_ops:
+                try:
+                    with self._write_lock(self.OCCURRENCE_COMMENTS_SHEET):
+                        ws.append_rows([op['row'] for op in add_ops], value_input_option=ValueInputOption.user_entered)
+                    self._mark_replica_stale(self.OCCURRENCE_COMMENTS_SHEET)
+                    for op in add_ops:
+                        self._add_cached_comment(op['row'])
+                except Exception as e:
+                    failures.extend((op, str(e), self._is_transient_error(e)) for op in add_ops)
 
+            located = []
+            for op in edit_ops:
+                try:
+                    row = self._find_row(ws, self.OCCURRENCE_COMMENTS_SHEET, op['comment_id'])
+                except Exception as e:
+                    failures.append((op, str(e), self._is_transient_error(e)))
+                    continue
+                if not row:
+                    failures.append((op, f"Comentário com ID {op['comment_id']} não encontrado.", False))
+                    continue
+                located.append((op, row))
+            text_col = self._column_number(self.OCCURRENCE_COMMENTS_SHEET, self.COMMENT_TEXT_FIELD) if located else None
+            if located and text_col is None:
+                failures.extend((op, "Coluna do comentário não encontrada.", True) for op, _ in located)
+            elif located:
+                try:
+                    self._write_cells(ws, [gspread.Cell(row, text_col, value=op['value']) for op, row in located])
+                    for op, row in located:
+                        if self._replica:
+                            self._replica.update_cell(self.OCCURRENCE_COMMENTS_SHEET, row, text_col, op['value'])
+                        self._edit_cached_comment(op['comment_id'], op['value'])
+                except Exception as e:
+                    failures.extend((op, str(e), self._is_transient_error(e)) for op, _ in located)
+
+            # Cada linha é procurada só depois de apagada a anterior, porque as
+            # seguintes sobem uma posição. Um comentário que já não existe conta como eliminado.
+            for op in delete_ops:
+                try:
+                    row = self._find_row(ws, self.OCCURRENCE_COMMENTS_SHEET, op['comment_id'])
+                    if row:
+                        with self._write_lock(self.OCCURRENCE_COMMENTS_SHEET):
+                            ws.delete_rows(row)
+                        self._shift_row_index(self.OCCURRENCE_COMMENTS_SHEET, row)
+                        if self._replica:
+                            self._replica.delete_row(self.OCCURRENCE_COMMENTS_SHEET, row)
+                    self._remove_cached_comment(op['comment_id'])
+                except Exception as e:
+                    failures.append((op, str(e), self._is_transient_error(e)))
+        return failures
 
     # --- MÉTODOS DE OCORRÊNCIAS (Combinados) ---
 
@@ -650,48 +1667,97 @@ class SheetsService:
         """
         Obtém TODAS as ocorrências de todas as abas (chamada, equipamento, etc.),
         utilizando um cache consolidado.
+        Com a réplica local preenchida, as linhas completas vêm dela; sem ela, a
+        primeira leitura traz só as colunas de LIST_FIELDS e as linhas completas
+        são lidas a seguir em segundo plano (quem se registou com
+        add_cache_listener é avisado quando chegam).
+        """
+        occurrences = self._fetch_cached(self.ALL_OCCURRENCES_CACHE_KEY,
+                                         lambda: self._load_all_occurrences(force_refresh), force_refresh) or []
+        if occurrences and occurrences[0].schema.projected:
+            # Pesquisa e filtros só ficam completos com todas as colunas. Sem efeito
+            # se a leitura completa já estiver em curso.
+            self._cache.refresh_in_background(self.ALL_OCCURRENCES_CACHE_KEY, self._load_complete_occurrences)
+        return occurrences
+
+    def _load_complete_occurrences(self) -> List[OccurrenceRecord]:
+        """
+        Substitui a lista projetada pelas linhas completas (ver get_all_occurrences),
+        guardando a versão da planilha como faz o _conditional_loader; aqui a
+        versão não evita a leitura, porque faltam colunas aos dados em cache.
+        """
+        generation = self._cache.generation(self.ALL_OCCURRENCES_CACHE_KEY)
+        read_since = datetime.now()
+        version = self._spreadsheet_version(self.VERSION_CHECK_SECONDS)
+        occurrences = self._load_all_occurrences(projection=False, generation=generation)
+        if version is not None:
+            self._cache.set_validator(self.ALL_OCCURRENCES_CACHE_KEY, version, read_since)
+        return occurrences
+
+    def _load_all_occurrences(self, force_refresh: bool = False, projection: bool = True,
+                              generation: Optional[Tuple[int, int, int]] = None) -> List[OccurrenceRecord]:
+        """
+        Lê as ocorrências das três abas para o cache consolidado (ver
+        get_all_occurrences). Sem `projection`, a réplica é preenchida (ou as abas
+        lidas por inteiro) mesmo que ainda esteja vazia. `generation` é passada
+        a _set_occurrences_cache.
         """
-        cache_key = "all_occurrences_cache"
-        cache_entry = self._cache.get(cache_key)
-
-        if cache_entry:
-            is_cache_valid = (
-                cache_entry.get('data') is not None and
-                cache_entry.get('timestamp') is not None and
-                (datetime.now() - cache_entry['timestamp']).total_seconds() < (self.CACHE_DURATION_MINUTES * 60)
-            )
-            if not force_refresh and is_cache_valid:
-                return cache_entry['data'] or []
-
         all_occurrences = []
         sheet_names = [self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET]
+        if projection and not (self._replica and all(self._replica.get_state(name) for name in sheet_names)):
+            projected = self._get_list_columns(sheet_names)
+            if projected is not None:
+                sorted_occurrences = self._sort_by_registration_date(projected)
+                self._set_occurrences_cache(sorted_occurrences)
+                return sorted_occurrences
+
+        # Com force_refresh a réplica é sempre sincronizada (só as linhas novas e
+        # a coluna de status são descarregadas); sem ele, aceita-se a réplica
+        # enquanto tiver menos de CACHE_DURATION_MINUTES.
+        max_age_seconds = 0 if force_refresh else self.CACHE_DURATION_MINUTES * 60
+        # As três abas são sincronizadas num único values_batch_get.
+        synced = self._sync_sheets(sheet_names, max_age_seconds)
 
         for sheet_name in sheet_names:
-            ws = self._get_worksheet(sheet_name)
-            if ws:
-                try:
-                    records = self._get_all_records_safe(ws)
-                    if records:
-                        all_occurrences.extend(records)
-                except Exception as e:
-                    print(f"Erro ao ler a aba '{sheet_name}': {e}")
-
-        # Ordena por data de registro, do mais novo para o mais antigo
-        # Adicionado tratamento para casos onde a data pode estar ausente ou mal formatada
-        def sort_key(occ):
-            date_str = occ.get('Data de Registro')
-            if not date_str:
-                return datetime.min
             try:
-                return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            except (ValueError, TypeError):
-                return datetime.min
+                if synced.get(sheet_name):
+                    records = self._load_replicated_records(sheet_name)
+                else:
+                    records = self._get_replicated_records(sheet_name, max_age_seconds)
+                if records:
+                    all_occurrences.extend(records)
+            except Exception as e:
+                print(f"Erro ao ler a aba '{sheet_name}': {e}")
 
-        sorted_occurrences = sorted(all_occurrences, key=sort_key, reverse=True)
+        sorted_occurrences = self._sort_by_registration_date(all_occurrences)
 
-        self._cache[cache_key] = {'data': sorted_occurrences, 'timestamp': datetime.now()}
+        self._set_occurrences_cache(sorted_occurrences, generation=generation)
         return sorted_occurrences
 
+    def _get_list_columns(self, sheet_names: List[str]) -> Optional[List[OccurrenceRecord]]:
+        """
+        Lê das abas de ocorrências apenas as colunas de LIST_FIELDS (as três abas
+        num único pedido). Devolve None se o pedido falhar.
+        """
+        schemas = self._get_header_schemas(sheet_names)
+        if schemas is None:
+            return None
+        fields_by_sheet = {
+            name: [field for field in self.LIST_FIELDS if schemas[name].column_of(field) is not None]
+            for name in sheet_names
+        }
+        if not all(fields_by_sheet.values()):
+            return None
+        columns = self._get_columns_batch(fields_by_sheet)
+        if columns is None:
+            return None
+        return [occ for name in sheet_names for occ in columns[name]]
+
+    @staticmethod
+    def _sort_by_registration_date(occurrences: List[OccurrenceRecord]) -> List[OccurrenceRecord]:
+        """Ordena por data de registro, do mais novo para o mais antigo (datas inválidas no fim)."""
+        return sorted(occurrences, key=SheetsService._registration_date, reverse=True)
+
 
     def get_all_occurrences_for_admin(self, force_refresh: bool = False) -> List[Dict[str, str]]:
         """Obtém todas as ocorrências para o dashboard de admin, utilizando cache."""
@@ -705,8 +1771,8 @@ class SheetsService:
         - PREFEITURA: Acesso apenas a ocorrências do grupo 'PREFEITURA'.
         - PARTNER: Acesso apenas a ocorrências da sua própria empresa dentro do grupo 'PARTNER'.
         - Outros: Acesso apenas às ocorrências que registou.
+        Os perfis restritos só descarregam as linhas a que têm acesso (ver _query_scoped_occurrences).
         """
-        all_occurrences = self.get_all_occurrences(force_refresh=force_refresh)
         user_profile = self.check_user_status(user_email)
 
         main_group = user_profile.get("main_group")
@@ -715,36 +1781,494 @@ class SheetsService:
 
         # Super Admins e Admins (67_TELECOM) veem tudo
         if main_group == "67_TELECOM":
-            return all_occurrences
+            return self.get_all_occurrences(force_refresh=force_refresh)
 
-        # Prefeitura vê APENAS as suas próprias ocorrências
-        if main_group == "PREFEITURA":
-            return [
-                occ for occ in all_occurrences
-                if str(occ.get('registradormaingroup', '')).upper() == "PREFEITURA"
-            ]
+        scope = self._occurrence_scope(user_email, user_profile)
+        if scope is None:
+            # Se um parceiro não tem empresa definida, não deve ver nenhuma ocorrência de parceiro.
+            return []
+
+        cache_key = self._scoped_cache_key(scope)
+        return self._fetch_cached(cache_key, lambda: self._load_scoped_occurrences(cache_key, scope, force_refresh),
+                                  force_refresh) or []
+
+    def _scoped_cache_key(self, scope: Tuple[Tuple[str, str], ...]) -> str:
+        return self.SCOPED_OCCURRENCES_CACHE_PREFIX + "|".join(f"{h}={v}" for h, v in scope)
+
+    def _load_scoped_occurrences(self, cache_key: str, scope: Tuple[Tuple[str, str], ...],
+                                 force_refresh: bool = False) -> List[OccurrenceRecord]:
+        """Lê as ocorrências de um perfil restrito para o cache (ver get_occurrences_by_user)."""
+        max_age_seconds = 0 if force_refresh else self.CACHE_DURATION_MINUTES * 60
+        occurrences = self._query_scoped_occurrences(scope, max_age_seconds)
+        if occurrences is None:
+            # Alternativa: descarrega tudo e filtra localmente.
+            occurrences = [occ for occ in self.get_all_occurrences(force_refresh=force_refresh)
+                           if self._matches_scope(occ, scope)]
+        else:
+            occurrences = self._sort_by_registration_date(occurrences)
+            self._index_occurrences(occurrences)
+
+        self._set_scoped_occurrences_cache(cache_key, occurrences)
+        return occurrences
+
+    def _index_occurrences(self, occurrences: List[OccurrenceRecord]):
+        """Acrescenta ao índice por ID e ao de pesquisa ocorrências lidas fora do cache consolidado."""
+        for occ in occurrences:
+            if occ.get('ID'):
+                self._occurrence_index[str(occ['ID']).strip().lower()] = occ
+        self._search_index.add(occurrences)
+
+    def get_occurrence_store(self, user_email: str, force_refresh: bool = False) -> OccurrenceColumnStore:
+        """Ocorrências visíveis ao utilizador (ver get_occurrences_by_user) em colunas, para filtrar e contar."""
+        return self._store_for(self.get_occurrences_by_user(user_email, force_refresh=force_refresh))
+
+    def get_occurrence_store_for_admin(self, force_refresh: bool = False) -> OccurrenceColumnStore:
+        """Todas as ocorrências em colunas (dashboard de admin)."""
+        return self._store_for(self.get_all_occurrences(force_refresh=force_refresh))
+
+    def _store_for(self, occurrences: List[OccurrenceRecord]) -> OccurrenceColumnStore:
+        """Devolve o armazenamento em colunas já construído para esta lista (ou constrói-o)."""
+        for store in list(self._occurrence_stores.values()):
+            if store.records is occurrences:
+                return store
+        return OccurrenceColumnStore(occurrences)
+
+    def iter_occurrences(self, user_email: str, page_size: int = 50, cursor: Optional[Dict[str, Any]] = None,
+                         force_refresh: bool = False) -> Iterator[Tuple[List[Dict[str, str]], Optional[Dict[str, Any]]]]:
+        """
+        Gera páginas de ocorrências visíveis ao utilizador, da mais nova para a mais
+        antiga, como tuplos (ocorrências, cursor). O cursor devolvido permite
+        retomar a leitura mais tarde e é None na última página.
+
+        Se as ocorrências já estiverem em cache ou na réplica local, as páginas são
+        recortadas da lista completa; caso contrário, cada página é pedida à
+        planilha (Visualization API, "order by ... limit ... offset"), pelo que a
+        primeira página não depende do tamanho total do histórico.
+        """
+        cursor = dict(cursor or {})
+        user_profile = self.check_user_status(user_email)
+        main_group = user_profile.get("main_group")
+        if not main_group:
+            yield [], None
+            return
 
-        # Parceiros veem APENAS as da sua própria empresa
+        if main_group == "67_TELECOM":
+            scope: Optional[Tuple[Tuple[str, str], ...]] = ()
+        else:
+            scope = self._occurrence_scope(user_email, user_profile)
+            if scope is None:
+                yield [], None
+                return
+
+        if 'sheets' in cursor or not self._has_local_occurrences(scope):
+            remote_pages = self._iter_occurrences_remote(scope, page_size, cursor.get('sheets', {}))
+            delivered = sum(cursor.get('sheets', {}).values())
+            for page, sheet_offsets in remote_pages:
+                if page is None:
+                    # A consulta falhou: continua a partir da lista completa.
+                    cursor = {'offset': delivered}
+                    break
+                delivered += len(page)
+                yield page, ({'sheets': sheet_offsets} if sheet_offsets else None)
+            else:
+                return
+
+        occurrences = self.get_occurrences_by_user(user_email, force_refresh=force_refresh)
+        offset = cursor.get('offset', 0)
+        if offset >= len(occurrences):
+            yield [], None
+            return
+        while offset < len(occurrences):
+            page = occurrences[offset:offset + page_size]
+            offset += len(page)
+            yield page, ({'offset': offset} if offset < len(occurrences) else None)
+
+    def _has_local_occurrences(self, scope: Tuple[Tuple[str, str], ...]) -> bool:
+        """Indica se as ocorrências podem ser servidas sem descarregar as abas (cache ou réplica preenchida)."""
+        if self._cache.is_usable(self.ALL_OCCURRENCES_CACHE_KEY):
+            return True
+        if scope and self._cache.is_usable(self._scoped_cache_key(scope)):
+            return True
+        sheet_names = [self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET]
+        return bool(self._replica) and all(self._replica.get_state(name) for name in sheet_names)
+
+    def _iter_occurrences_remote(self, scope: Tuple[Tuple[str, str], ...], page_size: int,
+                                 sheet_offsets: Dict[str, int]) -> Iterator[Tuple[Optional[List[Dict[str, str]]], Dict[str, int]]]:
+        """
+        Junta, da mais nova para a mais antiga, as páginas pedidas a cada aba de
+        ocorrências. `sheet_offsets` indica quantas linhas de cada aba já foram
+        entregues; gera (página, offsets) e, se uma consulta falhar, (None, offsets).
+        """
+        sheet_names = [self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET]
+        schemas = self._get_header_schemas(sheet_names)
+        if schemas is None:
+            yield None, dict(sheet_offsets)
+            return
+
+        consumed = {name: sheet_offsets.get(name, 0) for name in sheet_names}
+        buffers: Dict[str, List[Dict[str, str]]] = {name: [] for name in sheet_names}
+        exhausted = set()
+        page: List[Dict[str, str]] = []
+
+        while True:
+            # Só se compara a cabeça das abas que ainda têm linhas por ler.
+            for sheet_name in sheet_names:
+                if sheet_name in exhausted or buffers[sheet_name]:
+                    continue
+                records = self._gviz_page(sheet_name, schemas[sheet_name], scope, page_size, consumed[sheet_name])
+                if records is None:
+                    yield None, consumed
+                    return
+                buffers[sheet_name] = records
+                if len(records) < page_size:
+                    exhausted.add(sheet_name)
+
+            candidates = [name for name in sheet_names if buffers[name]]
+            if not candidates:
+                yield page, None
+                return
+
+            newest = max(candidates, key=lambda name: self._registration_date(buffers[name][0]))
+            page.append(buffers[newest].pop(0))
+            consumed[newest] += 1
+            if len(page) == page_size:
+                yield page, dict(consumed)
+                page = []
+
+    def _gviz_page(self, sheet_name: str, schema: HeaderSchema, scope: Tuple[Tuple[str, str], ...],
+                   limit: int, offset: int) -> Optional[List[Dict[str, str]]]:
+        """Pede a uma aba `limit` ocorrências visíveis, das mais novas para as mais antigas, a partir de `offset`."""
+        where = self._gviz_where(schema, scope)
+        date_col = schema.column_of('dataderegistro')
+        if where is None or date_col is None:
+            return None
+        order_by = self._column_letter(date_col + 1)
+        select, headers = self._gviz_list_select(schema)
+        rows = self._gviz_query(sheet_name, f"{select}{where} order by {order_by} desc limit {limit} offset {offset}")
+        if rows is None:
+            return None
+        records = self._records_from_values([headers] + rows[1:], sheet_name, projection=True)
+        for occ in records:
+            if occ.get('ID'):
+                occ_key = str(occ['ID']).strip().lower()
+                if occ_key not in self._occurrence_index:
+                    self._occurrence_index[occ_key] = occ
+                    self._search_index.update(occ)
+        return records
+
+    @staticmethod
+    def _registration_date(occurrence: OccurrenceRecord) -> datetime:
+        """Data de registro de uma ocorrência (datetime.min se ausente ou mal formatada)."""
+        return occurrence.sort_date
+
+    # --- CONSULTAS FILTRADAS POR PERFIL ---
+
+    @staticmethod
+    def _occurrence_scope(user_email: str, user_profile: Dict[str, str]) -> Optional[Tuple[Tuple[str, str], ...]]:
+        """
+        Condições (cabeçalho normalizado, valor em maiúsculas) que uma ocorrência
+        tem de cumprir para ser visível a um utilizador que não é 67_TELECOM.
+        Devolve None se o utilizador não puder ver nenhuma ocorrência.
+        """
+        main_group = str(user_profile.get("main_group", "")).upper()
+        if main_group == "PREFEITURA":
+            return (('registradormaingroup', 'PREFEITURA'),)
         if main_group == "PARTNER":
             user_company = user_profile.get("company")
             if not user_company:
-                # Se um parceiro não tem empresa definida, não deve ver nenhuma ocorrência de parceiro.
-                return []
-            
-            return [
-                occ for occ in all_occurrences
-                if str(occ.get('registradormaingroup', '')).upper() == "PARTNER" and \
-                   str(occ.get('registradorcompany', '')).upper() == str(user_company).upper()
-            ]
+                return None
+            return (('registradormaingroup', 'PARTNER'), ('registradorcompany', str(user_company).strip().upper()))
+        return (('registrador(e-mail)', user_email.strip().upper()),)
+
+    @staticmethod
+    def _matches_scope(occurrence: Dict[str, str], scope: Tuple[Tuple[str, str], ...]) -> bool:
+        """Filtro em Python equivalente a _occurrence_scope (usado como alternativa)."""
+        return all(str(occurrence.get(header, '')).strip().upper() == value for header, value in scope)
 
-        # Caso padrão (se houver outros grupos no futuro), mostra apenas as próprias
-        return [occ for occ in all_occurrences if occ.get('Registrador (e-mail)') == user_email]
+    def _query_scoped_occurrences(self, scope: Tuple[Tuple[str, str], ...],
+                                  max_age_seconds: float) -> Optional[List[Dict[str, str]]]:
+        """
+        Obtém só as ocorrências que cumprem `scope`, sem descarregar as abas inteiras:
+        - com a réplica local já preenchida, sincroniza-a (só linhas novas e status)
+          e filtra-a no SQLite;
+        - caso contrário, pede à planilha apenas as linhas filtradas (gviz/tq),
+          só com as colunas de LIST_FIELDS.
+        Devolve None se nenhuma das opções estiver disponível.
+        """
+        sheet_names = [self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET]
+
+        if self._replica and all(self._replica.get_state(name) for name in sheet_names):
+            synced = self._sync_sheets(sheet_names, max_age_seconds)
+            if all(synced.get(name) for name in sheet_names):
+                occurrences = []
+                for sheet_name in sheet_names:
+                    header = self._replica.get_row(sheet_name, 1) or []
+                    schema = self._schema_from_header(sheet_name, header)
+                    conditions = self._scope_columns(schema, scope)
+                    if conditions is None:
+                        return None
+                    rows = self._replica.query_rows(sheet_name, conditions)
+                    sheet_index = self._row_index.setdefault(sheet_name, {})
+                    key_col = schema.column_of(self.KEY_FIELDS[sheet_name])
+                    for row_num, values in rows:
+                        if key_col is not None and len(values) > key_col and str(values[key_col]).strip():
+                            sheet_index[str(values[key_col]).strip().lower()] = row_num
+                    occurrences.extend(self._records_from_values([header] + [values for _, values in rows], sheet_name))
+                return occurrences
+
+        return self._query_scoped_occurrences_remote(sheet_names, scope)
+
+    def _query_scoped_occurrences_remote(self, sheet_names: List[str],
+                                         scope: Tuple[Tuple[str, str], ...]) -> Optional[List[Dict[str, str]]]:
+        """Pede à planilha, aba a aba, apenas as linhas que cumprem `scope` (Visualization API)."""
+        schemas = self._get_header_schemas(sheet_names)
+        if schemas is None:
+            return None
+
+        occurrences = []
+        for sheet_name in sheet_names:
+            where = self._gviz_where(schemas[sheet_name], scope)
+            if where is None:
+                return None
+            select, headers = self._gviz_list_select(schemas[sheet_name])
+            rows = self._gviz_query(sheet_name, select + where)
+            if rows is None:
+                return None
+            # A primeira linha é sempre o cabeçalho (headers=1).
+            occurrences.extend(self._records_from_values([headers] + rows[1:], sheet_name, projection=True))
+        return occurrences
+
+    def _gviz_list_select(self, schema: HeaderSchema) -> Tuple[str, List[str]]:
+        """Cláusula 'select' da Visualization API com as colunas de LIST_FIELDS da aba, e o cabeçalho correspondente."""
+        columns = sorted({col for col in (schema.column_of(field) for field in self.LIST_FIELDS) if col is not None})
+        select = "select " + ", ".join(self._column_letter(col + 1) for col in columns)
+        return select, [schema.raw_headers[col] for col in columns]
+
+    @classmethod
+    def _gviz_where(cls, schema: HeaderSchema, scope: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+        """Cláusula ' where ...' da Visualization API equivalente a `scope` (vazia se não houver condições)."""
+        conditions = cls._scope_columns(schema, scope)
+        if conditions is None:
+            return None
+        clauses = []
+        for col, value in conditions.items():
+            if "'" in value and '"' in value:
+                return None
+            quote = '"' if "'" in value else "'"
+            clauses.append(f"upper({cls._column_letter(col)}) = {quote}{value}{quote}")
+        return " where " + " and ".join(clauses) if clauses else ""
+
+    @classmethod
+    def _gviz_where_any(cls, schema: HeaderSchema, field: str, values: List[str]) -> Optional[str]:
+        """Cláusula ' where ...' para as linhas em que a coluna `field` tem um dos `values` (sem distinguir maiúsculas)."""
+        col = schema.column_of(field)
+        if col is None or not values:
+            return None
+        clauses = []
+        for value in values:
+            value = str(value).strip().upper()
+            if "'" in value and '"' in value:
+                return None
+            quote = '"' if "'" in value else "'"
+            clauses.append(f"upper({cls._column_letter(col + 1)}) = {quote}{value}{quote}")
+        return " where " + " or ".join(clauses)
+
+    @classmethod
+    def _gviz_select_all(cls, schema: HeaderSchema) -> str:
+        """Cláusula 'select' com todas as colunas do cabeçalho, pela ordem da aba."""
+        return "select " + ", ".join(cls._column_letter(col + 1) for col in range(len(schema.raw_headers)))
+
+    @staticmethod
+    def _column_letter(col: int) -> str:
+        """Letra da coluna (começando em 1), como usada na notação A1."""
+        return gspread.utils.rowcol_to_a1(1, col).rstrip('0123456789')
+
+    @staticmethod
+    def _scope_columns(schema: HeaderSchema, scope: Tuple[Tuple[str, str], ...]) -> Optional[Dict[int, str]]:
+        """Converte as condições de `scope` em {coluna (começando em 1): valor}, a partir do cabeçalho da aba."""
+        conditions = {}
+        for header_name, value in scope:
+            col = schema.column_of(header_name)
+            if col is None:
+                return None
+            conditions[col + 1] = value
+        return conditions
+
+    def _gviz_query(self, sheet_name: str, query: str) -> Optional[List[List[str]]]:
+        """Executa uma consulta da Visualization API sobre uma aba e devolve as linhas (CSV) resultantes."""
+        self._connect()
+        client = self._connection.client
+        if client is None:
+            return None
+        url = self.GVIZ_QUERY_URL.format(spreadsheet_id=self.SPREADSHEET_ID)
+        params = {'sheet': sheet_name, 'tq': query, 'tqx': 'out:csv', 'headers': 1}
+
+        def _read():
+            try:
+                with self._read_lock(sheet_name):
+                    response = client.http_client.request('get', url, params=params)
+            except Exception as e:
+                print(f"ERRO na consulta filtrada à aba '{sheet_name}': {e}")
+                return None
+            response.encoding = 'utf-8'
+            return [row for row in csv.reader(io.StringIO(response.text))]
+        return self._shared_read('gviz', [sheet_name], (query,), _read)
+
+    def search_occurrences(self, query: str, occurrences: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Filtra `occurrences` pela pesquisa livre do histórico, usando o índice de
+        trigramas. Aceita também filtros por campo (`operadora:vivo`).
+        """
+        return self._search_index.search(query, occurrences)
+
+    # --- CACHE PERSISTENTE ---
+
+    def save_warm_cache(self, user_email: str) -> bool:
+        """Grava em disco as entradas do cache com dados, para o próximo arranque (ver restore_warm_cache)."""
+        sheet_by_schema: Dict[int, str] = {}
+
+        def _sheet_of(record: SheetRecord) -> str:
+            # Todos os registos com o mesmo HeaderSchema vêm da mesma aba.
+            if id(record.schema) not in sheet_by_schema:
+                sheet_by_schema[id(record.schema)] = self._sheet_of_record(record)
+            return sheet_by_schema[id(record.schema)]
+
+        entries = {}
+        for cache_key, data, timestamp, version in self._cache.items():
+            if data is None or cache_key.startswith(self.COMMENTS_CACHE_PREFIX):
+                continue
+            sheet_names = {_sheet_of(rec) for rec in data if isinstance(rec, SheetRecord)}
+            row_counts = {name: self._sheet_row_counts[name] for name in sheet_names if name in self._sheet_row_counts}
+            entry = WarmCache.encode_entry(data, timestamp, row_counts, _sheet_of, version)
+            if entry is not None:
+                entries[cache_key] = entry
+        if not entries:
+            return False
+        return self._warm_cache.save(user_email, entries)
+
+    def restore_warm_cache(self, user_email: str) -> bool:
+        """
+        Carrega para o cache as entradas gravadas na última execução deste
+        utilizador, exceto as que já estão válidas em memória e as que a réplica
+        local mostra estarem desatualizadas (mais recente e com outro número de
+        linhas). As entradas restauradas são mostradas logo e recarregadas em
+        segundo plano; quem se registou com add_cache_listener é avisado quando
+        cada uma chega. Devolve True se alguma foi restaurada.
+        Decifra e descodifica o ficheiro: chamar fora da thread da UI.
+        """
+        snapshot = self._warm_cache.load(user_email)
+        if not snapshot:
+            return False
+
+        restored = set()
+        for cache_key, entry in snapshot.get('entries', {}).items():
+            timestamp = WarmCache.entry_timestamp(entry)
+            generation = self._cache.generation(cache_key)
+            if timestamp is None or self._is_cache_valid(cache_key) or not self._warm_entry_is_current(entry, timestamp):
+                continue
+            try:
+                data = WarmCache.decode_entry(entry, self._record_for_sheet, self._snapshot_schema)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                print(f"AVISO: Entrada '{cache_key}' do cache local ignorada: {e}")
+                continue
+            # Entretanto, a entrada pode ter sido lida da planilha ou o cache limpo (logout).
+            if self._cache.generation(cache_key) != generation or self._is_cache_valid(cache_key):
+                continue
+            self._install_cache_entry(cache_key, data, timestamp)
+            if entry.get('version'):
+                self._cache.set_validator(cache_key, entry['version'], timestamp)
+            restored.add(cache_key)
+        print(f"DEBUG: Cache local restaurado: {sorted(restored)}")
+
+        # Se a planilha não mudou desde então, a revalidação custa um pedido ao
+        # Drive; senão, com a réplica local preenchida, só descarrega as linhas
+        # novas e a coluna de status.
+        for cache_key in sorted(restored):
+            loader = self._warm_entry_loader(cache_key, user_email)
+            if loader is None:
+                self._cache.invalidate(cache_key)
+            else:
+                self._cache.refresh_in_background(cache_key, self._conditional_loader(cache_key, loader))
+        return bool(restored)
+
+    def _warm_entry_loader(self, cache_key: str, user_email: str):
+        """Função que recarrega uma entrada restaurada, ou None se já não se aplica a este utilizador."""
+        if cache_key == self.USERS_SHEET:
+            return self._load_users
+        if cache_key == self.OPERATORS_SHEET:
+            return self._load_operators
+        if cache_key == self.ALL_OCCURRENCES_CACHE_KEY:
+            return self._load_all_occurrences
+        if cache_key.startswith(self.SCOPED_OCCURRENCES_CACHE_PREFIX):
+            user_profile = self.check_user_status(user_email)
+            scope = self._occurrence_scope(user_email, user_profile) if user_profile.get("main_group") else None
+            if scope is not None and self._scoped_cache_key(scope) == cache_key:
+                return lambda: self._load_scoped_occurrences(cache_key, scope)
+        return None
+
+    def clear_warm_cache(self):
+        """Apaga o cache gravado em disco (logout)."""
+        self._warm_cache.clear()
+
+    def _warm_entry_is_current(self, entry: Dict[str, Any], timestamp: datetime) -> bool:
+        """Falso se a réplica local foi sincronizada depois da entrada e tem outro número de linhas."""
+        if not self._replica:
+            return True
+        for sheet_name, row_count in entry.get('row_counts', {}).items():
+            state = self._replica.get_state(sheet_name)
+            if state and state['synced_at'] and state['synced_at'] > timestamp and state['row_count'] != row_count:
+                return False
+        return True
+
+    def _install_cache_entry(self, cache_key: str, data: List[Any], timestamp: datetime):
+        """
+        Coloca dados restaurados no cache (com a data original e sem expirar),
+        reconstruindo os índices que dependem dele.
+        """
+        if cache_key == self.USERS_SHEET:
+            self._set_users_cache(data, timestamp, pinned=True)
+        elif cache_key == self.ALL_OCCURRENCES_CACHE_KEY:
+            self._set_occurrences_cache(data, timestamp, pinned=True)
+        elif cache_key.startswith(self.SCOPED_OCCURRENCES_CACHE_PREFIX):
+            self._index_occurrences(data)
+            self._set_scoped_occurrences_cache(cache_key, data, timestamp, pinned=True)
+        else:
+            self._cache.set(cache_key, data, timestamp, pinned=True)
+
+    def _sheet_of_record(self, record: SheetRecord) -> str:
+        """Aba de onde veio um registo (pelo HeaderSchema ou, nas leituras projetadas, pelo ID)."""
+        for sheet_name, schema in list(self._header_schemas.items()):
+            if schema is record.schema:
+                return sheet_name
+        if isinstance(record, OccurrenceRecord):
+            return self._sheet_for_occurrence_id(record.occurrence_id)
+        return ''
+
+    def _snapshot_schema(self, sheet_name: str, raw_headers: List[str], projected: bool) -> HeaderSchema:
+        if projected or not sheet_name:
+            return HeaderSchema(raw_headers, projected=projected)
+        return self._schema_from_header(sheet_name, raw_headers)
+
+    def _record_for_sheet(self, sheet_name: str, schema: HeaderSchema, values: List[Any]) -> SheetRecord:
+        if sheet_name in (self.CALLS_SHEET, self.SIMPLE_CALLS_SHEET, self.EQUIPMENT_SHEET):
+            return OccurrenceRecord(schema, values)
+        return SheetRecord(schema, values)
 
     def clear_all_cache(self):
-        """Limpa todo o cache da planilha."""
-        for key in self._cache:
-            self._cache[key]['data'] = None
-            self._cache[key]['timestamp'] = None
+        """Limpa todo o cache da planilha, incluindo a réplica local (logout)."""
+        self._cache.clear()
+        if self._replica:
+            self._replica.clear()
+        self._stale_sheets = set()
+        self._occurrence_index = {}
+        self._search_index.clear()
+        self._occurrence_stores = {}
+        self._header_schemas = {}
+        self._full_occurrences.clear()
+        self._user_index = {}
+        self._row_index = {}
+        self._sheet_row_counts = {}
+        self._comment_occurrences = {}
 
     def register_occurrence(self, user_email: str, data: Dict[str, str], tests: List[Dict[str, str]], attachment_path: Optional[str] = None) -> Tuple[bool, str]:
         """Registra uma ocorrência de chamada detalhada com testes e anexos opcionais."""
@@ -771,8 +2295,10 @@ class SheetsService:
                 user_profile.get("main_group", ""), user_profile.get("company", "")
             ]
             
-            ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
-            self._cache.pop("all_occurrences_cache", None)
+            with self._write_lock(ws.title):
+                ws.append_row(new_row, value_input_option=ValueInputOption.user_entered)
+            self._invalidate_sheet(self.CALLS_SHEET)
+            self._mark_replica_stale(self.CALLS_SHEET)
             return True, f"Ocorrência {occurrence_id} registada com sucesso."
         except Exception as e:
-            return False, f"Erro ao registar ocorrência: {e}"
\ No newline at end of file
+            return False, f"Erro ao registar ocorrência: {e}"
@@ -1,14 +1,15 @@
 # ==============================================================================
 # ARQUIVO: src/services/user_service.py
 # DESCRIÇÃO: Encapsula a lógica de negócio para o gerenciamento de usuários.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Não guarda dados: o cache dos utilizadores é o do SheetsService,
+#        que o invalida a cada escrita na aba.
 # ==============================================================================
 
 class UserService:
     """ Encapsula a lógica de negócio para o gerenciamento de usuários. """
     def __init__(self, sheets_service):
         self.sheets_service = sheets_service
-        self.users_cache = None
 
     def get_user_status(self, email):
         """
@@ -20,9 +21,7 @@ class UserService:
         """
         Obtém todos os utilizadores registados, com a opção de forçar uma atualização do cache.
         """
-        if force_refresh or self.users_cache is None:
-            self.users_cache = self.sheets_service.get_all_users()
-        return self.users_cache
+        return self.sheets_service.get_all_users(force_refresh)
 
     def get_pending_requests(self):
         """
@@ -39,19 +38,11 @@ class UserService:
     def update_user_access(self, email, new_status):
         """
         Atualiza o status de acesso de um utilizador específico (aprovado/rejeitado).
-        Limpa o cache de usuários após a atualização.
         """
-        success, message = self.sheets_service.update_user_status(email, new_status)
-        if success:
-            self.users_cache = None # Invalida o cache para forçar a recarga
-        return success, message
+        return self.sheets_service.update_user_status(email, new_status)
 
     def update_user_profiles_batch(self, changes):
         """
         Atualiza múltiplos perfis de utilizador de uma só vez.
-        Limpa o cache de usuários após a atualização.
         """
-        success, message = self.sheets_service.batch_update_user_profiles(changes)
-        if success:
-            self.users_cache = None # Invalida o cache para forçar a recarga
-        return success, message
+        return self.sheets_service.batch_update_user_profiles(changes)
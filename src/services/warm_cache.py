@@ -0,0 +1,137 @@
+# ==============================================================================
+# FICHEIRO: src/services/warm_cache.py
+# DESCRIÇÃO: Cópia em disco (cifrada) do cache em memória do SheetsService,
+#            para que a aplicação mostre os dados logo ao arrancar.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: O ficheiro é cifrado com a chave Fernet do AuthManager (a mesma da
+#        sessão) e pertence a um único utilizador. Cada entrada guarda a data
+#        em que foi lida e o número de linhas de cada aba de onde veio, para o
+#        SheetsService decidir se ainda a pode usar, e a versão da planilha no
+#        Drive nessa altura (se conhecida). Os registos são guardados
+#        como listas de valores mais o cabeçalho (HeaderSchema) de cada aba.
+# ==============================================================================
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from services.header_schema import HeaderSchema, SheetRecord
+
+FORMAT_VERSION = 1
+
+
+class WarmCache:
+    """
+    Lê e grava o snapshot cifrado do cache. Nunca lança exceções: se o
+    ficheiro não existir, estiver corrompido ou for de outra versão, load()
+    devolve None e a aplicação carrega os dados da planilha, como antes.
+    """
+    def __init__(self, auth_manager: Any, file_path: str):
+        self.auth_manager = auth_manager
+        self.file_path = file_path
+
+    def load(self, user_email: str) -> Optional[Dict[str, Any]]:
+        """Snapshot gravado para este utilizador (ver save), ou None."""
+        if not os.path.exists(self.file_path):
+            return None
+        try:
+            with open(self.file_path, 'rb') as f:
+                snapshot = self.auth_manager.decrypt_data(f.read())
+        except Exception as e:
+            print(f"AVISO: Não foi possível ler o cache local '{self.file_path}': {e}")
+            return None
+        if (not isinstance(snapshot, dict) or snapshot.get('version') != FORMAT_VERSION or
+                snapshot.get('user') != user_email.strip().lower()):
+            return None
+        return snapshot
+
+    def save(self, user_email: str, entries: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Grava as entradas (ver encode_entry) cifradas. O ficheiro é escrito à
+        parte e só depois substitui o anterior, para nunca ficar a meio.
+        """
+        snapshot = {
+            'version': FORMAT_VERSION,
+            'user': user_email.strip().lower(),
+            'saved_at': datetime.now().isoformat(),
+            'entries': entries,
+        }
+        try:
+            encrypted_data = self.auth_manager.encrypt_data(snapshot)
+            if encrypted_data is None:
+                return False
+            os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+            temp_path = self.file_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(encrypted_data)
+            os.replace(temp_path, self.file_path)
+            return True
+        except Exception as e:
+            print(f"AVISO: Não foi possível gravar o cache local '{self.file_path}': {e}")
+            return False
+
+    def clear(self):
+        """Apaga o snapshot (logout)."""
+        for path in (self.file_path, self.file_path + '.tmp'):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception as e:
+                    print(f"ERRO ao apagar o cache local '{path}': {e}")
+
+    # --- ENTRADAS ---
+
+    @staticmethod
+    def encode_entry(data: Any, timestamp: datetime, row_counts: Dict[str, int],
+                     sheet_of: Callable[[SheetRecord], str], version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Converte os dados de uma entrada do cache para JSON. Aceita listas de
+        registos (SheetRecord) ou de valores simples; devolve None para o resto.
+        `sheet_of` indica a aba de cada registo (para recuperar o HeaderSchema).
+        """
+        entry: Dict[str, Any] = {'timestamp': timestamp.isoformat(), 'row_counts': row_counts, 'version': version}
+        if not isinstance(data, list):
+            return None
+        if not any(isinstance(item, SheetRecord) for item in data):
+            if not all(isinstance(item, (str, int, float)) for item in data):
+                return None
+            entry['values'] = data
+            return entry
+
+        schema_positions: Dict[int, int] = {}
+        schemas: List[Dict[str, Any]] = []
+        rows: List[List[Any]] = []
+        for record in data:
+            if not isinstance(record, SheetRecord):
+                return None
+            position = schema_positions.get(id(record.schema))
+            if position is None:
+                position = schema_positions[id(record.schema)] = len(schemas)
+                schemas.append({'sheet': sheet_of(record), 'headers': record.schema.raw_headers,
+                                'projected': record.schema.projected})
+            rows.append([position, record.values_list])
+        entry['schemas'] = schemas
+        entry['rows'] = rows
+        return entry
+
+    @staticmethod
+    def decode_entry(entry: Dict[str, Any],
+                     make_record: Callable[[str, HeaderSchema, List[Any]], SheetRecord],
+                     schema_for: Callable[[str, List[str], bool], HeaderSchema]) -> List[Any]:
+        """
+        Reconstrói os dados de uma entrada. Cada cabeçalho é convertido uma só
+        vez em HeaderSchema (`schema_for`) e partilhado pelos registos dessa aba.
+        """
+        if 'values' in entry:
+            return list(entry['values'])
+        schemas = [(item['sheet'], schema_for(item['sheet'], item['headers'], item['projected']))
+                   for item in entry.get('schemas', [])]
+        return [make_record(schemas[position][0], schemas[position][1], values)
+                for position, values in entry.get('rows', [])]
+
+    @staticmethod
+    def entry_timestamp(entry: Dict[str, Any]) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(entry['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return None
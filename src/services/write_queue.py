@@ -0,0 +1,113 @@
+# ==============================================================================
+# FICHEIRO: src/services/write_queue.py
+# DESCRIÇÃO: Fila de escrita diferida (write-behind) usada pelo SheetsService
+#            para agrupar alterações de status e comentários em lotes.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: A fila não conhece a planilha: quem a cria fornece o `flush_handler`,
+#        que recebe a lista de operações pendentes e devolve as que falharam.
+# ==============================================================================
+
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple, Hashable
+
+
+class WriteBehindQueue:
+    """
+    Acumula operações de escrita e envia-as em lote a cada `flush_interval_ms`.
+
+    Cada operação é um dicionário com, pelo menos, a chave 'key'. Uma nova
+    operação com a mesma chave substitui a pendente (por exemplo, dois cliques
+    seguidos no status da mesma ocorrência resultam numa só escrita).
+    Opcionalmente, a operação pode trazer 'on_error' (chamado com a mensagem de
+    erro quando a escrita falha definitivamente) e 'rollback' (chamado antes de
+    'on_error' para desfazer a alteração otimista feita localmente).
+    """
+    def __init__(self, flush_handler: Callable[[List[Dict[str, Any]]], List[Tuple[Dict[str, Any], str, bool]]],
+                 flush_interval_ms: int = 1500, max_retries: int = 3):
+        """
+        :param flush_handler: Recebe as operações pendentes e devolve uma lista de
+                              (operação, mensagem de erro, erro_transitório) das que falharam.
+        :param flush_interval_ms: Atraso entre a primeira operação e o envio do lote.
+        :param max_retries: Número de novas tentativas para erros transitórios.
+        """
+        self._flush_handler = flush_handler
+        self.flush_interval_ms = flush_interval_ms
+        self.max_retries = max_retries
+
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def put(self, op: Dict[str, Any]):
+        """Adiciona (ou substitui) uma operação e agenda o envio do lote."""
+        with self._lock:
+            self._pending[op['key']] = op
+            self._schedule(self.flush_interval_ms)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Devolve a operação pendente com a chave indicada, se existir."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def discard(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Retira da fila a operação pendente com a chave indicada, devolvendo-a."""
+        with self._lock:
+            return self._pending.pop(key, None)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Devolve uma cópia das operações ainda por enviar."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def _schedule(self, delay_ms: int):
+        """Arma o temporizador do próximo envio, se ainda não estiver armado. Chamar com _lock."""
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(delay_ms / 1000.0, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Envia imediatamente todas as operações pendentes."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = list(self._pending.values())
+                self._pending = {}
+            if not batch:
+                return
+
+            try:
+                failures = self._flush_handler(batch)
+            except Exception as e:
+                failures = [(op, str(e), True) for op in batch]
+
+            retry_delay_ms = 0
+            for op, error, transient in failures:
+                op['attempts'] = op.get('attempts', 0) + 1
+                if transient and op['attempts'] <= self.max_retries:
+                    with self._lock:
+                        # Uma operação mais recente com a mesma chave tem prioridade.
+                        if op['key'] not in self._pending:
+                            self._pending[op['key']] = op
+                    retry_delay_ms = max(retry_delay_ms, self.flush_interval_ms * (2 ** op['attempts']))
+                    continue
+
+                print(f"ERRO: Escrita '{op['key']}' descartada após {op['attempts']} tentativa(s): {error}")
+                if op.get('rollback'):
+                    try:
+                        op['rollback']()
+                    except Exception as e:
+                        print(f"ERRO ao desfazer a escrita '{op['key']}': {e}")
+                if op.get('on_error'):
+                    try:
+                        op['on_error'](error)
+                    except Exception as e:
+                        print(f"ERRO ao notificar a falha da escrita '{op['key']}': {e}")
+
+            if retry_delay_ms:
+                with self._lock:
+                    self._schedule(retry_delay_ms)
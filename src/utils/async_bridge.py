@@ -0,0 +1,142 @@
+# ==============================================================================
+# FICHEIRO: src/utils/async_bridge.py
+# DESCRIÇÃO: Um único event loop asyncio numa thread de fundo, onde correm as
+#            leituras e escritas da planilha pedidas pelas telas, com os
+#            resultados entregues na thread do Tk (via after()).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Não é um backend de I/O assíncrono: os serviços (gspread, Drive)
+#        continuam síncronos e o loop apenas coordena os pedidos. Cada chamada
+#        (call) é delegada ao TaskScheduler (utils/task_scheduler.py), que a
+#        corre numa das suas threads e limita quantas correm ao mesmo tempo e
+#        por que ordem, seja qual for a tela que as pediu. Também aceita
+#        corrotinas (run_coroutine), que usam call() para as chamadas aos
+#        serviços (um sleep não ocupa nenhuma thread). Os pedidos podem ter
+#        um grupo (ex.: o nome da tela); cancel_group() cancela os que ainda
+#        não terminaram e descarta os resultados dos que já estão a correr
+#        (uma chamada síncrona já iniciada não pode ser interrompida, só
+#        ignorada). O mesmo acontece a um pedido substituído por outro com a
+#        mesma chave (`key`).
+#        Ao fechar a aplicação (shutdown), as chamadas já entregues ao
+#        TaskScheduler não são canceladas aqui: é o agendador que decide quais
+#        ainda correm (as escritas pedidas pelo utilizador, ver app.shutdown).
+# ==============================================================================
+
+import asyncio
+import threading
+import tkinter
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from utils.task_scheduler import INTERACTIVE, TaskScheduler, TaskSuperseded
+
+
+class AsyncBridge:
+    """
+    Ponte entre o event loop de fundo e o Tk. `tk_root` é o widget cujo
+    after() é usado para chamar `on_success`/`on_error` na thread da UI;
+    `scheduler` executa as chamadas síncronas.
+    """
+    def __init__(self, tk_root: Any, scheduler: TaskScheduler):
+        self._root = tk_root
+        self._scheduler = scheduler
+        self._loop = asyncio.new_event_loop()
+        self._groups: Dict[str, Set[Future]] = defaultdict(set)
+        # Incrementada em cancel_group(): resultados de pedidos anteriores não são entregues.
+        self._group_generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_loop, name="async-bridge", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    # --- PEDIDOS ---
+
+    def run(self, fn: Callable[..., Any], *args: Any, on_success: Optional[Callable[[Any], None]] = None,
+            on_error: Optional[Callable[[Exception], None]] = None, group: Optional[str] = None,
+            key: Optional[Hashable] = None, priority: int = INTERACTIVE) -> Optional[Future]:
+        """
+        Executa fn(*args) (síncrona, ex.: um método de um serviço) fora da
+        thread da UI e entrega o resultado a `on_success` na thread da UI.
+        `key` e `priority` são passados ao TaskScheduler (ver call()).
+        Devolve o Future do pedido (None se a ponte já foi encerrada).
+        """
+        return self.run_coroutine(self.call(fn, *args, key=key, priority=priority),
+                                  on_success=on_success, on_error=on_error, group=group)
+
+    def run_coroutine(self, coroutine: Awaitable[Any], on_success: Optional[Callable[[Any], None]] = None,
+                      on_error: Optional[Callable[[Exception], None]] = None, group: Optional[str] = None) -> Optional[Future]:
+        """Como run(), mas para uma corrotina (que deve usar call() para chamar os serviços)."""
+        with self._lock:
+            if self._closed:
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+                return None
+            generation = self._group_generations[group] if group else 0
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+            if group:
+                self._groups[group].add(future)
+        future.add_done_callback(lambda done: self._deliver(done, group, generation, on_success, on_error))
+        return future
+
+    def cancel_group(self, group: str):
+        """Cancela os pedidos do grupo ainda em curso; os seus resultados já não são entregues."""
+        with self._lock:
+            self._group_generations[group] += 1
+            futures = self._groups.pop(group, set())
+        for future in futures:
+            future.cancel()
+
+    def shutdown(self):
+        """
+        Deixa de aceitar pedidos e de entregar resultados (ao fechar a
+        aplicação). As chamadas que já estão no TaskScheduler ficam ao cuidado
+        deste (ver TaskScheduler.shutdown); o loop (thread daemon) continua
+        até ao fim do processo, para que as corrotinas à espera delas terminem.
+        """
+        with self._lock:
+            self._closed = True
+            self._groups.clear()
+
+    # --- EXECUÇÃO ---
+
+    async def call(self, fn: Callable[..., Any], *args: Any, key: Optional[Hashable] = None,
+                   priority: int = INTERACTIVE) -> Any:
+        """
+        Executa fn(*args) no TaskScheduler e espera pelo resultado (para usar no
+        loop). Um pedido com a mesma `key` substitui este, se ainda não terminou.
+        """
+        return await asyncio.wrap_future(self._scheduler.submit(fn, *args, priority=priority, key=key))
+
+    def _deliver(self, future: Future, group: Optional[str], generation: int,
+                 on_success: Optional[Callable[[Any], None]], on_error: Optional[Callable[[Exception], None]]):
+        """Chamado na thread do loop quando o pedido termina; passa o resultado à thread da UI."""
+        with self._lock:
+            if group:
+                self._groups.get(group, set()).discard(future)
+            if self._closed or future.cancelled() or (group and self._group_generations[group] != generation):
+                return
+
+        error = future.exception()
+        if isinstance(error, TaskSuperseded):
+            return # Há um pedido mais recente com a mesma chave; só esse é entregue.
+        if error is None:
+            callback, value = on_success, future.result()
+        else:
+            print(f"ERRO num pedido em segundo plano{f' ({group})' if group else ''}: {error}")
+            callback, value = on_error, error
+        if callback is None:
+            return
+
+        def _in_ui_thread():
+            # O grupo pode ter sido cancelado entre o fim do pedido e este momento.
+            if group and self._group_generations[group] != generation:
+                return
+            callback(value)
+        try:
+            self._root.after(0, _in_ui_thread)
+        except (RuntimeError, tkinter.TclError): # A janela já foi destruída
+            pass
@@ -0,0 +1,57 @@
+# ==============================================================================
+# FICHEIRO: src/utils/lru_cache.py
+# DESCRIÇÃO: Cache em memória de tamanho limitado, que descarta primeiro as
+#            entradas usadas há mais tempo (LRU).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# ==============================================================================
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Dicionário com no máximo `max_size` entradas. Ler ou escrever uma entrada
+    torna-a a mais recente; ao exceder o limite, sai a menos recente.
+    Thread-safe.
+    """
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def peek(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        """Lê uma entrada sem alterar a ordem de uso."""
+        with self._lock:
+            return self._items.get(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
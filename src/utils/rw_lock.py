@@ -0,0 +1,67 @@
+# ==============================================================================
+# FICHEIRO: src/utils/rw_lock.py
+# DESCRIÇÃO: Lock de leitura/escrita (vários leitores ou um único escritor).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: O lock não é reentrante. Um escritor à espera bloqueia novos leitores,
+#        para que uma leitura longa e contínua não adie as escritas para sempre.
+# ==============================================================================
+
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Permite várias leituras em simultâneo, mas apenas uma escrita de cada vez
+    (e nenhuma leitura enquanto a escrita decorre).
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Bloco com acesso de leitura: `with lock.read(): ...`"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Bloco com acesso exclusivo: `with lock.write(): ...`"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
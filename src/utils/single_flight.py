@@ -0,0 +1,120 @@
+# ==============================================================================
+# FICHEIRO: src/utils/single_flight.py
+# DESCRIÇÃO: Agrupa chamadas simultâneas com a mesma chave numa única execução
+#            (single-flight): quem chega enquanto ela decorre espera e recebe o
+#            mesmo resultado (ou a mesma exceção).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Só as chamadas que se sobrepõem são agrupadas; terminada a execução,
+#        a chave é esquecida e a próxima chamada volta a executar a função.
+#        O resultado é partilhado tal como está: quem chama não o deve alterar.
+#        Uma execução em segundo plano só conta como em curso quando começa: até
+#        lá, do() executa a função em vez de esperar por uma tarefa que pode
+#        estar na fila do mesmo conjunto de threads (e nunca chegar a correr).
+# ==============================================================================
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+
+class _Flight:
+    """Uma execução em curso, partilhada por todos os que pedirem a mesma chave."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Execuções em curso por chave. Thread-safe. `shared` conta quantas chamadas
+    receberam o resultado de outra em vez de executarem a função.
+    """
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Chaves com uma execução em segundo plano à espera de começar.
+        self._queued: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Executa `fn`, ou espera pela execução da mesma chave já em curso."""
+        with self._lock:
+            flight = self._flights.get(key)
+            is_owner = flight is None
+            if is_owner:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not is_owner:
+            return flight.wait()
+        return self._run(key, fn, flight)
+
+    def do_in_background(self, key: Hashable, fn: Callable[[], Any],
+                         on_success: Optional[Callable[[Any], None]] = None,
+                         executor: Optional[Callable[[Callable[[], None]], Any]] = None) -> bool:
+        """
+        Executa `fn` em segundo plano, a não ser que a mesma chave já esteja em
+        curso ou à espera de começar (devolve False). `executor` recebe a função
+        a correr (por omissão, é criada uma thread). `on_success` recebe o
+        resultado, já com a chave livre; os erros são escritos no log. Se, ao
+        começar, já houver outra execução da chave em curso, esta não corre.
+        """
+        with self._lock:
+            if key in self._flights or key in self._queued:
+                return False
+            self._queued.add(key)
+
+        def _worker():
+            with self._lock:
+                self._queued.discard(key)
+                if key in self._flights:
+                    return
+                flight = self._flights[key] = _Flight()
+            try:
+                result = self._run(key, fn, flight)
+            except Exception as e:
+                print(f"ERRO na execução em segundo plano '{key}': {e}")
+                return
+            if on_success is not None:
+                on_success(result)
+
+        try:
+            if executor is not None:
+                task = executor(_worker)
+                if hasattr(task, 'add_done_callback'):
+                    # Uma tarefa cancelada antes de começar (ex.: ao fechar) liberta a chave.
+                    task.add_done_callback(lambda done: done.cancelled() and self._forget_queued(key))
+            else:
+                threading.Thread(target=_worker, daemon=True).start()
+        except RuntimeError:
+            # O executor já não aceita trabalho (ex.: a aplicação está a fechar).
+            self._forget_queued(key)
+            return False
+        return True
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Indica se a chave está em curso ou, em segundo plano, à espera de começar."""
+        with self._lock:
+            return key in self._flights or key in self._queued
+
+    def _forget_queued(self, key: Hashable):
+        with self._lock:
+            self._queued.discard(key)
+
+    def _run(self, key: Hashable, fn: Callable[[], Any], flight: _Flight) -> Any:
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
@@ -0,0 +1,208 @@
+# ==============================================================================
+# FICHEIRO: src/utils/task_scheduler.py
+# DESCRIÇÃO: Agendador de tarefas com um conjunto fixo de threads, prioridades
+#            e chaves (uma tarefa nova com a mesma chave substitui a anterior).
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: É o único sítio onde o trabalho em segundo plano da aplicação corre
+#        (pedidos das telas via AsyncBridge, pré-carregamento, revalidação do
+#        cache). As tarefas INTERACTIVE passam à frente das BACKGROUND, e estas
+#        das PREFETCH; dentro da mesma prioridade, a ordem é a de chegada. As
+#        PREFETCH nunca ocupam mais de metade das threads, para deixar sempre
+#        lugar às ações do utilizador.
+#        Uma tarefa substituída que ainda não começou é cancelada; se já estiver
+#        a correr, não pode ser interrompida, mas o seu Future termina com
+#        TaskSuperseded em vez do resultado.
+#        Ao encerrar (shutdown), as tarefas à espera são canceladas, exceto as
+#        das prioridades indicadas (ex.: INTERACTIVE, onde estão as escritas
+#        pedidas pelo utilizador), que ainda correm e pelas quais se espera.
+# ==============================================================================
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional
+
+INTERACTIVE = 0  # Pedidos de uma tela que o utilizador está a ver
+BACKGROUND = 1   # Revalidações e verificações periódicas
+PREFETCH = 2     # Dados que talvez venham a ser precisos
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background', PREFETCH: 'prefetch'}
+
+
+class TaskSuperseded(Exception):
+    """Resultado de uma tarefa substituída por outra mais recente com a mesma chave."""
+
+
+class _Task:
+    def __init__(self, fn: Callable[..., Any], args: tuple, priority: int, key: Optional[Hashable]):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.future: Future = Future()
+        self.superseded = False
+        self.queued_at = time.monotonic()
+
+
+class TaskScheduler:
+    """
+    Conjunto fixo de `max_workers` threads que executam as tarefas submetidas
+    (submit) por ordem de prioridade. `max_running` limita, por prioridade, o
+    número de tarefas a correr ao mesmo tempo. Thread-safe.
+    """
+    def __init__(self, max_workers: int = 4, max_running: Optional[Dict[int, int]] = None, name: str = "worker"):
+        self.max_workers = max_workers
+        self._max_running = {PREFETCH: max(1, max_workers // 2)} if max_running is None else dict(max_running)
+        self._queues: Dict[int, Deque[_Task]] = {priority: deque() for priority in sorted(PRIORITY_NAMES)}
+        self._running: Dict[int, int] = defaultdict(int)
+        self._by_key: Dict[Hashable, _Task] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Métricas (ver stats()).
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'superseded': 0}
+        self._max_queued = 0
+        self._started = 0
+        self._total_wait = 0.0
+
+        self._workers: List[threading.Thread] = []
+        for index in range(max_workers):
+            worker = threading.Thread(target=self._work, name=f"{name}-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, priority: int = INTERACTIVE,
+               key: Optional[Hashable] = None) -> Future:
+        """
+        Agenda fn(*args) e devolve o seu Future. Com `key`, a tarefa anterior
+        com a mesma chave que ainda não terminou é substituída (ver as notas).
+        Lança RuntimeError se o agendador já foi encerrado.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Prioridade desconhecida: {priority}")
+        task = _Task(fn, args, priority, key)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("O agendador de tarefas já foi encerrado.")
+            if key is not None:
+                previous = self._by_key.get(key)
+                if previous is not None:
+                    self._supersede(previous)
+                self._by_key[key] = task
+            self._queues[priority].append(task)
+            self._counters['submitted'] += 1
+            self._max_queued = max(self._max_queued, sum(len(queue) for queue in self._queues.values()))
+            self._cond.notify()
+        return task.future
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métricas do agendador: tarefas à espera (no total e por prioridade), o
+        máximo já atingido, tarefas a correr, espera média até começar (ms) e
+        contadores de tarefas submetidas, concluídas, falhadas, canceladas e substituídas.
+        """
+        with self._cond:
+            queued = {PRIORITY_NAMES[priority]: sum(1 for task in queue if not task.future.cancelled())
+                      for priority, queue in self._queues.items()}
+            return {
+                'workers': self.max_workers,
+                'running': sum(self._running.values()),
+                'queued': sum(queued.values()),
+                'queued_by_priority': queued,
+                'max_queued': self._max_queued,
+                'avg_wait_ms': round(1000 * self._total_wait / self._started, 1) if self._started else 0.0,
+                **self._counters,
+            }
+
+    def shutdown(self, wait_for: Iterable[int] = (), timeout: Optional[float] = None) -> bool:
+        """
+        Deixa de aceitar tarefas e cancela as que estão à espera, exceto as das
+        prioridades `wait_for`: essas ainda correm, e espera-se (até `timeout`
+        segundos) que terminem, tal como as dessas prioridades já a correr. As
+        threads terminam quando não houver mais nada para correr.
+        Devolve False se o tempo acabou antes de essas tarefas terminarem.
+        """
+        wait_for = set(wait_for)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._closed = True
+            for priority, queue in self._queues.items():
+                if priority in wait_for:
+                    continue
+                for task in queue:
+                    if task.future.cancel():
+                        self._counters['cancelled'] += 1
+                    self._forget(task)
+                queue.clear()
+            self._cond.notify_all()
+            while any(self._queues[priority] or self._running[priority] for priority in wait_for):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    # --- EXECUÇÃO ---
+
+    def _supersede(self, task: _Task):
+        """Marca uma tarefa como substituída; se ainda estiver na fila, sai dela. Chamar com _cond."""
+        task.superseded = True
+        self._counters['superseded'] += 1
+        if task.future.cancel():
+            try:
+                self._queues[task.priority].remove(task)
+            except ValueError:
+                pass
+
+    def _next_task(self) -> Optional[_Task]:
+        """A próxima tarefa a correr, respeitando prioridades e limites. Chamar com _cond."""
+        for priority, queue in self._queues.items():
+            limit = self._max_running.get(priority)
+            if queue and (limit is None or self._running[priority] < limit):
+                return queue.popleft()
+        return None
+
+    def _forget(self, task: _Task):
+        if task.key is not None and self._by_key.get(task.key) is task:
+            del self._by_key[task.key]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None and not self._closed:
+                    self._cond.wait()
+                    task = self._next_task()
+                if task is None:
+                    return
+                if not task.future.set_running_or_notify_cancel():
+                    # Cancelada (ex.: a tela que a pediu foi fechada) antes de começar.
+                    if not task.superseded:
+                        self._counters['cancelled'] += 1
+                    self._forget(task)
+                    continue
+                self._running[task.priority] += 1
+                self._started += 1
+                self._total_wait += time.monotonic() - task.queued_at
+
+            try:
+                result, error = task.fn(*task.args), None
+            except BaseException as e:
+                result, error = None, e
+
+            with self._cond:
+                self._running[task.priority] -= 1
+                self._forget(task)
+                self._counters['failed' if error is not None else 'completed'] += 1
+                superseded = task.superseded
+                # Uma prioridade que estava no limite pode ter ficado livre (e
+                # shutdown() pode estar à espera desta tarefa).
+                self._cond.notify_all()
+
+            if superseded:
+                task.future.set_exception(TaskSuperseded(f"Tarefa '{task.key}' substituída por uma mais recente."))
+            elif error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
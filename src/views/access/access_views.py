@@ -2,16 +2,18 @@
 # FICHEIRO: src/views/access/access_views.py
 # DESCRIÇÃO: Contém as classes de interface para o fluxo de solicitação
 #            e aprovação de acesso de novos utilizadores.
-# DATA DA ATUALIZAÇÃO: 27/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
 # NOTAS: Ficheiro movido para a nova subpasta 'access'. Nenhuma alteração
 #        de código foi necessária.
+#        A verificação periódica do status (PendingApprovalView) é uma
+#        corrotina no event loop da AsyncBridge, em vez de uma thread própria.
 # ==============================================================================
 
 import customtkinter as ctk
 from tkinter import messagebox
 import re
-import threading
-import time
+import asyncio
+from utils.task_scheduler import BACKGROUND
 
 class RequestAccessView(ctk.CTkFrame):
     """
@@ -300,6 +302,8 @@ class PendingApprovalView(ctk.CTkFrame):
     """
     Tela exibida enquanto o acesso do utilizador está pendente de aprovação.
     """
+    CHECK_INTERVAL_SECONDS = 30 # Intervalo entre verificações automáticas do status
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -335,44 +339,37 @@ class PendingApprovalView(ctk.CTkFrame):
                                       fg_color=self.controller.GRAY_BUTTON_COLOR, hover_color=self.controller.GRAY_HOVER_COLOR)
         logout_button.grid(row=4, column=0, pady=10)
 
-        self.is_running = False
-        self.checker_thread = None
-
     def on_show(self):
-        if not self.is_running or (self.checker_thread and not self.checker_thread.is_alive()):
-            self.is_running = True
-            self.checker_thread = threading.Thread(target=self._check_status_thread, daemon=True)
-            self.checker_thread.start()
-
-    def _check_status_thread(self):
-        while self.is_running:
+        self._start_status_checks()
+
+    def _start_status_checks(self):
+        """
+        (Re)inicia a verificação periódica no event loop da AsyncBridge. É
+        cancelada quando a tela deixa de ser mostrada (ver App.show_frame).
+        """
+        self.controller.bridge.cancel_group("PendingApprovalView")
+        self.controller.bridge.run_coroutine(self._check_status_loop(), group="PendingApprovalView")
+
+    async def _check_status_loop(self):
+        while True:
             self.controller.after(0, lambda: self.status_label.configure(text="A verificar o status..."))
-            user_profile = self.controller.sheets_service.check_user_status(self.controller.user_email)
+            user_profile = await self.controller.bridge.call(self.controller.sheets_service.check_user_status,
+                                                             self.controller.user_email, priority=BACKGROUND)
             status = user_profile.get("status")
 
             if status == "approved":
-                self.is_running = False
                 self.controller.user_profile = user_profile
                 self.controller.after(0, self.controller.navigate_based_on_status)
+                return
             elif status == "rejected":
-                self.is_running = False
                 self.controller.after(0, lambda: messagebox.showerror("Acesso Negado", "Sua solicitação de acesso foi rejeitada. Por favor, entre em contacto com o administrador."))
                 self.controller.after(0, self.controller.perform_logout)
+                return
             else:
-                self.controller.after(0, lambda: self.status_label.configure(text=f"Aguardando aprovação. Próxima verificação em 30 segundos..."))
+                self.controller.after(0, lambda: self.status_label.configure(text=f"Aguardando aprovação. Próxima verificação em {self.CHECK_INTERVAL_SECONDS} segundos..."))
 
-            for _ in range(30):
-                if not self.is_running:
-                    break
-                time.sleep(1)
+            await asyncio.sleep(self.CHECK_INTERVAL_SECONDS)
 
     def check_status_now(self):
-        if self.is_running:
-            self.is_running = False
-            if self.checker_thread and self.checker_thread.is_alive():
-                self.checker_thread.join(timeout=1)
-
-            self.is_running = True
-            self.status_label.configure(text="A verificar o status agora...")
-            self.checker_thread = threading.Thread(target=self._check_status_thread, daemon=True)
-            self.checker_thread.start()
+        self.status_label.configure(text="A verificar o status agora...")
+        self._start_status_checks()
@@ -0,0 +1,242 @@
+# ==============================================================================
+# FICHEIRO: src/views/components/virtual_list.py
+# DESCRIÇÃO: Lista com scroll "virtualizada": só existem os cards da área
+#            visível, reutilizados à medida que o utilizador faz scroll.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Substitui o CTkScrollableFrame nas listas que podem ter milhares de
+#        linhas (histórico, utilizadores, solicitações de acesso). Todos os
+#        cards têm a mesma altura (row_height), o que permite calcular a
+#        posição de cada linha sem criar os widgets.
+# ==============================================================================
+
+import sys
+import math
+import tkinter
+import customtkinter as ctk
+from typing import Callable, Any, List, Optional, Dict
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Lista com scroll que mantém um conjunto fixo de cards (o suficiente para
+    encher a área visível) e os associa às linhas à medida que estas aparecem.
+
+    :param create_card: Função (parent) -> widget, chamada uma vez por card do conjunto.
+    :param bind_card: Função (card, item, index) que preenche um card com os dados de uma linha.
+    :param row_height: Altura (em pixels, antes do scaling) de cada linha, incluindo o espaçamento.
+    :param on_near_end: Chamada (sem argumentos) quando o scroll se aproxima do fim da lista.
+    :param on_visible_change: Chamada com a lista das linhas visíveis sempre que estas mudam.
+    """
+    def __init__(self, master, create_card: Callable[[Any], Any], bind_card: Callable[[Any, Any, int], None],
+                 row_height: int = 80, row_padding: int = 5, label_text: str = "", label_text_color=None,
+                 on_near_end: Optional[Callable[[], None]] = None, near_end_rows: int = 10,
+                 on_visible_change: Optional[Callable[[List[Any]], None]] = None, **kwargs):
+        super().__init__(master, **kwargs)
+        self._create_card = create_card
+        self._bind_card = bind_card
+        self._row_height = row_height
+        self._row_padding = row_padding
+        self._on_near_end = on_near_end
+        self._near_end_rows = near_end_rows
+        self._on_visible_change = on_visible_change
+
+        self._items: List[Any] = []
+        self._pool: List[Any] = [] # Cards criados
+        self._windows: List[int] = [] # Janela do canvas de cada card
+        self._slot_index: Dict[int, Optional[int]] = {} # Card -> linha associada
+        self._near_end_notified_at: Optional[int] = None
+        self._visible_range: Optional[tuple] = None # (primeira, última) linhas visíveis já comunicadas
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._label = ctk.CTkLabel(self, text=label_text, corner_radius=6,
+                                   fg_color=ctk.ThemeManager.theme["CTkScrollableFrame"]["label_fg_color"])
+        if label_text_color:
+            self._label.configure(text_color=label_text_color)
+        if label_text:
+            self._label.grid(row=0, column=0, columnspan=2, sticky="ew", padx=6, pady=(6, 0))
+
+        self._canvas = tkinter.Canvas(self, highlightthickness=0, borderwidth=0,
+                                      bg=self._canvas_bg_color(),
+                                      yscrollincrement=self._apply_widget_scaling(20))
+        self._canvas.grid(row=1, column=0, sticky="nsew", padx=(6, 0), pady=6)
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._canvas.yview)
+        self._scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 3), pady=6)
+        self._canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self._canvas.bind("<Configure>", self._on_canvas_configure)
+
+        # Tal como o CTkScrollableFrame, o scroll do rato é capturado globalmente
+        # e só é tratado se o ponteiro estiver sobre esta lista. Os handlers são
+        # retirados em destroy().
+        sequences = ("<Button-4>", "<Button-5>") if "linux" in sys.platform else ("<MouseWheel>",)
+        self._wheel_bindings = [(sequence, self.bind_all(sequence, self._on_mouse_wheel, add=True))
+                                for sequence in sequences]
+
+    # --- API PÚBLICA ---
+
+    @property
+    def items(self) -> List[Any]:
+        return self._items
+
+    def set_items(self, items: List[Any], keep_position: bool = False):
+        """
+        Substitui todas as linhas da lista e volta ao topo (com `keep_position`,
+        mantém o scroll, ex.: os mesmos dados atualizados).
+        """
+        self._items = list(items)
+        self._near_end_notified_at = None
+        self._slot_index = {}
+        self._visible_range = None
+        self._update_scrollregion()
+        if not keep_position:
+            self._canvas.yview_moveto(0)
+        self._render()
+
+    def append_items(self, items: List[Any]):
+        """Acrescenta linhas no fim da lista, mantendo a posição do scroll."""
+        self._items.extend(items)
+        self._update_scrollregion()
+        self._render()
+
+    def refresh(self):
+        """Volta a preencher os cards visíveis (por exemplo, depois de os dados das linhas mudarem)."""
+        self._slot_index = {}
+        self._visible_range = None
+        self._render()
+
+    def visible_cards(self) -> List[tuple]:
+        """Devolve (card, item) dos cards atualmente associados a uma linha."""
+        return [(self._pool[slot], self._items[index]) for slot, index in self._slot_index.items()
+                if index is not None and index < len(self._items)]
+
+    def configure(self, require_redraw=False, **kwargs):
+        """Aceita também `label_text` e `label_text_color`, como o CTkScrollableFrame."""
+        if "label_text" in kwargs:
+            label_text = kwargs.pop("label_text")
+            self._label.configure(text=label_text)
+            if label_text:
+                self._label.grid(row=0, column=0, columnspan=2, sticky="ew", padx=6, pady=(6, 0))
+            else:
+                self._label.grid_forget()
+        if "label_text_color" in kwargs:
+            self._label.configure(text_color=kwargs.pop("label_text_color"))
+        if kwargs or require_redraw:
+            super().configure(require_redraw=require_redraw, **kwargs)
+            if hasattr(self, "_canvas"):
+                self._canvas.configure(bg=self._canvas_bg_color())
+
+    def destroy(self):
+        for sequence, funcid in self._wheel_bindings:
+            self._unbind_all_handler(sequence, funcid)
+        self._wheel_bindings = []
+        super().destroy()
+
+    def _unbind_all_handler(self, sequence: str, funcid: str):
+        """
+        Retira do bind_all de `sequence` apenas o handler `funcid`
+        (unbind_all retiraria também os das outras listas e scrollables).
+        """
+        try:
+            script = self.tk.call("bind", "all", sequence)
+            kept = [line for line in script.split("\n") if funcid not in line]
+            self.tk.call("bind", "all", sequence, "\n".join(kept))
+            self.deletecommand(funcid)
+        except tkinter.TclError:
+            pass # O interpretador já foi destruído
+
+    # --- RENDERIZAÇÃO ---
+
+    def _row_pixels(self) -> float:
+        return self._apply_widget_scaling(self._row_height)
+
+    def _canvas_bg_color(self):
+        color = self._fg_color if self._fg_color != "transparent" else self._bg_color
+        return self._apply_appearance_mode(color)
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        if hasattr(self, "_canvas"):
+            self._canvas.configure(bg=self._canvas_bg_color())
+
+    def _update_scrollregion(self):
+        total_height = len(self._items) * self._row_pixels()
+        self._canvas.configure(scrollregion=(0, 0, self._canvas.winfo_width(), total_height))
+
+    def _ensure_pool(self, size: int):
+        """Cria cards até o conjunto ter `size` elementos."""
+        if size <= len(self._pool):
+            return
+        while len(self._pool) < size:
+            card = self._create_card(self._canvas)
+            self._pool.append(card)
+            self._windows.append(self._canvas.create_window(0, 0, window=card, anchor="nw", state="hidden"))
+        # O número de cards mudou: a associação linha -> card (index % len(pool)) também.
+        self._slot_index = {}
+
+    def _render(self):
+        """Posiciona e preenche os cards das linhas visíveis; esconde os restantes."""
+        canvas_width = self._canvas.winfo_width()
+        canvas_height = self._canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return # Ainda não foi desenhado
+
+        row_pixels = self._row_pixels()
+        padding = self._apply_widget_scaling(self._row_padding)
+        first = max(0, int(self._canvas.canvasy(0) // row_pixels))
+        self._ensure_pool(math.ceil(canvas_height / row_pixels) + 1)
+        last = min(len(self._items), first + len(self._pool))
+
+        visible_slots = set()
+        for index in range(first, last):
+            slot = index % len(self._pool)
+            visible_slots.add(slot)
+            window = self._windows[slot]
+            self._canvas.coords(window, 0, index * row_pixels)
+            self._canvas.itemconfigure(window, state="normal", width=canvas_width,
+                                       height=max(1, row_pixels - padding))
+            if self._slot_index.get(slot) != index:
+                self._bind_card(self._pool[slot], self._items[index], index)
+                self._slot_index[slot] = index
+
+        for slot, window in enumerate(self._windows):
+            if slot not in visible_slots:
+                self._canvas.itemconfigure(window, state="hidden")
+                self._slot_index[slot] = None
+
+        if self._on_visible_change and self._visible_range != (first, last):
+            self._visible_range = (first, last)
+            self._on_visible_change(self._items[first:last])
+
+        if (self._on_near_end and self._items and last >= len(self._items) - self._near_end_rows and
+                self._near_end_notified_at != len(self._items)):
+            self._near_end_notified_at = len(self._items)
+            self._on_near_end()
+
+    def _on_canvas_configure(self, event=None):
+        self._update_scrollregion()
+        self._render()
+
+    def _on_canvas_scroll(self, first, last):
+        self._scrollbar.set(first, last)
+        self._render()
+
+    def _on_mouse_wheel(self, event):
+        if not self._is_inside(event.widget) or self._canvas.yview() == (0.0, 1.0):
+            return
+        if sys.platform.startswith("win"):
+            # Um "clique" da roda vale 120; avança 3 unidades (60 px) por clique.
+            self._canvas.yview_scroll(int(-event.delta / 40) or (-1 if event.delta > 0 else 1), "units")
+        elif sys.platform == "darwin":
+            self._canvas.yview_scroll(-event.delta, "units")
+        else:
+            self._canvas.yview_scroll(-1 if event.num == 4 else 1, "units")
+
+    def _is_inside(self, widget) -> bool:
+        """Indica se o widget que recebeu o evento pertence a esta lista."""
+        try:
+            path, canvas_path = str(widget), str(self._canvas)
+        except Exception:
+            return False
+        # Compara caminhos completos: ".!canvas1" não é antecessor de ".!canvas10".
+        return path == canvas_path or path.startswith(canvas_path + ".")
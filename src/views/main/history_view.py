@@ -5,35 +5,59 @@
 #            (VERSÃO OTIMIZADA COM CACHE, FILTROS AVANÇADOS, MELHORIAS DE USABILIDADE E CORES)
 #            ATUALIZADO com badge de tipo de acesso, estatísticas contextuais e otimização de filtros.
 #            CORRIGIDO: Lógica de carregamento para usar get_occurrences_by_user e navegação.
-# DATA DA ATUALIZAÇÃO: 28/08/2025
+# DATA DA ATUALIZAÇÃO: 17/10/2026
 # NOTAS: Confirmado que as funcionalidades de ocorrências pendentes,
 #        edição de status para admins e navegação já estão implementadas.
 #        Adicionado comentário para clarificar o comportamento do filtro de status.
+#        O histórico é carregado página a página (mais recentes primeiro): a
+#        primeira página é mostrada logo e as seguintes ao chegar ao fim da lista.
+#        A lista usa o VirtualList: só existem os cards da área visível.
+#        Os detalhes e comentários dos cards visíveis (e do card sob o rato)
+#        são pré-carregados em segundo plano (ver occurrence_prefetcher.py).
+#        Os filtros de status, tipo e data são aplicados sobre o armazenamento
+#        em colunas do serviço (OccurrenceColumnStore), não registo a registo.
 # ==============================================================================
 
 import customtkinter as ctk
-import threading
 from functools import partial
 from tkinter import messagebox
 from datetime import datetime
 import re # Importação adicionada para validação com regex
+from views.components.virtual_list import VirtualList
 
 class HistoryView(ctk.CTkFrame):
     """
     Tela para exibir o histórico de ocorrências do utilizador, com cache
     para otimizar a performance da busca e filtros avançados.
     """
+    PAGE_SIZE = 50 # Ocorrências pedidas de cada vez
+    CLOSED_STATUSES = ["RESOLVIDO", "CANCELADO"] # Excluídos no modo "pending"
+    CARD_HEIGHT = 90 # Altura de cada card na lista (VirtualList)
+    PREFETCH_DELAY_MS = 300 # Espera após o scroll parar antes de pré-carregar os cards visíveis
+    STATUS_OPTIONS_FOR_EDITING = ["REGISTRADO", "EM ANÁLISE", "AGUARDANDO TERCEIROS", "PARCIALMENTE RESOLVIDO", "RESOLVIDO", "CANCELADO"]
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
 
         self.configure(fg_color=self.controller.BASE_COLOR)
 
-        self.cached_occurrences = [] # Cache para guardar os dados
+        self.loaded_occurrences = [] # Ocorrências já recebidas (os dados ficam no cache do SheetsService)
         self.return_to_view = "MainMenuView" # Atributo para controlar para onde voltar
         self.current_mode = "all" # Modo inicial, pode ser "all" ou "pending"
         self.history_entry_point = None # CORREÇÃO: Variável única para memorizar o ponto de entrada
 
+        # Estado do carregamento paginado
+        self._page_iterator = None
+        self._has_more_pages = False
+        self._page_loading = False
+        self._load_generation = 0 # Descarta resultados de carregamentos anteriores
+        self._can_edit_status = False # Admins alteram o status diretamente no card
+        self._occurrence_store = None # Histórico completo em colunas (carregado ao filtrar)
+        self._full_history_loaded = False
+        self._applied_filters = None # Filtros e pesquisa do último "filtrar" (ver filter_history)
+        self._prefetch_job = None
+
         # --- Configuração da Responsividade ---
         self.grid_columnconfigure(0, weight=1)
         # Ajustado grid_rowconfigure para acomodar o badge e o rodapé de estatísticas
@@ -77,7 +101,7 @@ class HistoryView(ctk.CTkFrame):
                      text_color=self.controller.TEXT_COLOR).grid(row=0, column=0, columnspan=4, sticky="w", padx=10, pady=(5, 0))
 
         ctk.CTkLabel(filter_frame, text="Busca por Palavra-Chave:", text_color=self.controller.TEXT_COLOR).grid(row=1, column=0, sticky="w", padx=10, pady=(5, 0))
-        self.search_entry = ctk.CTkEntry(filter_frame, placeholder_text="ID, título, nome do usuário...",
+        self.search_entry = ctk.CTkEntry(filter_frame, placeholder_text="ID, título, nome do usuário... ou campo:valor",
                                          fg_color="gray20", text_color=self.controller.TEXT_COLOR,
                                          border_color="gray40")
         self.search_entry.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
@@ -138,9 +162,14 @@ class HistoryView(ctk.CTkFrame):
         self.refresh_button.grid(row=0, column=2, padx=(5, 0), sticky="ew")
 
         # --- Frame de Scroll para a Lista de Ocorrências ---
-        self.history_scrollable_frame = ctk.CTkScrollableFrame(self, label_text="Carregando histórico...",
-                                                               fg_color="gray10",
-                                                               label_text_color=self.controller.TEXT_COLOR)
+        self.history_scrollable_frame = VirtualList(self, create_card=self._create_history_card,
+                                                    bind_card=self._bind_history_card,
+                                                    row_height=self.CARD_HEIGHT,
+                                                    label_text="Carregando histórico...",
+                                                    fg_color="gray10",
+                                                    label_text_color=self.controller.TEXT_COLOR,
+                                                    on_near_end=self._load_next_page,
+                                                    on_visible_change=self._on_visible_cards_changed)
         self.history_scrollable_frame.grid(row=3, column=0, padx=20, pady=10, sticky="nsew") # Row ajustada para 3
 
         # NOVO: Rodapé de Estatísticas
@@ -256,7 +285,9 @@ class HistoryView(ctk.CTkFrame):
 
         self.history_scrollable_frame.configure(label_text="Carregando histórico...")
         self.update_idletasks()
-        self.load_history()
+        # Mostra o que estiver em cache; se estiver fora do prazo, é recarregado em
+        # segundo plano e a lista é atualizada quando chegar (ver App._handle_cache_refreshed).
+        self.load_history(force_refresh=False)
 
     def _configure_access_badge_and_filters(self, main_group):
         """
@@ -286,26 +317,104 @@ class HistoryView(ctk.CTkFrame):
             self.status_filter.configure(state="normal")
 
 
-    def load_history(self):
-        """Inicia o carregamento FORÇADO do histórico a partir do Google Sheets."""
-        for widget in self.history_scrollable_frame.winfo_children():
-            widget.destroy()
-        threading.Thread(target=self._load_history_thread, daemon=True).start()
-
-    def _load_history_thread(self):
-        """Busca os dados no serviço, armazena no cache e chama a atualização da UI."""
-        all_user_visible_occurrences = self.controller.get_occurrences(force_refresh=True)
-
+    def load_history(self, force_refresh=True):
+        """
+        Inicia o carregamento do histórico, página a página. Por omissão é
+        FORÇADO a partir do Google Sheets; com force_refresh=False usa o cache.
+        """
+        self.history_scrollable_frame.set_items([])
+        self.loaded_occurrences = []
+        self._occurrence_store = None
+        self._full_history_loaded = False
+        self._applied_filters = None
+        self._load_generation += 1
+        self._page_iterator = self.controller.iter_occurrences(page_size=self.PAGE_SIZE, force_refresh=force_refresh)
+        self._has_more_pages = True
+        self._page_loading = False
+        self._load_next_page(first_page=True)
+
+    def _load_next_page(self, first_page=False):
+        """Pede a próxima página do histórico em segundo plano."""
+        if self._page_loading or not self._has_more_pages or self._page_iterator is None:
+            return
+        self._page_loading = True
+        generation = self._load_generation
+        self.controller.run_in_background(self._fetch_history_page, self._page_iterator,
+                                          on_success=lambda result: self._handle_history_page(generation, *result, first_page),
+                                          group="HistoryView", key="HistoryView.history")
+
+    def _fetch_history_page(self, page_iterator):
+        """Busca a próxima página no serviço (fora da thread da UI). Devolve (página, há_mais)."""
+        try:
+            page, cursor = next(page_iterator)
+        except StopIteration:
+            page, cursor = [], None
+        except Exception as e:
+            print(f"ERRO ao carregar o histórico: {e}")
+            page, cursor = [], None
+        return self._filter_by_mode(page), cursor is not None
+
+    def _filter_by_mode(self, occurrences):
+        """No modo "pending", mantém só as ocorrências que não estão resolvidas nem canceladas."""
         if self.current_mode == "pending":
-            self.cached_occurrences = [
-                occ for occ in all_user_visible_occurrences
-                if occ.get('Status', '').upper() not in ["RESOLVIDO", "CANCELADO"]
+            return [
+                occ for occ in occurrences
+                if occ.status not in self.CLOSED_STATUSES
             ]
-        else:
-            self.cached_occurrences = all_user_visible_occurrences
-        
+        return occurrences
+
+    def _handle_history_page(self, generation, page, has_more, first_page):
+        """Acrescenta uma página recebida à lista (na thread da UI)."""
+        if generation != self._load_generation:
+            return # O histórico foi recarregado entretanto
+        self._page_loading = False
+        self._has_more_pages = has_more
+        self.loaded_occurrences.extend(page)
+
         user_profile = self.controller.get_current_user_profile()
-        self.after(0, self._populate_history, self.cached_occurrences, user_profile)
+        if first_page:
+            self._populate_history(self.loaded_occurrences, user_profile)
+        else:
+            self._populate_history(self.loaded_occurrences, user_profile, new_items=page)
+
+        if has_more and not page:
+            # Página sem ocorrências a mostrar (ex.: modo pendentes): a lista não
+            # mudou e por isso não voltará a pedir mais; pede já a seguinte.
+            self._load_next_page()
+
+    def _fetch_full_history(self):
+        """Carrega o histórico completo (necessário para aplicar os filtros sobre todas as ocorrências)."""
+        try:
+            store = self.controller.get_occurrence_store()
+            occurrences = store.filter(exclude_statuses=self.CLOSED_STATUSES) if self.current_mode == "pending" else store.records
+        except Exception as e:
+            print(f"ERRO ao carregar o histórico completo: {e}")
+            store, occurrences = None, self.loaded_occurrences
+        return store, occurrences
+
+    def _handle_full_history(self, generation, store, occurrences, keep_position=False):
+        """Substitui as páginas carregadas pelo histórico completo e aplica os filtros."""
+        if generation != self._load_generation:
+            return
+        self._occurrence_store = store
+        self._full_history_loaded = True
+        self.loaded_occurrences = occurrences
+        self._has_more_pages = False
+        self._page_loading = False
+        self._apply_filters(keep_position=keep_position)
+
+    def refresh_from_cache(self):
+        """
+        Mostra as ocorrências atualizadas em segundo plano (já em cache) sem
+        perder o estado da tela: os filtros e a pesquisa aplicados voltam a ser
+        aplicados aos novos dados e a posição do scroll mantém-se.
+        """
+        self._load_generation += 1
+        self._page_loading = True
+        generation = self._load_generation
+        self.controller.run_in_background(self._fetch_full_history,
+                                          on_success=lambda result: self._handle_full_history(generation, *result, keep_position=True),
+                                          group="HistoryView", key="HistoryView.history")
 
     def clear_filters(self):
         """Reseta todos os campos de filtro para o estado padrão e re-aplica a filtragem."""
@@ -334,53 +443,92 @@ class HistoryView(ctk.CTkFrame):
             messagebox.showwarning("Formato de Data Inválido", "Por favor, corrija o formato das datas (DD-MM-AAAA) antes de aplicar os filtros.")
             return
 
-        search_term = self.search_entry.get().lower()
-        selected_status = self.status_filter.get().upper()
-        selected_type = self.type_filter.get().upper()
         start_date_str = self.start_date_entry.get()
         end_date_str = self.end_date_entry.get()
-        filtered_list = self.cached_occurrences
-
-        if search_term:
-            filtered_list = [
-                occ for occ in filtered_list
-                if any(search_term in str(v).lower() for v in occ.values())
-            ]
-
-        if self.current_mode == "all" and selected_status != "TODOS":
+        try:
+            start_day = datetime.strptime(start_date_str, "%d-%m-%Y").date() if start_date_str else None
+            end_day = datetime.strptime(end_date_str, "%d-%m-%Y").date() if end_date_str else None
+        except ValueError:
+            messagebox.showwarning("Formato de Data Inválido", "Ocorreu um erro inesperado na validação da data. Por favor, verifique o formato DD-MM-AAAA.")
+            return
+        self._applied_filters = {
+            'search_term': self.search_entry.get().lower(),
+            'selected_status': self.status_filter.get().upper(),
+            'selected_type': self.type_filter.get().upper(),
+            'start_date_str': start_date_str, 'end_date_str': end_date_str,
+            'start_day': start_day, 'end_day': end_day,
+        }
+
+        if self._has_more_pages or not self._full_history_loaded:
+            # Os filtros aplicam-se a todo o histórico: carrega-o primeiro (em colunas).
+            self._load_generation += 1
+            self._page_loading = True
+            self.history_scrollable_frame.configure(label_text="Carregando histórico completo...")
+            generation = self._load_generation
+            self.controller.run_in_background(self._fetch_full_history,
+                                              on_success=lambda result: self._handle_full_history(generation, *result),
+                                              group="HistoryView", key="HistoryView.history")
+            return
+        self._apply_filters()
+
+    def _apply_filters(self, keep_position=False):
+        """Aplica ao histórico completo os filtros guardados por filter_history (nenhum, se ainda não foi usado)."""
+        filters = self._applied_filters or {}
+        search_term = filters.get('search_term', '')
+        selected_status = filters.get('selected_status', 'TODOS')
+        selected_type = filters.get('selected_type', 'TODOS')
+        start_date_str = filters.get('start_date_str', '')
+        end_date_str = filters.get('end_date_str', '')
+        start_day = filters.get('start_day')
+        end_day = filters.get('end_day')
+
+        status_criteria = [selected_status] if self.current_mode == "all" and selected_status != "TODOS" else None
+        type_criteria = selected_type if selected_type != "TODOS" else None
+
+        if self._occurrence_store is not None:
+            # Status, tipo e datas: máscaras sobre as colunas (os valores do filtro de tipo coincidem com OccurrenceType).
+            filtered_list = self._occurrence_store.filter(
+                statuses=status_criteria,
+                exclude_statuses=self.CLOSED_STATUSES if self.current_mode == "pending" else None,
+                occurrence_type=type_criteria, start_date=start_day, end_date=end_day)
+        else:
+            # O histórico completo não pôde ser carregado: filtra as ocorrências já mostradas.
             filtered_list = [
-                occ for occ in filtered_list
-                if occ.get('Status', '').upper() == selected_status
+                occ for occ in self.loaded_occurrences
+                if self._matches_filters(occ, status_criteria, type_criteria, start_day, end_day)
             ]
 
-        if selected_type != "TODOS":
-            if selected_type == "CHAMADA":
-                filtered_list = [occ for occ in filtered_list if 'CALL' in occ.get('ID', '') and 'SCALL' not in occ.get('ID', '')]
-            elif selected_type == "CHAMADA SIMPLES":
-                filtered_list = [occ for occ in filtered_list if 'SCALL' in occ.get('ID', '')]
-            elif selected_type == "EQUIPAMENTO":
-                filtered_list = [occ for occ in filtered_list if 'EQUIP' in occ.get('ID', '')]
-
-        if start_date_str or end_date_str:
-            try:
-                start_date = datetime.strptime(start_date_str, "%d-%m-%Y") if start_date_str else datetime.min
-                end_date = datetime.strptime(end_date_str, "%d-%m-%Y").replace(hour=23, minute=59, second=59) if end_date_str else datetime.max
-                filtered_list = [
-                    occ for occ in filtered_list
-                    if 'Data de Registro' in occ and \
-                       start_date <= datetime.strptime(occ['Data de Registro'].split(' ')[0], "%Y-%m-%d") <= end_date
-                ]
-            except ValueError:
-                messagebox.showwarning("Formato de Data Inválido", "Ocorreu um erro inesperado na validação da data. Por favor, verifique o formato DD-MM-AAAA.")
-                return
+        if search_term:
+            # Índice de trigramas construído quando o histórico foi carregado; aceita `campo:valor`.
+            filtered_list = self.controller.search_occurrences(search_term, filtered_list)
 
         self._populate_history(filtered_list, self.controller.get_current_user_profile(),
                                search_term=search_term, selected_status=selected_status,
                                selected_type=selected_type,
-                               start_date_str=start_date_str, end_date_str=end_date_str)
-
-    def _populate_history(self, occurrences, user_profile, search_term="", selected_status="TODOS", selected_type="TODOS", start_date_str="", end_date_str=""):
-        """Preenche a lista de scroll com os cards das ocorrências."""
+                               start_date_str=start_date_str, end_date_str=end_date_str,
+                               keep_position=keep_position)
+
+    @staticmethod
+    def _matches_filters(occ, status_criteria, type_criteria, start_day, end_day):
+        """Os mesmos critérios do OccurrenceColumnStore.filter, para uma única ocorrência."""
+        if status_criteria is not None and occ.status not in status_criteria:
+            return False
+        if type_criteria is not None and occ.occurrence_type.value != type_criteria:
+            return False
+        if start_day or end_day:
+            if occ.registered_at is None:
+                return False
+            day = occ.registered_at.date()
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                return False
+        return True
+
+    def _populate_history(self, occurrences, user_profile, search_term="", selected_status="TODOS", selected_type="TODOS", start_date_str="", end_date_str="", new_items=None, keep_position=False):
+        """
+        Preenche a lista de scroll com os cards das ocorrências.
+        Com `new_items` (página acabada de carregar), apenas acrescenta os cards dessas ocorrências.
+        Com `keep_position`, a lista não volta ao topo.
+        """
         main_group = user_profile.get("main_group")
         sub_group = user_profile.get("sub_group")
         is_admin_or_super_admin = (main_group == "67_TELECOM" and (sub_group == "ADMIN" or sub_group == "SUPER_ADMIN"))
@@ -398,10 +546,10 @@ class HistoryView(ctk.CTkFrame):
             self.title_label.configure(text=f"Histórico de Ocorrências: {company}")
 
 
-        for widget in self.history_scrollable_frame.winfo_children():
-            widget.destroy()
+        self._can_edit_status = is_admin_or_super_admin
 
         if not occurrences:
+            self.history_scrollable_frame.set_items([])
             self.history_scrollable_frame.configure(label_text="Nenhuma ocorrência encontrada para os filtros aplicados.",
                                                     label_text_color=self.controller.TEXT_COLOR)
             self.stats_footer_label.configure(text="") # Limpa o rodapé se não houver ocorrências
@@ -416,58 +564,88 @@ class HistoryView(ctk.CTkFrame):
         elif start_date_str: filter_summary.append(f"A partir de: {start_date_str}")
         elif end_date_str: filter_summary.append(f"Até: {end_date_str}")
 
-        label_text = f"Resultados ({len(occurrences)}): {', '.join(filter_summary)}" if filter_summary else f"Todas as Ocorrências ({len(occurrences)})"
+        count_text = f"{len(occurrences)}+" if self._has_more_pages else f"{len(occurrences)}"
+        label_text = f"Resultados ({count_text}): {', '.join(filter_summary)}" if filter_summary else f"Todas as Ocorrências ({count_text})"
         self.history_scrollable_frame.configure(label_text=label_text, label_text_color=self.controller.TEXT_COLOR)
 
-        status_options_for_editing = ["REGISTRADO", "EM ANÁLISE", "AGUARDANDO TERCEIROS", "PARCIALMENTE RESOLVIDO", "RESOLVIDO", "CANCELADO"]
-
-        for item in occurrences:
-            item_id = item.get('ID', 'N/A')
-            card_frame = ctk.CTkFrame(self.history_scrollable_frame, fg_color="gray20")
-            card_frame.pack(fill="x", padx=5, pady=5)
-            card_frame.grid_columnconfigure(0, weight=1)
-
-            info_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-            info_frame.grid(row=0, column=0, padx=10, pady=5, sticky="w")
-            
-            title = item.get('Título da Ocorrência') or item.get('title')
-            date_str_in_title = re.fullmatch(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", str(title))
-
-            if not title or not str(title).strip() or date_str_in_title:
-                item_id_prefix = item_id.split('-')[0] if '-' in item_id else item_id
-                if item_id_prefix == 'SCALL': title = f"Chamada Simples de {item.get('Origem', 'N/A')} para {item.get('Destino', 'N/A')}"
-                elif item_id_prefix == 'EQUIP': title = item.get('Tipo de Equipamento', f"Equipamento {item_id}")
-                else: title = 'Ocorrência sem Título'
-
-            date_str = item.get('Data de Registro', 'N/A')
-            status = item.get('Status', 'N/A')
-            formatted_date = 'N/A'
-            if date_str != 'N/A':
-                try: formatted_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S").strftime("%d-%m-%Y")
-                except ValueError: formatted_date = date_str
-
-            ctk.CTkLabel(info_frame, text=f"ID: {item_id} - {title}", font=ctk.CTkFont(size=14, weight="bold"), anchor="w", text_color=self.controller.TEXT_COLOR).pack(anchor="w")
-            ctk.CTkLabel(info_frame, text=f"Registrado por: {item.get('Nome do Registrador', 'N/A')} em {formatted_date}", anchor="w", text_color="gray60").pack(anchor="w")
-
-            controls_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-            controls_frame.grid(row=0, column=1, padx=10, pady=10, sticky="e")
-
-            if is_admin_or_super_admin:
-                status_combo = ctk.CTkComboBox(controls_frame, values=status_options_for_editing, width=180, fg_color="gray20", text_color=self.controller.TEXT_COLOR, border_color=self.controller.PRIMARY_COLOR, button_color=self.controller.PRIMARY_COLOR, button_hover_color=self.controller.ACCENT_COLOR, command=partial(self._on_status_change_from_history, item_id))
-                status_combo.set(status)
-                status_combo.pack(side="left", padx=(0, 10))
-            else:
-                ctk.CTkLabel(info_frame, text=f"Status: {status}", anchor="w", font=ctk.CTkFont(weight="bold"), text_color=self.controller.TEXT_COLOR).pack(anchor="w")
-
-            open_button = ctk.CTkButton(controls_frame, text="Abrir", width=80, command=partial(self.controller.show_occurrence_details, item_id), fg_color=self.controller.PRIMARY_COLOR, text_color=self.controller.TEXT_COLOR, hover_color=self.controller.ACCENT_COLOR)
-            open_button.pack(side="left")
+        # Os cards só são criados para a área visível (ver _create_history_card/_bind_history_card).
+        if new_items is None or not self.history_scrollable_frame.items:
+            self.history_scrollable_frame.set_items(occurrences, keep_position=keep_position)
+        else:
+            self.history_scrollable_frame.append_items(new_items)
 
         stats_text = ""
-        if main_group == 'PARTNER': stats_text = f"Estatística: {len(occurrences)} ocorrências da {user_profile.get('company', 'N/A')}"
-        elif main_group == 'PREFEITURA': stats_text = f"Estatística: {len(occurrences)} ocorrências da Prefeitura"
-        elif main_group == '67_TELECOM': stats_text = f"Estatística: {len(occurrences)} ocorrências no total"
+        if main_group == 'PARTNER': stats_text = f"Estatística: {count_text} ocorrências da {user_profile.get('company', 'N/A')}"
+        elif main_group == 'PREFEITURA': stats_text = f"Estatística: {count_text} ocorrências da Prefeitura"
+        elif main_group == '67_TELECOM': stats_text = f"Estatística: {count_text} ocorrências no total"
         self.stats_footer_label.configure(text=stats_text)
 
+    def _on_visible_cards_changed(self, items):
+        """Pré-carrega as ocorrências visíveis quando o scroll pára (não a cada movimento)."""
+        if self._prefetch_job is not None:
+            self.after_cancel(self._prefetch_job)
+        occurrence_ids = [item.get('ID') for item in items]
+        self._prefetch_job = self.after(self.PREFETCH_DELAY_MS, self._prefetch_visible, occurrence_ids)
+
+    def _prefetch_visible(self, occurrence_ids):
+        self._prefetch_job = None
+        self.controller.prefetch_visible_occurrences(occurrence_ids)
+
+    def _create_history_card(self, parent):
+        """Cria um card vazio; o VirtualList reutiliza-o para várias ocorrências."""
+        card_frame = ctk.CTkFrame(parent, fg_color="gray20")
+        card_frame.grid_columnconfigure(0, weight=1)
+        card_frame.item_id = None
+
+        info_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
+        info_frame.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        card_frame.title_label = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(size=14, weight="bold"), anchor="w", text_color=self.controller.TEXT_COLOR)
+        card_frame.title_label.pack(anchor="w")
+        card_frame.registrar_label = ctk.CTkLabel(info_frame, text="", anchor="w", text_color="gray60")
+        card_frame.registrar_label.pack(anchor="w")
+        card_frame.status_label = ctk.CTkLabel(info_frame, text="", anchor="w", font=ctk.CTkFont(weight="bold"), text_color=self.controller.TEXT_COLOR)
+
+        controls_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
+        controls_frame.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+        card_frame.status_combo = ctk.CTkComboBox(controls_frame, values=self.STATUS_OPTIONS_FOR_EDITING, width=180, fg_color="gray20", text_color=self.controller.TEXT_COLOR, border_color=self.controller.PRIMARY_COLOR, button_color=self.controller.PRIMARY_COLOR, button_hover_color=self.controller.ACCENT_COLOR,
+                                                  command=lambda new_status, card=card_frame: self._on_status_change_from_history(card.item_id, new_status))
+        open_button = ctk.CTkButton(controls_frame, text="Abrir", width=80, command=lambda card=card_frame: self.controller.show_occurrence_details(card.item_id), fg_color=self.controller.PRIMARY_COLOR, text_color=self.controller.TEXT_COLOR, hover_color=self.controller.ACCENT_COLOR)
+        open_button.grid(row=0, column=1)
+        card_frame.bind("<Enter>", lambda event, card=card_frame: self.controller.prefetch_occurrence(card.item_id))
+        return card_frame
+
+    def _bind_history_card(self, card_frame, item, index):
+        """Preenche um card com os dados de uma ocorrência."""
+        item_id = item.get('ID', 'N/A')
+        card_frame.item_id = item_id
+
+        title = item.get('Título da Ocorrência') or item.get('title')
+        date_str_in_title = re.fullmatch(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", str(title))
+
+        if not title or not str(title).strip() or date_str_in_title:
+            item_id_prefix = item_id.split('-')[0] if '-' in item_id else item_id
+            if item_id_prefix == 'SCALL': title = f"Chamada Simples de {item.get('Origem', 'N/A')} para {item.get('Destino', 'N/A')}"
+            elif item_id_prefix == 'EQUIP': title = item.get('Tipo de Equipamento', f"Equipamento {item_id}")
+            else: title = 'Ocorrência sem Título'
+
+        status = item.get('Status', 'N/A')
+        if item.registered_at is not None:
+            formatted_date = item.registered_at.strftime("%d-%m-%Y")
+        else:
+            formatted_date = item.get('Data de Registro') or 'N/A'
+
+        card_frame.title_label.configure(text=f"ID: {item_id} - {title}")
+        card_frame.registrar_label.configure(text=f"Registrado por: {item.get('Nome do Registrador', 'N/A')} em {formatted_date}")
+
+        if self._can_edit_status:
+            card_frame.status_label.pack_forget()
+            card_frame.status_combo.set(status)
+            card_frame.status_combo.grid(row=0, column=0, padx=(0, 10))
+        else:
+            card_frame.status_combo.grid_remove()
+            card_frame.status_label.configure(text=f"Status: {status}")
+            card_frame.status_label.pack(anchor="w")
+
     def _on_status_change_from_history(self, occurrence_id, new_status):
         """
         Chamado quando o status de uma ocorrência é alterado no ComboBox do histórico.
@@ -2,6 +2,10 @@
 # ARQUIVO: src/views/occurrence_detail_view.py
 # DESCRIÇÃO: (VERSÃO CORRIGIDA PÓS-REFATORAÇÃO) Contém a classe de interface
 #            para a janela que exibe os detalhes de uma ocorrência.
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: Os comentários são escritos em segundo plano (fila de escrita do
+#        SheetsService) e mostrados logo; a lista é depois corrigida widget a
+#        widget (_show_comments), sem recriar os restantes nem voltar a lê-los.
 # ==============================================================================
 
 import customtkinter as ctk
@@ -21,6 +25,9 @@ class OccurrenceDetailView(ctk.CTkToplevel):
         self.master = master
         self.occurrence_data = occurrence_data
         self.editing_comment_id = None
+        # Comentários mostrados e respetivos widgets, por ID (em minúsculas).
+        self.shown_comments = {}
+        self.comment_widgets = {}
 
         self.title(f"Detalhes da Ocorrência: {occurrence_data.get('ID', 'N/A')}")
         self.geometry("600x650")
@@ -181,6 +188,9 @@ class OccurrenceDetailView(ctk.CTkToplevel):
         self.comments_container = ctk.CTkFrame(scrollable_frame, fg_color="gray20")
         self.comments_container.pack(fill="x", padx=10, pady=5)
 
+        self.comments_status_label = ctk.CTkLabel(self.comments_container, text="Carregando comentários...", text_color="gray60")
+        self.comments_status_label.pack(padx=10, pady=5)
+
         self.new_comment_textbox = ctk.CTkTextbox(scrollable_frame, height=80,
                                                   fg_color="gray20", text_color=self.TEXT_COLOR,
                                                   border_color="gray40")
@@ -192,6 +202,12 @@ class OccurrenceDetailView(ctk.CTkToplevel):
                                                 hover_color=self.ACCENT_COLOR)
         self.add_comment_button.pack(fill="x", padx=10, pady=(0, 10))
 
+        # Os comentários já em cache (ex.: pré-carregados) aparecem logo; a
+        # leitura seguinte só corrige o que tiver mudado entretanto.
+        if hasattr(self.controller, 'occurrence_service'):
+            cached_comments = self.controller.occurrence_service.get_cached_comments(occurrence_data.get('ID', 'N/A'))
+            if cached_comments is not None:
+                self._show_comments(cached_comments)
         self._load_comments(occurrence_data.get('ID', 'N/A'))
 
         close_button = ctk.CTkButton(self, text="Fechar", command=self.destroy,
@@ -201,53 +217,99 @@ class OccurrenceDetailView(ctk.CTkToplevel):
         close_button.pack(pady=10)
 
     def _load_comments(self, occurrence_id):
-        """Carrega e exibe os comentários para a ocorrência."""
-        for widget in self.comments_container.winfo_children():
-            widget.destroy()
-
-        # Tenta obter comentários do controller, se disponível
-        comments = []
-        if hasattr(self.controller, 'occurrence_service'):
-            comments = self.controller.occurrence_service.get_comments(occurrence_id)
-        
-        if not comments:
-            ctk.CTkLabel(self.comments_container, text="Nenhum comentário ainda.", text_color="gray60").pack(padx=10, pady=5)
+        """Lê os comentários da ocorrência em segundo plano e mostra-os."""
+        if not hasattr(self.controller, 'occurrence_service'):
+            self._show_comments([])
             return
 
-        for comment in comments:
-            comment_frame = ctk.CTkFrame(self.comments_container, fg_color="gray15")
-            comment_frame.pack(fill="x", padx=5, pady=3)
-            comment_frame.grid_columnconfigure(0, weight=1)
+        self.controller.run_in_background(self.controller.occurrence_service.get_comments, occurrence_id,
+                                          on_success=lambda comments: self.winfo_exists() and self._show_comments(comments),
+                                          on_error=lambda error: self.winfo_exists() and not self.comment_widgets and self._show_comments([]),
+                                          key=f"OccurrenceDetailView.comments:{occurrence_id}")
+
+    def _refresh_comments_locally(self):
+        """
+        Volta a mostrar os comentários a partir do cache do serviço (que já
+        inclui as escritas pendentes), sem aceder à planilha. Se a ocorrência
+        já não estiver em cache, lê-a de novo.
+        """
+        occurrence_id = self.occurrence_data.get('ID', 'N/A')
+        comments = self.controller.occurrence_service.get_cached_comments(occurrence_id)
+        if comments is None:
+            self._load_comments(occurrence_id)
+        else:
+            self._show_comments(comments)
 
-            comment_date = comment.get('Data_Comentario', 'N/A')
-            if comment_date != 'N/A':
-                try:
-                    date_obj = datetime.strptime(comment_date, "%Y-%m-%d %H:%M:%S")
-                    comment_date = date_obj.strftime("%d-%m-%Y %H:%M:%S")
-                except ValueError:
-                    pass
+    def _show_comments(self, comments):
+        """
+        Atualiza a lista para `comments` (do mais recente para o mais antigo),
+        mexendo apenas nos widgets dos comentários novos, alterados ou removidos.
+        """
+        wanted = {str(comment.get('id_comentario', '')).strip().lower(): comment for comment in comments}
 
-            header_text = f"Por: {comment.get('Nome_Autor', 'N/A')} em {comment_date}"
-            ctk.CTkLabel(comment_frame, text=header_text, font=ctk.CTkFont(weight="bold"), text_color=self.PRIMARY_COLOR).grid(row=0, column=0, sticky="w", padx=10, pady=(5,0))
-            
-            comment_text_label = ctk.CTkLabel(comment_frame, text=comment.get('Comentario', ''), wraplength=450, justify="left", text_color=self.TEXT_COLOR)
-            comment_text_label.grid(row=1, column=0, sticky="w", padx=10, pady=(0,5))
+        for comment_key in [key for key in self.comment_widgets if key not in wanted]:
+            self.comment_widgets.pop(comment_key).destroy()
+            self.shown_comments.pop(comment_key, None)
 
-            if comment.get('Email_Autor') == self.controller.user_email:
-                button_frame = ctk.CTkFrame(comment_frame, fg_color="transparent")
-                button_frame.grid(row=0, column=1, rowspan=2, sticky="e", padx=5, pady=5)
+        if wanted:
+            self.comments_status_label.pack_forget()
+        else:
+            self.comments_status_label.configure(text="Nenhum comentário ainda.")
+            self.comments_status_label.pack(padx=10, pady=5)
+
+        keys = list(wanted)
+        for position, comment_key in enumerate(keys):
+            comment = wanted[comment_key]
+            shown = self.shown_comments.get(comment_key)
+            self.shown_comments[comment_key] = comment
+            if shown is not None:
+                if shown.get('Comentario', '') != comment.get('Comentario', ''):
+                    self.comment_widgets[comment_key].text_label.configure(text=comment.get('Comentario', ''))
+                continue
+            # Um comentário novo fica antes do primeiro já mostrado que lhe deva seguir.
+            next_widget = next((self.comment_widgets[key] for key in keys[position + 1:] if key in self.comment_widgets), None)
+            comment_frame = self._create_comment_widget(comment_key, comment)
+            if next_widget is not None:
+                comment_frame.pack(fill="x", padx=5, pady=3, before=next_widget)
+            else:
+                comment_frame.pack(fill="x", padx=5, pady=3)
+            self.comment_widgets[comment_key] = comment_frame
+
+    def _create_comment_widget(self, comment_key, comment):
+        """Cria (sem posicionar) o cartão de um comentário."""
+        comment_frame = ctk.CTkFrame(self.comments_container, fg_color="gray15")
+        comment_frame.grid_columnconfigure(0, weight=1)
+
+        comment_date = comment.get('Data_Comentario', 'N/A')
+        if comment_date != 'N/A':
+            try:
+                date_obj = datetime.strptime(comment_date, "%Y-%m-%d %H:%M:%S")
+                comment_date = date_obj.strftime("%d-%m-%Y %H:%M:%S")
+            except ValueError:
+                pass
+
+        header_text = f"Por: {comment.get('Nome_Autor', 'N/A')} em {comment_date}"
+        ctk.CTkLabel(comment_frame, text=header_text, font=ctk.CTkFont(weight="bold"), text_color=self.PRIMARY_COLOR).grid(row=0, column=0, sticky="w", padx=10, pady=(5,0))
+
+        comment_frame.text_label = ctk.CTkLabel(comment_frame, text=comment.get('Comentario', ''), wraplength=450, justify="left", text_color=self.TEXT_COLOR)
+        comment_frame.text_label.grid(row=1, column=0, sticky="w", padx=10, pady=(0,5))
 
-                edit_button = ctk.CTkButton(button_frame, text="✏️ Editar", width=70, height=25,
-                                            command=lambda c=comment: self._edit_comment(c),
-                                            fg_color="gray40", text_color="white", hover_color="gray50",
-                                            font=ctk.CTkFont(size=11))
-                edit_button.pack(pady=(0, 2))
+        if comment.get('Email_Autor') == self.controller.user_email:
+            button_frame = ctk.CTkFrame(comment_frame, fg_color="transparent")
+            button_frame.grid(row=0, column=1, rowspan=2, sticky="e", padx=5, pady=5)
 
-                delete_button = ctk.CTkButton(button_frame, text="🗑️ Excluir", width=70, height=25,
-                                              command=lambda c_id=comment.get('id_comentario'): self._delete_comment(c_id),
-                                              fg_color=self.DANGER_COLOR, text_color="white", hover_color=self.DANGER_HOVER_COLOR,
-                                              font=ctk.CTkFont(size=11))
-                delete_button.pack(pady=(2, 0))
+            edit_button = ctk.CTkButton(button_frame, text="✏️ Editar", width=70, height=25,
+                                        command=lambda: self._edit_comment(self.shown_comments[comment_key]),
+                                        fg_color="gray40", text_color="white", hover_color="gray50",
+                                        font=ctk.CTkFont(size=11))
+            edit_button.pack(pady=(0, 2))
+
+            delete_button = ctk.CTkButton(button_frame, text="🗑️ Excluir", width=70, height=25,
+                                          command=lambda c_id=comment.get('id_comentario'): self._delete_comment(c_id),
+                                          fg_color=self.DANGER_COLOR, text_color="white", hover_color=self.DANGER_HOVER_COLOR,
+                                          font=ctk.CTkFont(size=11))
+            delete_button.pack(pady=(2, 0))
+        return comment_frame
 
     def _add_or_update_comment(self):
         """Adiciona um novo comentário ou atualiza um existente."""
@@ -268,23 +330,37 @@ class OccurrenceDetailView(ctk.CTkToplevel):
             messagebox.showerror("Erro", "Serviço de ocorrências não disponível.")
             return
             
+        # A escrita fica na fila do serviço (enviada numa thread secundária); o
+        # comentário é mostrado já e corrigido em _on_comment_write_error se falhar.
         if self.editing_comment_id:
-            # CORREÇÃO: Chama o método do serviço de ocorrências
-            success, message = self.controller.occurrence_service.update_comment(self.editing_comment_id, comment_text)
+            success, message = self.controller.occurrence_service.update_comment(self.editing_comment_id, comment_text,
+                                                                                  on_error=self._on_comment_write_error)
             self.editing_comment_id = None
             self.add_comment_button.configure(text="Adicionar Comentário", fg_color=self.PRIMARY_COLOR, hover_color=self.ACCENT_COLOR)
         else:
-            # CORREÇÃO: Chama o método do serviço de ocorrências
-            success, message = self.controller.occurrence_service.add_comment(occurrence_id, user_email, user_name, comment_text)
+            success, message = self.controller.occurrence_service.add_comment(occurrence_id, user_email, user_name, comment_text,
+                                                                               on_error=self._on_comment_write_error)
         
         if success:
             from views.components.notification_popup import NotificationPopup
             NotificationPopup(self.master, message=message, type="success")
             self.new_comment_textbox.delete("1.0", "end")
-            self._load_comments(occurrence_id)
+            self._refresh_comments_locally()
         else:
             messagebox.showerror("Erro", f"Não foi possível completar a operação: {message}")
 
+    def _on_comment_write_error(self, error_message):
+        """
+        Chamado pela fila de escrita (numa thread secundária) quando um comentário
+        não pôde ser gravado. A alteração já saiu da fila, por isso basta voltar
+        a mostrar os comentários para a desfazer; a mensagem é mostrada na thread da UI.
+        """
+        def _show_error():
+            messagebox.showerror("Erro", f"Não foi possível gravar o comentário: {error_message}")
+            if self.winfo_exists():
+                self._refresh_comments_locally()
+        self.controller.post_to_ui(_show_error)
+
     def _edit_comment(self, comment_data):
         """Preenche a caixa de texto com o comentário para edição."""
         self.new_comment_textbox.delete("1.0", "end")
@@ -301,11 +377,14 @@ class OccurrenceDetailView(ctk.CTkToplevel):
             return
             
         if messagebox.askyesno("Confirmar Exclusão", "Tem certeza que deseja excluir este comentário? Esta ação não pode ser desfeita."):
-            # CORREÇÃO: Chama o método do serviço de ocorrências
-            success, message = self.controller.occurrence_service.delete_comment(comment_id)
+            success, message = self.controller.occurrence_service.delete_comment(comment_id, on_error=self._on_comment_write_error)
             if success:
+                if self.editing_comment_id == comment_id:
+                    self.editing_comment_id = None
+                    self.new_comment_textbox.delete("1.0", "end")
+                    self.add_comment_button.configure(text="Adicionar Comentário", fg_color=self.PRIMARY_COLOR, hover_color=self.ACCENT_COLOR)
                 from views.components.notification_popup import NotificationPopup
                 NotificationPopup(self.master, message=message, type="success")
-                self._load_comments(self.occurrence_data.get('ID', 'N/A'))
+                self._refresh_comments_locally()
             else:
                 messagebox.showerror("Erro", f"Não foi possível excluir o comentário: {message}")
\ No newline at end of file
@@ -1,13 +1,16 @@
 # ==============================================================================
 # ARQUIVO: src/views/management/access_management_view.py
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: A lista de solicitações usa o VirtualList (cards reutilizados ao fazer scroll).
 # ==============================================================================
 
 import customtkinter as ctk
-import threading
-from functools import partial
+from views.components.virtual_list import VirtualList
 
 class AccessManagementView(ctk.CTkFrame):
     """ Tela para gerenciar solicitações de acesso pendentes. """
+    CARD_HEIGHT = 65 # Altura de cada card na lista (VirtualList)
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -18,7 +21,8 @@ class AccessManagementView(ctk.CTkFrame):
 
         ctk.CTkLabel(self, text="Gerenciar Solicitações de Acesso", font=ctk.CTkFont(size=24, weight="bold")).grid(row=0, column=0, padx=20, pady=10, sticky="ew")
         
-        self.pending_users_frame = ctk.CTkScrollableFrame(self, label_text="Carregando solicitações...")
+        self.pending_users_frame = VirtualList(self, create_card=self._create_request_card, bind_card=self._bind_request_card,
+                                               row_height=self.CARD_HEIGHT, label_text="Carregando solicitações...")
         self.pending_users_frame.grid(row=1, column=0, pady=10, padx=20, sticky="nsew")
 
         ctk.CTkButton(self, text="Atualizar Lista", command=self.load_access_requests).grid(row=2, column=0, pady=10, padx=20, sticky="ew")
@@ -30,25 +34,33 @@ class AccessManagementView(ctk.CTkFrame):
     def load_access_requests(self):
         """ Carrega as solicitações de acesso em segundo plano. """
         self.pending_users_frame.configure(label_text="Carregando...")
-        for widget in self.pending_users_frame.winfo_children():
-            widget.destroy()
-        threading.Thread(target=self._load_requests_thread, daemon=True).start()
-
-    def _load_requests_thread(self):
-        pending_list = self.controller.get_pending_requests()
-        self.after(0, self._populate_requests, pending_list)
+        self.pending_users_frame.set_items([])
+        self.controller.run_in_background(self.controller.get_pending_requests,
+                                          on_success=self._populate_requests,
+                                          on_error=lambda error: self._populate_requests([]),
+                                          group="AccessManagementView", key="AccessManagementView.requests")
 
     def _populate_requests(self, pending_list):
         """ Popula a UI com as solicitações pendentes. """
         if not pending_list:
+            self.pending_users_frame.set_items([])
             self.pending_users_frame.configure(label_text="Nenhuma solicitação pendente.")
             return
         self.pending_users_frame.configure(label_text="")
-        
-        for user in pending_list:
-            card = ctk.CTkFrame(self.pending_users_frame, fg_color="gray20")
-            card.pack(fill="x", pady=5, padx=5)
-            info = f"Nome: {user.get('name', 'N/A')} (@{user.get('username', 'N/A')})\nE-mail: {user.get('email')}"
-            ctk.CTkLabel(card, text=info, justify="left").pack(side="left", padx=10, pady=5)
-            ctk.CTkButton(card, text="Rejeitar", command=partial(self.controller.update_user_access, user['email'], 'rejected'), fg_color="red").pack(side="right", padx=5, pady=5)
-            ctk.CTkButton(card, text="Aprovar", command=partial(self.controller.update_user_access, user['email'], 'approved'), fg_color="green").pack(side="right", padx=5, pady=5)
\ No newline at end of file
+        self.pending_users_frame.set_items(pending_list)
+
+    def _create_request_card(self, parent):
+        """ Cria um card vazio; o VirtualList reutiliza-o para várias solicitações. """
+        card = ctk.CTkFrame(parent, fg_color="gray20")
+        card.email = None
+        card.info_label = ctk.CTkLabel(card, text="", justify="left")
+        card.info_label.pack(side="left", padx=10, pady=5)
+        ctk.CTkButton(card, text="Rejeitar", command=lambda c=card: self.controller.update_user_access(c.email, 'rejected'), fg_color="red").pack(side="right", padx=5, pady=5)
+        ctk.CTkButton(card, text="Aprovar", command=lambda c=card: self.controller.update_user_access(c.email, 'approved'), fg_color="green").pack(side="right", padx=5, pady=5)
+        return card
+
+    def _bind_request_card(self, card, user, index):
+        """ Preenche um card com os dados de uma solicitação. """
+        card.email = user['email']
+        info = f"Nome: {user.get('name', 'N/A')} (@{user.get('username', 'N/A')})\nE-mail: {user.get('email')}"
+        card.info_label.configure(text=info)
@@ -3,7 +3,6 @@
 # ==============================================================================
 
 import customtkinter as ctk
-import threading
 
 class AdminDashboardView(ctk.CTkFrame):
     """ Dashboard de gestão para administradores. """
@@ -45,24 +44,29 @@ class AdminDashboardView(ctk.CTkFrame):
 
     def on_show(self):
         """ Carrega os dados para os cards. """
-        threading.Thread(target=self._load_card_data, daemon=True).start()
+        # Usa o cache; se estiver fora do prazo, os cards são atualizados quando chegar o novo.
+        self.refresh(force_refresh=False)
 
-    def _load_card_data(self):
-        """ Busca os dados para os cards em segundo plano. """
-        try:
-            pending_req_count = len(self.controller.get_pending_requests())
-            self.after(0, lambda: self.pending_access_card.configure(text=str(pending_req_count)))
-            
-            active_users_count = len([u for u in self.controller.get_all_users(True) if u.get('status') == 'approved'])
-            self.after(0, lambda: self.active_users_card.configure(text=str(active_users_count)))
-            
-            # Usa o método específico para admin que retorna todas as ocorrências
-            all_occurrences = self.controller.get_all_occurrences_for_admin(True)
-            pending_occ_count = len([o for o in all_occurrences if o.get('Status') not in ['RESOLVIDO', 'CANCELADO']])
-            self.after(0, lambda: self.pending_occurrences_card.configure(text=str(pending_occ_count)))
-        except Exception as e:
-            print(f"Erro ao carregar dados do dashboard: {e}")
-            # Define valores padrão em caso de erro
-            self.after(0, lambda: self.pending_access_card.configure(text="0"))
-            self.after(0, lambda: self.active_users_card.configure(text="0"))
-            self.after(0, lambda: self.pending_occurrences_card.configure(text="0"))
+    def refresh(self, force_refresh=True):
+        """ Recarrega os cards em segundo plano (com force_refresh=False, a partir do cache). """
+        # Cada card é atualizado assim que o seu valor chega.
+        self.controller.run_in_background(lambda: len(self.controller.get_pending_requests()),
+                                          on_success=lambda count: self.pending_access_card.configure(text=str(count)),
+                                          on_error=lambda error: self.pending_access_card.configure(text="0"),
+                                          group="AdminDashboardView", key="AdminDashboardView.pending_requests")
+        self.controller.run_in_background(self._count_active_users, force_refresh,
+                                          on_success=lambda count: self.active_users_card.configure(text=str(count)),
+                                          on_error=lambda error: self.active_users_card.configure(text="0"),
+                                          group="AdminDashboardView", key="AdminDashboardView.active_users")
+        self.controller.run_in_background(self._count_pending_occurrences, force_refresh,
+                                          on_success=lambda count: self.pending_occurrences_card.configure(text=str(count)),
+                                          on_error=lambda error: self.pending_occurrences_card.configure(text="0"),
+                                          group="AdminDashboardView", key="AdminDashboardView.pending_occurrences")
+
+    def _count_active_users(self, force_refresh=True):
+        return len([u for u in self.controller.get_all_users(force_refresh) if u.get('status') == 'approved'])
+
+    def _count_pending_occurrences(self, force_refresh=True):
+        # Todas as ocorrências, em colunas: a contagem é uma redução sobre os códigos de status
+        occurrence_store = self.controller.get_occurrence_store_for_admin(force_refresh)
+        return occurrence_store.count(exclude_statuses=['RESOLVIDO', 'CANCELADO'])
@@ -2,20 +2,27 @@
 # ARQUIVO: src/views/user_management_view.py
 # DESCRIÇÃO: Contém a classe de interface para a tela de Gerenciamento de Usuários.
 #            (VERSÃO OTIMIZADA PARA CARREGAMENTO EM SEGUNDO PLANO)
+# DATA DA ATUALIZAÇÃO: 17/10/2026
+# NOTAS: A lista usa o VirtualList, que reutiliza os cards ao fazer scroll.
+#        Por isso as escolhas feitas nos ComboBoxes são guardadas em
+#        `edited_profiles` (por e-mail) e não apenas nos widgets.
 # ==============================================================================
 
 import customtkinter as ctk
 from functools import partial
-import threading
 from tkinter import messagebox
 import json
 from builtins import super, list, Exception, print, str, hasattr, len
+from views.components.virtual_list import VirtualList
 
 class UserManagementView(ctk.CTkFrame):
     """
     Tela para administradores gerenciarem todos os usuários registrados.
     Permite visualizar, filtrar e editar perfis de usuários.
     """
+    CARD_HEIGHT = 75 # Altura de cada card na lista (VirtualList)
+    MAIN_GROUP_OPTIONS = ["67_TELECOM", "PARTNER", "PREFEITURA"]
+
     def __init__(self, parent, controller):
         """
         Inicializa a tela de Gerenciamento de Usuários.
@@ -28,8 +35,10 @@ class UserManagementView(ctk.CTkFrame):
 
         self.configure(fg_color=self.controller.BASE_COLOR)
 
-        # Dicionários para armazenar o estado original dos perfis e os widgets de edição
+        # Dicionários para armazenar o estado original dos perfis, os valores
+        # escolhidos pelo administrador e os widgets de edição dos cards visíveis
         self.original_profiles = {}
+        self.edited_profiles = {}
         self.profile_updaters = {}
 
         # Listas de opções para os ComboBoxes de seleção de perfil
@@ -61,7 +70,8 @@ class UserManagementView(ctk.CTkFrame):
         self.search_user_entry.bind("<KeyRelease>", self.filter_users_admin)
 
         # --- Frame Rolável para a Lista de Usuários ---
-        self.all_users_frame = ctk.CTkScrollableFrame(self, label_text="Carregando usuários...")
+        self.all_users_frame = VirtualList(self, create_card=self._create_user_card, bind_card=self._bind_user_card,
+                                           row_height=self.CARD_HEIGHT, label_text="Carregando usuários...")
         self.all_users_frame.grid(row=2, column=0, pady=10, padx=20, sticky="nsew")
 
         # --- Botões de Ação ---
@@ -101,93 +111,115 @@ class UserManagementView(ctk.CTkFrame):
         """
         self.all_users_frame.configure(label_text="Carregando usuários...")
         # Limpa a lista de usuários existente antes de carregar a nova
-        for widget in self.all_users_frame.winfo_children():
-            widget.destroy()
+        self.all_users_frame.set_items([])
         self.update_idletasks() # Força a atualização da UI para exibir a mensagem de carregamento
-        # Inicia a thread para buscar os dados em segundo plano
-        threading.Thread(target=self._load_users_thread, args=(force_refresh,), daemon=True).start()
-
-    def _load_users_thread(self, force_refresh):
-        """
-        Método executado na thread secundária para buscar a lista de usuários.
-        Após a busca, agenda a atualização da interface na thread principal.
-        
-        :param force_refresh: Passado para a função de busca de dados.
-        """
-        all_users_list = self.controller.get_all_users(force_refresh)
-        # Agenda a chamada ao método _populate_all_users na thread principal
-        self.after(0, self._populate_all_users, all_users_list)
+        # Busca os dados em segundo plano; _populate_all_users corre na thread principal
+        self.controller.run_in_background(self.controller.get_all_users, force_refresh,
+                                          on_success=self._populate_all_users,
+                                          on_error=lambda error: self._populate_all_users([]),
+                                          group="UserManagementView", key="UserManagementView.users")
 
     def _populate_all_users(self, all_users_list):
         """
         Popula a interface com os cards de cada usuário, incluindo os
-        controles para edição de perfil (ComboBoxes).
+        controles para edição de perfil (ComboBoxes). Só são criados os cards
+        da área visível (ver _create_user_card/_bind_user_card).
         
         :param all_users_list: A lista de dicionários de usuários a ser exibida.
         """
         self.profile_updaters.clear()
         self.original_profiles.clear()
-        for widget in self.all_users_frame.winfo_children():
-            widget.destroy()
+        self.edited_profiles.clear()
 
         if not all_users_list:
+            self.all_users_frame.set_items([])
             self.all_users_frame.configure(label_text="Nenhum usuário encontrado.")
             return
         self.all_users_frame.configure(label_text="")
-        
-        main_group_options = ["67_TELECOM", "PARTNER", "PREFEITURA"]
-        
+
+        users_with_email = []
         for user in all_users_list:
             email = user.get('email', '')
             if not email: continue
 
             # Armazena o perfil original para comparar com as edições
-            original_main_group = user.get('main_group', '')
-            original_sub_group = user.get('sub_group', '')
-            original_company = user.get('company', '')
-
             self.original_profiles[email] = {
-                'main_group': original_main_group,
-                'sub_group': original_sub_group,
-                'company': original_company
-            }
-
-            # Cria um card para cada usuário
-            card = ctk.CTkFrame(self.all_users_frame, fg_color="gray20")
-            card.pack(fill="x", pady=5, padx=5)
-            card.grid_columnconfigure(0, weight=1)
-            card.grid_columnconfigure(1, weight=2)
-
-            # Informações do usuário
-            info_text = f"{user.get('name', 'N/A')} (@{user.get('username', 'N/A')})"
-            ctk.CTkLabel(card, text=info_text, anchor="w").grid(row=0, column=0, padx=10, pady=5, sticky="w")
-            ctk.CTkLabel(card, text=email, anchor="w", text_color="gray60").grid(row=1, column=0, padx=10, pady=(0,5), sticky="w")
-
-            # Controles de edição do perfil
-            controls_frame = ctk.CTkFrame(card, fg_color="transparent")
-            controls_frame.grid_columnconfigure((0, 1, 2), weight=1)
-            controls_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=5, sticky="nsew")
-
-            main_group_combo = ctk.CTkComboBox(controls_frame, values=main_group_options, command=partial(self._on_main_group_change, email))
-            main_group_combo.set(original_main_group)
-            main_group_combo.grid(row=0, column=0, padx=(0, 5), sticky="ew")
-
-            sub_group_combo = ctk.CTkComboBox(controls_frame, values=[], command=partial(self._on_sub_group_change, email))
-            sub_group_combo.set(original_sub_group)
-            sub_group_combo.grid(row=0, column=1, padx=(0, 5), sticky="ew")
-
-            company_combo = ctk.CTkComboBox(controls_frame, values=[])
-            company_combo.set(original_company)
-            company_combo.grid(row=0, column=2, padx=(0, 5), sticky="ew")
-
-            # Armazena os widgets de edição para coletar os dados ao salvar
-            self.profile_updaters[email] = {
-                'main_group': main_group_combo,
-                'sub_group': sub_group_combo,
-                'company': company_combo
+                'main_group': user.get('main_group', ''),
+                'sub_group': user.get('sub_group', ''),
+                'company': user.get('company', '')
             }
-            # Inicializa os valores dos ComboBoxes dependentes
-            self._on_main_group_change(email, original_main_group, initial_load=True)
+            users_with_email.append(user)
+
+        self.all_users_frame.set_items(users_with_email)
+
+    def _create_user_card(self, parent):
+        """Cria um card vazio; o VirtualList reutiliza-o para vários usuários."""
+        card = ctk.CTkFrame(parent, fg_color="gray20")
+        card.grid_columnconfigure(0, weight=1)
+        card.grid_columnconfigure(1, weight=2)
+        card.email = None
+
+        # Informações do usuário
+        card.info_label = ctk.CTkLabel(card, text="", anchor="w")
+        card.info_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        card.email_label = ctk.CTkLabel(card, text="", anchor="w", text_color="gray60")
+        card.email_label.grid(row=1, column=0, padx=10, pady=(0,5), sticky="w")
+
+        # Controles de edição do perfil (os comandos usam o e-mail associado ao card nesse momento)
+        controls_frame = ctk.CTkFrame(card, fg_color="transparent")
+        controls_frame.grid_columnconfigure((0, 1, 2), weight=1)
+        controls_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=5, sticky="nsew")
+
+        main_group_combo = ctk.CTkComboBox(controls_frame, values=self.MAIN_GROUP_OPTIONS,
+                                           command=lambda value, c=card: self._on_main_group_change(c.email, value))
+        main_group_combo.grid(row=0, column=0, padx=(0, 5), sticky="ew")
+
+        sub_group_combo = ctk.CTkComboBox(controls_frame, values=[],
+                                          command=lambda value, c=card: self._on_sub_group_change(c.email, value))
+        sub_group_combo.grid(row=0, column=1, padx=(0, 5), sticky="ew")
+
+        company_combo = ctk.CTkComboBox(controls_frame, values=[],
+                                        command=lambda value, c=card: self._store_profile_values(c.email))
+        company_combo.grid(row=0, column=2, padx=(0, 5), sticky="ew")
+
+        card.profile_widgets = {
+            'main_group': main_group_combo,
+            'sub_group': sub_group_combo,
+            'company': company_combo
+        }
+        return card
+
+    def _bind_user_card(self, card, user, index):
+        """Preenche um card com os dados (originais ou já editados) de um usuário."""
+        if card.email:
+            # Guarda o que estava a ser editado no card antes de o reutilizar
+            self._store_profile_values(card.email)
+            self.profile_updaters.pop(card.email, None)
+
+        email = user.get('email', '')
+        card.email = email
+        card.info_label.configure(text=f"{user.get('name', 'N/A')} (@{user.get('username', 'N/A')})")
+        card.email_label.configure(text=email)
+
+        # Armazena os widgets de edição para coletar os dados ao salvar
+        self.profile_updaters[email] = card.profile_widgets
+        current_profile = self._current_profile(email)
+        card.profile_widgets['main_group'].set(current_profile['main_group'])
+        card.profile_widgets['sub_group'].set(current_profile['sub_group'])
+        card.profile_widgets['company'].set(current_profile['company'])
+        # Inicializa os valores dos ComboBoxes dependentes
+        self._on_main_group_change(email, current_profile['main_group'], initial_load=True)
+
+    def _current_profile(self, email):
+        """Perfil a mostrar para um usuário: o editado nesta tela, se existir, ou o original."""
+        return self.edited_profiles.get(email) or self.original_profiles[email]
+
+    def _store_profile_values(self, email):
+        """Guarda os valores atuais dos ComboBoxes do card de um usuário."""
+        widgets = self.profile_updaters.get(email)
+        if not widgets:
+            return
+        self.edited_profiles[email] = {field: combo.get().strip() for field, combo in widgets.items()}
 
     def _on_main_group_change(self, email, selected_main_group, initial_load=False):
         """
@@ -211,8 +243,8 @@ class UserManagementView(ctk.CTkFrame):
         sub_group_combo.configure(values=sub_group_options)
         
         # Define o valor do ComboBox
-        if initial_load and self.original_profiles[email]['sub_group'] in sub_group_options:
-            sub_group_combo.set(self.original_profiles[email]['sub_group'])
+        if initial_load and self._current_profile(email)['sub_group'] in sub_group_options:
+            sub_group_combo.set(self._current_profile(email)['sub_group'])
         elif sub_group_options:
             sub_group_combo.set(sub_group_options[0])
         else:
@@ -248,24 +280,31 @@ class UserManagementView(ctk.CTkFrame):
         company_combo.configure(values=company_options)
         
         # Define o valor do ComboBox
-        if initial_load and self.original_profiles[email]['company'] in company_options:
-            company_combo.set(self.original_profiles[email]['company'])
+        if initial_load and self._current_profile(email)['company'] in company_options:
+            company_combo.set(self._current_profile(email)['company'])
         elif company_options:
             company_combo.set(company_options[0])
         else:
             company_combo.set(company_to_set)
 
+        if not initial_load:
+            self._store_profile_values(email)
+
     def save_profile_changes(self):
         """
         Coleta todas as alterações de perfil feitas na tela, compara com os
         valores originais e envia um dicionário de 'changes' para o controlador
         para serem salvas em lote.
         """
+        # Os cards visíveis podem ter texto escrito que ainda não foi guardado
+        for email in list(self.profile_updaters):
+            self._store_profile_values(email)
+
         changes = {}
-        for email, widgets in self.profile_updaters.items():
-            new_main = widgets['main_group'].get().strip()
-            new_sub = widgets['sub_group'].get().strip()
-            new_comp = widgets['company'].get().strip()
+        for email, edited in self.edited_profiles.items():
+            new_main = edited['main_group']
+            new_sub = edited['sub_group']
+            new_comp = edited['company']
 
             # Aplica regras de negócio para garantir consistência
             if new_main == 'PARTNER':